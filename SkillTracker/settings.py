@@ -44,8 +44,11 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     # CORS middleware must be placed as high as possible
     'corsheaders.middleware.CorsMiddleware',
+    # opt-in, see REQUEST_PROFILING below; removes itself when disabled
+    'subscriptions.profiling.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
         'django.contrib.sessions.middleware.SessionMiddleware',
+    'subscriptions.middleware.SubscriberMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -60,7 +63,15 @@ if os.getenv('USE_SQLITE', 'True') == 'True':
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': env('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            # several processes write at once with sharded ingestion; take the
+            # write lock up front and wait for it instead of failing. WAL keeps
+            # readers from holding up another process's commit.
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+                'init_command': 'PRAGMA journal_mode=WAL;',
+            },
         }
     }
 else:
@@ -108,13 +119,46 @@ USE_TZ = True
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Request profiling (opt-in): Server-Timing header with DB/cache/total time,
+# slow request logging and sampled cProfile for the listed URL names
+REQUEST_PROFILING = env.bool('REQUEST_PROFILING', default=False)
+REQUEST_PROFILING_SLOW_MS = env.int('REQUEST_PROFILING_SLOW_MS', default=500)
+REQUEST_PROFILING_CPROFILE_URLS = env.list('REQUEST_PROFILING_CPROFILE_URLS', default=[])
+REQUEST_PROFILING_CPROFILE_RATE = env.float('REQUEST_PROFILING_CPROFILE_RATE', default=0.01)
+REQUEST_PROFILING_CPROFILE_DIR = env('REQUEST_PROFILING_CPROFILE_DIR', default='')
+
+# Upstream base URLs; point these at `manage.py upstream_stub` for benchmarks
+LEETCODE_BASE_URL = env('LEETCODE_BASE_URL', default='https://leetcode.com')
+CODEFORCES_BASE_URL = env('CODEFORCES_BASE_URL', default='https://codeforces.com')
+CODECHEF_BASE_URL = env('CODECHEF_BASE_URL', default='https://www.codechef.com')
+
+# Take Codeforces ratings and contest counts from finished contests'
+# rating changes (`manage.py ingest_contests`) instead of per-user polling;
+# leaderboard runs then only fetch Codeforces problem counts
+CODEFORCES_CONTEST_RATINGS = env.bool('CODEFORCES_CONTEST_RATINGS', default=False)
+
+# Threads per worker process for the upstream calls of the async views
+# (refresh_profile, send_daily_report). Each slow call holds one; once all
+# are busy, further calls queue until one frees up.
+ASYNC_UPSTREAM_THREADS = env.int('ASYNC_UPSTREAM_THREADS', default=32)
+
+# Combined leaderboard score (sort_by=combined): per-platform field weights and
+# how values are normalized across profiles ('percentile' or 'minmax')
+COMBINED_SCORE_WEIGHTS = {
+    'LeetCode': {'last_rating': 1.0, 'problems_solved': 1.0},
+    'Codeforces': {'last_rating': 1.0, 'problems_solved': 1.0},
+    'CodeChef': {'last_rating': 1.0, 'problems_solved': 1.0},
+}
+COMBINED_SCORE_NORMALIZATION = env('COMBINED_SCORE_NORMALIZATION', default='percentile')
+
 # Cache settings
 # by default use local memory for development; in prod we expect REDIS_URL to be set
 REDIS_URL = env('REDIS_URL', default='redis://127.0.0.1:6379/1')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        # the instrumented backend only adds timing for the request profiler
+        'BACKEND': 'subscriptions.profiling.InstrumentedRedisCache' if REQUEST_PROFILING else 'django_redis.cache.RedisCache',
         'LOCATION': REDIS_URL,
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
@@ -122,8 +166,8 @@ CACHES = {
     }
 }
 
-# optional: set session engine to use cache if you want
-# SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+# sessions are read from Redis and written through to the DB
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 
 # REST framework minimal settings (adjust as needed)
 REST_FRAMEWORK = {
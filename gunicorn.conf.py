@@ -0,0 +1,22 @@
+"""
+Gunicorn settings picked up automatically by the default `Procfile` command.
+
+Enables prometheus_client multiprocess mode so /metrics aggregates the
+counters of every worker.
+"""
+
+import os
+import shutil
+
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/skilltracker-prometheus')
+
+
+def on_starting(server):
+    # samples from a previous master are stale
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,34 @@
+"""
+Gunicorn settings for the ASGI deployment profile.
+
+Runs SkillTracker.asgi:application on uvicorn workers so async views
+(`refresh_profile`, `send_daily_report`) wait on upstream platforms without
+tying up a worker. Their upstream calls run on ASYNC_UPSTREAM_THREADS
+threads per worker; beyond that they queue. Start it with:
+
+    gunicorn -c gunicorn_asgi.py SkillTracker.asgi:application
+
+Prometheus multiprocess setup mirrors gunicorn.conf.py.
+"""
+
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = 'uvicorn_worker.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+# refreshes can take several upstream retries; keep above the worst case
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/skilltracker-prometheus')
+
+
+def on_starting(server):
+    # samples from a previous master are stale
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
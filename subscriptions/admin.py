@@ -1,10 +1,88 @@
+import io
+
+from django import forms
 from django.contrib import admin
-from .models import Subscriber, PlatformProfile
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+from .models import FetchRun, Group, GroupPlatformStats, Subscriber, PlatformProfile
+from .onboarding import REPORT_COLUMNS, import_subscribers
+
+
+class SubscriberImportForm(forms.Form):
+    csv_file = forms.FileField(help_text="Columns: email, group, leetcode, codeforces, codechef.")
+    dry_run = forms.BooleanField(required=False, help_text="Validate and report without creating anything.")
+
 
 @admin.register(Subscriber)
 class SubscriberAdmin(admin.ModelAdmin):
-    list_display = ('email', 'group', 'date_subscribed')
+    list_display = ('email', 'group', 'combined_score', 'date_subscribed')
+    readonly_fields = ('combined_score',)
+    change_list_template = 'admin/subscriptions/subscriber/change_list.html'
+
+    def get_urls(self):
+        return [
+            path('import-csv/', self.admin_site.admin_view(self.import_csv), name='subscriptions_subscriber_import'),
+        ] + super().get_urls()
+
+    def import_csv(self, request):
+        """Bulk onboarding upload; renders the per-row report."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = SubscriberImportForm(request.POST or None, request.FILES or None)
+        report = summary = None
+        if request.method == 'POST' and form.is_valid():
+            text = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig')
+            try:
+                report, summary = import_subscribers(text, dry_run=form.cleaned_data['dry_run'])
+            except (ValueError, UnicodeDecodeError) as e:
+                form.add_error('csv_file', str(e))
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import subscribers from CSV',
+            'form': form,
+            'columns': REPORT_COLUMNS,
+            'report': report,
+            'summary': summary,
+        }
+        return TemplateResponse(request, 'admin/subscriptions/subscriber/import_csv.html', context)
 
 @admin.register(PlatformProfile)
 class PlatformProfileAdmin(admin.ModelAdmin):
-    list_display = ('subscriber', 'platform_name', 'username', 'last_rating', 'problems_solved', 'contests_attended')
+    list_display = ('subscriber', 'platform_name', 'username', 'last_rating', 'problems_solved', 'contests_attended', 'fetch_status', 'consecutive_failures', 'next_fetch_at')
+    list_filter = ('platform_name', 'fetch_status')
+
+@admin.register(FetchRun)
+class FetchRunAdmin(admin.ModelAdmin):
+    """Read-only run history; the changelist lines runs up for comparison."""
+    list_display = (
+        'id', 'started_at', 'trigger', 'status', 'duration_seconds', 'profiles_per_second',
+        'profiles_attempted', 'profiles_changed', 'profiles_unchanged', 'profiles_failed',
+        'profiles_carried_over', 'profiles_skipped', 'retries', 'bytes_downloaded', 'db_write_seconds',
+    )
+    list_filter = ('trigger', 'status')
+    date_hierarchy = 'started_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class GroupPlatformStatsInline(admin.TabularInline):
+    model = GroupPlatformStats
+    fields = ('platform_name', 'profile_count', 'total_problems', 'average_rating', 'top_profile', 'top_rating')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(Group)
+class GroupAdmin(admin.ModelAdmin):
+    """Aggregates are maintained automatically; edit membership on subscribers."""
+    list_display = ('name', 'member_count', 'created_at')
+    readonly_fields = ('member_count', 'created_at')
+    search_fields = ('name',)
+    inlines = [GroupPlatformStatsInline]
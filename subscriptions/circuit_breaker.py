@@ -0,0 +1,139 @@
+import contextvars
+import logging
+import time
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Per-platform circuit breaker, state shared across workers via the cache.
+CIRCUIT_PLATFORMS = ('LeetCode', 'Codeforces', 'CodeChef')
+CIRCUIT_WINDOW = 300          # seconds over which fetch outcomes are counted
+CIRCUIT_MIN_REQUESTS = 10     # don't judge the error rate on fewer calls
+CIRCUIT_ERROR_RATE = 0.5      # open when at least this share of calls fail
+CIRCUIT_OPEN_SECONDS = 120    # fail fast this long before probing again
+CIRCUIT_PROBE_TIMEOUT = 60    # a half-open probe that never reports back expires
+
+# platform whose half-open probe the current fetch holds; requests already in
+# flight when the circuit opened must not decide whether it closes
+_probe_taken = contextvars.ContextVar('circuit_probe_taken', default=None)
+
+
+def _key(platform_name, name):
+    return f"circuit:{platform_name}:{name}"
+
+
+def _window(platform_name):
+    """Return the id of the current counting window, starting one if none is open.
+
+    `requests` and `failures` are keyed by it, so both reset together when
+    the window expires instead of each on its own TTL.
+    """
+    window = uuid.uuid4().hex
+    if cache.add(_key(platform_name, 'window'), window, CIRCUIT_WINDOW):
+        return window
+    return cache.get(_key(platform_name, 'window'), window)
+
+
+def _counter(platform_name, name, window):
+    return _key(platform_name, f"{name}:{window}")
+
+
+def _incr(key):
+    # created after its window started, so it outlives the window
+    cache.add(key, 0, CIRCUIT_WINDOW)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, CIRCUIT_WINDOW)
+        return 1
+
+
+def _open(platform_name):
+    cache.set(_key(platform_name, 'opened_at'), time.time(), timeout=None)
+    # dropping the window id starts a fresh count; the old counters just expire
+    cache.delete_many([_key(platform_name, 'probe'), _key(platform_name, 'window')])
+
+
+def allow_request(platform_name):
+    """Return True if a call to the platform may go out now.
+
+    Closed: always. Open: never, until CIRCUIT_OPEN_SECONDS have passed.
+    Half-open: one probe at a time across all workers.
+    """
+    _probe_taken.set(None)  # a probe that never reported back has expired by now
+    opened_at = cache.get(_key(platform_name, 'opened_at'))
+    if opened_at is None:
+        return True
+    if time.time() - opened_at < CIRCUIT_OPEN_SECONDS:
+        return False
+    if not cache.add(_key(platform_name, 'probe'), 1, CIRCUIT_PROBE_TIMEOUT):
+        return False
+    _probe_taken.set(platform_name)
+    return True
+
+
+def _holds_probe(platform_name):
+    if _probe_taken.get() != platform_name:
+        return False
+    _probe_taken.set(None)
+    return True
+
+
+def record_success(platform_name):
+    if cache.get(_key(platform_name, 'opened_at')) is not None:
+        if _holds_probe(platform_name):
+            # half-open probe succeeded: close the circuit
+            cache.delete_many([_key(platform_name, 'opened_at'), _key(platform_name, 'probe')])
+            logger.info(f"circuit_breaker: {platform_name} closed after successful probe")
+        # else a straggler from before the circuit opened; only the probe decides
+        return
+    _incr(_counter(platform_name, 'requests', _window(platform_name)))
+
+
+def record_failure(platform_name):
+    if cache.get(_key(platform_name, 'opened_at')) is not None:
+        if _holds_probe(platform_name):
+            # half-open probe failed: stay open for another period
+            _open(platform_name)
+            logger.warning(f"circuit_breaker: {platform_name} probe failed, re-opened")
+        return
+
+    window = _window(platform_name)
+    requests = _incr(_counter(platform_name, 'requests', window))
+    failures = _incr(_counter(platform_name, 'failures', window))
+    if requests >= CIRCUIT_MIN_REQUESTS and failures / requests >= CIRCUIT_ERROR_RATE:
+        _open(platform_name)
+        logger.error(f"circuit_breaker: {platform_name} opened ({failures}/{requests} failed)")
+
+
+def get_circuit_state(platform_name):
+    """Return `{'state': 'closed'|'open'|'half_open', 'requests': n, 'failures': n}`."""
+    values = cache.get_many([_key(platform_name, 'opened_at'), _key(platform_name, 'window')])
+    opened_at = values.get(_key(platform_name, 'opened_at'))
+    window = values.get(_key(platform_name, 'window'))
+    counts = {}
+    if window is not None:
+        keys = {_counter(platform_name, name, window): name for name in ('requests', 'failures')}
+        counts = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    if opened_at is None:
+        state = 'closed'
+    elif time.time() - opened_at < CIRCUIT_OPEN_SECONDS:
+        state = 'open'
+    else:
+        state = 'half_open'
+    return {
+        'state': state,
+        'requests': counts.get('requests', 0),
+        'failures': counts.get('failures', 0),
+    }
+
+
+def get_all_circuit_states():
+    return {platform_name: get_circuit_state(platform_name) for platform_name in CIRCUIT_PLATFORMS}
+
+
+def reset_circuit(platform_name):
+    """Forget all state for the platform (closed, empty window)."""
+    cache.delete_many([_key(platform_name, name) for name in ('opened_at', 'probe', 'window')])
@@ -0,0 +1,265 @@
+"""
+Contest calendar and contest-driven Codeforces rating updates.
+
+`sync_contest_calendar` keeps Contest rows for each platform's recent and
+upcoming contests (LeetCode `upcomingContests`, Codeforces `contest.list`,
+CodeChef's contest list), refreshed at most every CALENDAR_SYNC_INTERVAL;
+`scheduling.py` uses it to refresh a platform's profiles right after its
+contests' results come out.
+
+Codeforces ratings only change when a rated contest's results are applied,
+so instead of polling every handle, `ingest_codeforces_contests` reads
+`contest.list`, fetches `contest.ratingChanges` once per newly finished
+contest and writes the new ratings and contest counts of every tracked
+handle in one bulk update. Processed contests are remembered as Contest
+rows. With CODEFORCES_CONTEST_RATINGS on, leaderboard runs then only fetch
+Codeforces problem counts.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import requests
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import fetch_runs
+from .groups import rebuild_group_stats
+from .models import Contest, FetchRun, PlatformProfile
+from .scoring import recompute_combined_scores
+from .tasks import DeadlineExceeded, _fetch_codeforces_endpoint, _fetch_cache_key, _finish_fetch_run, _request_timeout
+
+logger = logging.getLogger(__name__)
+
+CONTEST_LOOKBACK = timedelta(days=7)  # finished contests older than this are ignored
+CALENDAR_HORIZON = timedelta(days=14)  # upcoming contests further out are ignored
+CALENDAR_SYNC_INTERVAL = 6 * 60 * 60  # seconds between calendar fetches per platform
+RATING_PUBLISH_GRACE = timedelta(days=2)  # an empty ratingChanges after this means unrated
+RATING_UPDATE_BATCH_SIZE = 1000
+
+
+def _codeforces_api(method, label, deadline=None, **params):
+    query = '&'.join(f'{k}={v}' for k, v in params.items())
+    url = f"{settings.CODEFORCES_BASE_URL}/api/{method}" + (f"?{query}" if query else '')
+    return _fetch_codeforces_endpoint(url, label, method, deadline)
+
+
+def _from_timestamp(seconds):
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+
+def _codeforces_calendar(deadline=None):
+    response = _codeforces_api('contest.list', 'contest.list', deadline, gym='false')
+    if response is None or response.get('status') != 'OK':
+        return None
+    entries = []
+    for contest in response['result']:
+        if contest.get('phase') not in ('BEFORE', 'FINISHED') or 'startTimeSeconds' not in contest:
+            continue
+        starts_at = _from_timestamp(contest['startTimeSeconds'])
+        entries.append((str(contest['id']), contest.get('name', ''), starts_at,
+                        starts_at + timedelta(seconds=contest.get('durationSeconds', 0))))
+    return entries
+
+
+def _leetcode_calendar(deadline=None):
+    # LeetCode lists upcoming contests only; they turn into finished ones here as time passes
+    query = "{ upcomingContests { title titleSlug startTime duration } }"
+    response = requests.post(f"{settings.LEETCODE_BASE_URL}/graphql", json={'query': query}, timeout=_request_timeout(deadline))
+    response.raise_for_status()
+    entries = []
+    for contest in response.json()['data']['upcomingContests']:
+        starts_at = _from_timestamp(contest['startTime'])
+        entries.append((contest['titleSlug'], contest['title'], starts_at, starts_at + timedelta(seconds=contest['duration'])))
+    return entries
+
+
+def _codechef_calendar(deadline=None):
+    response = requests.get(
+        f"{settings.CODECHEF_BASE_URL}/api/list/contests/all",
+        params={'sort_by': 'START', 'sorting_order': 'asc', 'offset': 0, 'mode': 'all'},
+        timeout=_request_timeout(deadline),
+    )
+    response.raise_for_status()
+    body = response.json()
+    entries = []
+    for section in ('future_contests', 'present_contests', 'past_contests'):
+        for contest in body.get(section) or []:
+            starts_at = parse_datetime(contest['contest_start_date_iso'])
+            ends_at = parse_datetime(contest['contest_end_date_iso'])
+            if starts_at and ends_at:
+                entries.append((contest['contest_code'], contest['contest_name'], starts_at, ends_at))
+    return entries
+
+
+CALENDAR_FETCHERS = {
+    'LeetCode': _leetcode_calendar,
+    'Codeforces': _codeforces_calendar,
+    'CodeChef': _codechef_calendar,
+}
+
+
+def _store_contests(platform_name, entries, now):
+    """Insert new contests and move rescheduled ones; returns the number kept."""
+    kept = {
+        external_id: (name[:200], starts_at, ends_at)
+        for external_id, name, starts_at, ends_at in entries
+        if now - CONTEST_LOOKBACK <= ends_at and starts_at <= now + CALENDAR_HORIZON
+    }
+    existing = {c.external_id: c for c in Contest.objects.filter(platform_name=platform_name, external_id__in=list(kept))}
+    new, moved = [], []
+    for external_id, (name, starts_at, ends_at) in kept.items():
+        contest = existing.get(external_id)
+        if contest is None:
+            new.append(Contest(platform_name=platform_name, external_id=external_id, name=name, starts_at=starts_at, ends_at=ends_at))
+        elif (contest.starts_at, contest.ends_at) != (starts_at, ends_at):
+            contest.starts_at, contest.ends_at = starts_at, ends_at
+            moved.append(contest)
+    Contest.objects.bulk_create(new)
+    Contest.objects.bulk_update(moved, ['starts_at', 'ends_at'])
+    return len(kept)
+
+
+def sync_contest_calendar(platforms=None, now=None, force=False, deadline=None):
+    """Refresh the stored calendar of each platform not synced in the last CALENDAR_SYNC_INTERVAL.
+
+    Returns `{platform: contests kept}`; a platform whose calendar could not
+    be fetched maps to None and is tried again on the next call. Platforms
+    not reached before `deadline` (a `time.monotonic()` value) are left out.
+    """
+    now = now or timezone.now()
+    synced = {}
+    for platform_name in platforms or CALENDAR_FETCHERS:
+        key = f"contest_calendar_synced:{platform_name}"
+        if not force and cache.get(key):
+            continue
+        try:
+            entries = CALENDAR_FETCHERS[platform_name](deadline)
+        except DeadlineExceeded:
+            logger.warning(f"sync_contest_calendar: out of time before {platform_name}, leaving the rest for the next call")
+            break
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"sync_contest_calendar: {platform_name} calendar unavailable - {e}")
+            entries = None
+        if entries is None:
+            synced[platform_name] = None
+            continue
+        synced[platform_name] = _store_contests(platform_name, entries, now)
+        cache.set(key, True, CALENDAR_SYNC_INTERVAL)
+    if synced:
+        logger.info(f"sync_contest_calendar: {synced}")
+    return synced
+
+
+def sync_codeforces_contests(now=None, deadline=None):
+    """Store recent and upcoming Codeforces contests; returns the count kept.
+
+    Returns None if `contest.list` could not be fetched in time.
+    """
+    return sync_contest_calendar(['Codeforces'], now, force=True, deadline=deadline).get('Codeforces')
+
+
+def _contest_missing(contest, last_rating, last_success_at, old_rating, new_rating):
+    """True if the stored contest count provably doesn't include `contest` yet."""
+    if last_success_at is not None and last_success_at < contest.ends_at:
+        return True
+    # fetched since the contest ended, but before its rating change was published
+    return last_rating == old_rating and old_rating != new_rating
+
+
+def apply_rating_changes(contest, changes):
+    """Write `changes` (ratingChanges results) to tracked profiles; returns the profiles updated.
+
+    Tracked handles are read in one pass and matched case-insensitively,
+    so the query size doesn't depend on the contest's participant count.
+    The contest is added to `contests_attended` only where the stored count
+    provably misses it; a profile fetched after the ratings came out
+    already counts it.
+    """
+    by_handle = {change['handle'].lower(): change for change in changes}
+    tracked = (
+        PlatformProfile.objects.filter(platform_name='Codeforces')
+        .annotate(username_lower=Lower('username'))
+        .values_list('id', 'username', 'username_lower', 'last_rating', 'contests_attended', 'last_success_at')
+    )
+    updates = []
+    usernames = []
+    for profile_id, username, username_lower, last_rating, contests, last_success_at in tracked.iterator(chunk_size=RATING_UPDATE_BATCH_SIZE):
+        change = by_handle.get(username_lower)
+        if change is None:
+            continue
+        # unknown counts (-1) are left for the next full fetch
+        if contests is not None and contests >= 0 and _contest_missing(
+            contest, last_rating, last_success_at, change.get('oldRating'), change['newRating']
+        ):
+            contests += 1
+        updates.append(PlatformProfile(id=profile_id, last_rating=change['newRating'], contests_attended=contests))
+        usernames.append(username)
+    with transaction.atomic():
+        PlatformProfile.objects.bulk_update(updates, ['last_rating', 'contests_attended'], batch_size=RATING_UPDATE_BATCH_SIZE)
+        contest.rated = True
+        contest.ratings_applied_at = timezone.now()
+        contest.profiles_updated = len(updates)
+        contest.save(update_fields=['rated', 'ratings_applied_at', 'profiles_updated'])
+    # cached fetch results would bring the old ratings back
+    cache.delete_many([_fetch_cache_key('Codeforces', username) for username in usernames])
+    return len(updates)
+
+
+def ingest_codeforces_contests(now=None, deadline=None):
+    """Apply rating changes of newly finished Codeforces contests, oldest first.
+
+    Contests whose ratings aren't published yet are retried on the next
+    call; an empty result after RATING_PUBLISH_GRACE marks the contest
+    unrated. Contests not reached before `deadline` (a `time.monotonic()`
+    value) are left for the next call. Recorded as a FetchRun with trigger
+    'contests'.
+    Returns `{'contests_applied': n, 'profiles_updated': n, 'carried_over': n, 'run_id': id}`.
+    """
+    now = now or timezone.now()
+    run = FetchRun.objects.create(trigger='contests')
+    stats = fetch_runs.FetchRunStats()
+    applied = updated = carried_over = 0
+    try:
+        with fetch_runs.collecting(stats):
+            sync_codeforces_contests(now, deadline)
+            pending = list(Contest.objects.filter(
+                platform_name='Codeforces', ratings_applied_at=None,
+                ends_at__gte=now - CONTEST_LOOKBACK, ends_at__lte=now,
+            ).order_by('ends_at'))
+            for i, contest in enumerate(pending):
+                try:
+                    response = _codeforces_api('contest.ratingChanges', contest.external_id, deadline, contestId=contest.external_id)
+                except DeadlineExceeded:
+                    carried_over = len(pending) - i
+                    logger.warning(f"ingest_codeforces_contests: out of time, {carried_over} contests left for the next call")
+                    break
+                if response is None:
+                    logger.warning(f"ingest_codeforces_contests: ratingChanges for {contest.external_id} unavailable, stopping")
+                    break
+                # unrated and not-yet-rated contests both come back empty (or FAILED)
+                changes = (response.get('result') or []) if response.get('status') == 'OK' else []
+                if not changes:
+                    if contest.ends_at < now - RATING_PUBLISH_GRACE:
+                        Contest.objects.filter(pk=contest.pk).update(rated=False, ratings_applied_at=now)
+                        logger.info(f"ingest_codeforces_contests: {contest.name} is unrated")
+                    continue
+                n = apply_rating_changes(contest, changes)
+                stats.add('Codeforces', 'changed', n)
+                applied += 1
+                updated += n
+                logger.info(f"ingest_codeforces_contests: {contest.name} updated {n} profiles")
+    except Exception:
+        _finish_fetch_run(run, stats, 'Failed')
+        raise
+    if updated:
+        # bulk_update skips the signal handlers
+        rebuild_group_stats()
+        recompute_combined_scores()
+    _finish_fetch_run(run, stats, 'Completed')
+    return {'contests_applied': applied, 'profiles_updated': updated, 'carried_over': carried_over, 'run_id': run.id}
@@ -0,0 +1,117 @@
+"""
+Synthetic datasets for load and query-budget testing.
+
+Generated subscribers use the SYNTHETIC_EMAIL_DOMAIN so they can be told
+apart from real ones and removed with `clear_synthetic_dataset`.
+"""
+
+import random
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .groups import rebuild_group_stats, suspended
+from .middleware import subscriber_cache_key
+from .models import PlatformProfile, Subscriber, WeeklySnapshot
+from .scoring import recompute_combined_scores
+from .views import invalidate_leaderboard_cache
+
+SYNTHETIC_EMAIL_DOMAIN = 'synthetic.skilltracker.test'
+PLATFORMS = ('LeetCode', 'Codeforces', 'CodeChef')
+GROUP_MEMBERSHIP = 0.7  # share of subscribers that belong to a group
+
+
+def clear_synthetic_dataset():
+    """Delete every generated subscriber (profiles and snapshots cascade)."""
+    with suspended():
+        deleted, _ = Subscriber.objects.filter(email__endswith=f'@{SYNTHETIC_EMAIL_DOMAIN}').delete()
+    rebuild_group_stats()
+    recompute_combined_scores()
+    invalidate_leaderboard_cache()
+    return deleted
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+@transaction.atomic
+def generate_dataset(subscribers=1000, groups=20, profiles_per_platform=None, weeks=4, seed=0, batch_size=1000):
+    """Create subscribers, profiles and `weeks` weekly snapshots per profile.
+
+    `profiles_per_platform` defaults to one profile per subscriber on every
+    platform. Profile stats grow week over week and end at the latest
+    snapshot's values. Returns counts of created rows.
+    """
+    rng = random.Random(seed)
+    if profiles_per_platform is None:
+        profiles_per_platform = subscribers
+    profiles_per_platform = min(profiles_per_platform, subscribers)
+    group_names = [f'group-{i}' for i in range(groups)]
+
+    start = Subscriber.objects.filter(email__endswith=f'@{SYNTHETIC_EMAIL_DOMAIN}').count()
+    subscriber_objs = []
+    for i in range(start, start + subscribers):
+        group = rng.choice(group_names) if group_names and rng.random() < GROUP_MEMBERSHIP else None
+        subscriber_objs.append(Subscriber(email=f'user{i}@{SYNTHETIC_EMAIL_DOMAIN}', group=group))
+    # SQLite and PostgreSQL both set primary keys on bulk_create
+    Subscriber.objects.bulk_create(subscriber_objs, batch_size=batch_size)
+    subscriber_ids = [s.id for s in subscriber_objs]
+    # bulk_create skips the signals that normally evict cached subscribers
+    cache.delete_many([subscriber_cache_key(s.email) for s in subscriber_objs])
+
+    # weekly history per profile: list of (rating, problems, contests), oldest first
+    histories = []
+    profile_objs = []
+    for platform_name in PLATFORMS:
+        for subscriber_id in rng.sample(subscriber_ids, profiles_per_platform):
+            rating = rng.randint(800, 2400)
+            problems = rng.randint(0, 800)
+            contests = rng.randint(0, 60)
+            history = []
+            for _ in range(weeks):
+                history.append((rating, problems, contests))
+                attended = rng.randint(0, 2)
+                contests += attended
+                rating = max(0, rating + sum(rng.randint(-60, 90) for _ in range(attended)))
+                problems += rng.randint(0, 20)
+            rating, problems, contests = history[-1] if history else (rating, problems, contests)
+            histories.append(history)
+            profile_objs.append(PlatformProfile(
+                subscriber_id=subscriber_id,
+                platform_name=platform_name,
+                username=f'{platform_name.lower()}_{subscriber_id}',
+                last_rating=rating,
+                problems_solved=problems,
+                contests_attended=contests,
+            ))
+    PlatformProfile.objects.bulk_create(profile_objs, batch_size=batch_size)
+
+    # snapshots are inserted one week at a time; timestamp is auto_now_add,
+    # so it is back-dated with an update after each batch
+    now = timezone.now()
+    snapshots = 0
+    for week in range(weeks):
+        timestamp = now - timedelta(weeks=weeks - 1 - week)
+        week_objs = [
+            WeeklySnapshot(
+                profile_id=profile.id,
+                last_rating=history[week][0],
+                problems_solved=history[week][1],
+                contests_attended=history[week][2],
+            )
+            for profile, history in zip(profile_objs, histories)
+        ]
+        for chunk in _chunks(week_objs, batch_size):
+            WeeklySnapshot.objects.bulk_create(chunk)
+            WeeklySnapshot.objects.filter(pk__in=[s.pk for s in chunk]).update(timestamp=timestamp)
+            snapshots += len(chunk)
+
+    # bulk_create skips the group aggregate handlers too
+    rebuild_group_stats()
+    recompute_combined_scores()
+    invalidate_leaderboard_cache()
+    return {'subscribers': len(subscriber_objs), 'profiles': len(profile_objs), 'snapshots': snapshots}
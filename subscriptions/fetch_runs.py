@@ -0,0 +1,51 @@
+"""
+Per-run statistics for leaderboard ingestion (`fetch_leaderboard_data`).
+
+The run installs a FetchRunStats with `collecting()`; fetchers report
+retries and downloaded bytes through `record()`, which is a no-op outside
+a run (e.g. for refresh_profile). Worker threads must be started with a
+copy of the caller's context (`contextvars.copy_context().run`).
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+
+RUN_STAT_FIELDS = ('attempted', 'changed', 'unchanged', 'failed', 'carried_over', 'skipped', 'retries', 'bytes')
+
+_current_stats = contextvars.ContextVar('fetch_run_stats', default=None)
+
+
+class FetchRunStats:
+    """Thread-safe per-platform counters for one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.platforms = {}
+
+    def add(self, platform_name, field, n=1):
+        with self._lock:
+            counts = self.platforms.setdefault(platform_name, dict.fromkeys(RUN_STAT_FIELDS, 0))
+            counts[field] += n
+
+    def totals(self):
+        with self._lock:
+            return {
+                field: sum(counts[field] for counts in self.platforms.values())
+                for field in RUN_STAT_FIELDS
+            }
+
+
+@contextmanager
+def collecting(stats):
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def record(platform_name, field, n=1):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(platform_name, field, n)
@@ -1,75 +1,62 @@
 from django import forms
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-import requests
+from . import metrics
 from .models import Subscriber, PlatformProfile
-from .tasks import fetch_codechef_data, fetch_codeforces_data, fetch_leetcode_data
-
-def validate_leetcode_username(value):
-    url = "https://leetcode.com/graphql"
-    query = f"""
-    {{
-        matchedUser(username: "{value}") {{
-            username
-        }}
-    }}
-    """
-    payload = {"query": query}
-    
-    try:
-        response = requests.post(url, json=payload, timeout=5)
-        json_response = response.json()
-
-        if not json_response.get("data", {}).get("matchedUser"):
-            raise ValidationError(f"LeetCode username '{value}' does not exist.")
-    except ValidationError as ve:
-        raise ve
-    except requests.exceptions.RequestException as req_err:
-        raise ValidationError(f"Failed to reach LeetCode. {req_err}")
-    except Exception as e:
-        raise ValidationError(f"An unexpected error occurred: {str(e)}")
-    return value
-
-def validate_codeforces_username(value):
-    user_info_url = f"https://codeforces.com/api/user.info?handles={value}"
-    try:
-        response = requests.get(user_info_url, timeout=5)
-        
-        if response.status_code != 200:
-            raise ValidationError(f"Codeforces username '{value}' does not exist.")
-        
-        user_info = response.json()
-        
-        if user_info['status'] != 'OK' or len(user_info['result']) == 0:
-            raise ValidationError(f"CodeForces username {value} does not exist.")
-    
-    except requests.exceptions.RequestException:
-        raise ValidationError("Failed to reach Codeforces. Please check your connection.")
-    return value
+from .tasks import get_platform_data, merge_partial_data
+
+# Shared cache of handles found not to exist, keyed by normalized
+# (platform, username), so repeated checks of the same missing handle (typos,
+# bots) are rejected locally until the entry expires. Found handles are not
+# cached: validating one fetches its stats anyway. Unreachable platforms are
+# never cached.
+HANDLE_MISSING_TTL = 5 * 60
+
+
+def _handle_cache_key(platform_name, username):
+    return f"handle_missing:{platform_name}:{username.strip().lower()}"
 
-def validate_codechef_username(value):
-    url = f"https://www.codechef.com/users/{value}"
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                      "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Connection": "keep-alive",
-    }
+def is_handle_known_missing(platform_name, username):
+    """Return True if the handle was recently found not to exist."""
+    missing = cache.get(_handle_cache_key(platform_name, username)) is not None
+    metrics.HANDLE_VALIDATION_CACHE.labels(platform_name, 'hit' if missing else 'miss').inc()
+    return missing
 
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
 
-        if response.status_code == 404:
-            raise ValidationError(f"CodeChef username {value} does not exist.")
+def remember_missing_handle(platform_name, username):
+    cache.set(_handle_cache_key(platform_name, username), True, HANDLE_MISSING_TTL)
 
-        if response.status_code == 403:
-            raise ValidationError("CodeChef blocked the request (anti-bot protection). Try again later.")
 
-    except requests.exceptions.RequestException as e:
-        raise ValidationError(f"Failed to reach CodeChef: {str(e)}")
+def validate_and_fetch_profile(platform_name, username):
+    """Check that a handle exists and collect its stats in one pass.
 
-    return value
+    The platform fetchers already report unknown users, so the stats fetch
+    doubles as the existence check: one request for LeetCode and CodeChef,
+    and the Codeforces API calls are made once instead of twice.
+    Handles recently found missing are rejected from the validation cache
+    without any fetch.
+    Returns the fetched data dict or raises ValidationError.
+    """
+    if platform_name not in dict(PlatformProfile.PLATFORM_CHOICES):
+        raise ValidationError("Invalid platform selected.")
+
+    missing_message = f"{platform_name} username '{username}' does not exist."
+    if is_handle_known_missing(platform_name, username):
+        raise ValidationError(missing_message)
+
+    fetched_data = get_platform_data(platform_name, username, caller='signup')
+    if fetched_data is None:
+        raise ValidationError("Invalid platform selected.")
+
+    if fetched_data.get('problems_solved') == 'User not found':
+        remember_missing_handle(platform_name, username)
+        raise ValidationError(missing_message)
+
+    if all(v == 'N/A' for v in fetched_data.values()):
+        raise ValidationError(f"Failed to reach {platform_name}. Please try again later.")
+
+    return merge_partial_data(fetched_data, None)
 
 class PlatformProfileForm(forms.ModelForm):
     platform_name = forms.ChoiceField(choices=PlatformProfile.PLATFORM_CHOICES, required=True)
@@ -107,28 +94,28 @@ class PlatformProfileForm(forms.ModelForm):
             ).exists():
                 raise ValidationError(f"Profile for {platform_name} ({username}) already exists.")
 
-        # Only perform remote validation if not found locally
-        platform_validators = {
-            'LeetCode': (validate_leetcode_username, fetch_leetcode_data),
-            'Codeforces': (validate_codeforces_username, fetch_codeforces_data),
-            'CodeChef': (validate_codechef_username, fetch_codechef_data),
-        }
-
-        if platform_name in platform_validators:
-            # Validate the username via remote API
-            platform_validators[platform_name][0](username)
-            # Fetch additional data
-            fetched_data = platform_validators[platform_name][1](username)
-            # Update instance fields with fetched data
-            rating = fetched_data.get("rating")
-            problems_solved = fetched_data.get("problems_solved")
-            contests_attended = fetched_data.get("contests")
-            self.instance.last_rating = -1 if rating == 'N/A' else rating
-            self.instance.problems_solved = -1 if problems_solved == 'N/A' else problems_solved
-            self.instance.contests_attended = -1 if contests_attended == 'N/A' else contests_attended
+        # Only perform remote validation if not found locally; the same
+        # upstream call validates the handle and fetches its stats
+        fetched_data = validate_and_fetch_profile(platform_name, username)
+        self.fetched_data = fetched_data
+        # Update instance fields with fetched data
+        rating = fetched_data.get("rating")
+        problems_solved = fetched_data.get("problems_solved")
+        contests_attended = fetched_data.get("contests")
+        self.instance.last_rating = -1 if rating == 'N/A' else rating
+        self.instance.problems_solved = -1 if problems_solved == 'N/A' else problems_solved
+        self.instance.contests_attended = -1 if contests_attended == 'N/A' else contests_attended
 
         return username
 
+    def save(self, commit=True):
+        if self.instance.pk and 'username' in self.changed_data:
+            # a renamed handle starts over in the fetch schedule
+            self.instance.fetch_status = 'Pending'
+            self.instance.consecutive_failures = 0
+            self.instance.next_fetch_at = None
+        return super().save(commit)
+
 
 class SubscriberProfileForm(forms.ModelForm):
     platform_name = forms.ChoiceField(choices=PlatformProfile.PLATFORM_CHOICES, required=False)
@@ -156,19 +143,8 @@ class SubscriberProfileForm(forms.ModelForm):
         ).exists():
             raise forms.ValidationError(f"Profile for {platform_name} ({username}) already exists on SkillTracker.")
 
-        # Only validate remotely if it's not already in DB
-        platform_validators = {
-            'LeetCode': (validate_leetcode_username, fetch_leetcode_data),
-            'Codeforces': (validate_codeforces_username, fetch_codeforces_data),
-            'CodeChef': (validate_codechef_username, fetch_codechef_data),
-        }
-
-        if platform_name in platform_validators:
-            # Remote validation only if not already registered
-            platform_validators[platform_name][0](username)
-            # Fetch data (if needed in the view)
-            self.fetched_data = platform_validators[platform_name][1](username)
-        else:
-            raise forms.ValidationError("Invalid platform selected.")
+        # Only validate remotely if it's not already in DB; the fetched
+        # data is reused by the view to create the profile
+        self.fetched_data = validate_and_fetch_profile(platform_name, username)
 
         return cleaned_data
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Incremental maintenance of Group member counts and per-platform aggregates.
+
+Signal handlers in `signals.py` call `apply_profile_change` and
+`apply_membership_change` with a profile's or subscriber's state before and
+after a write; counters move by the difference with F() updates, so
+concurrent writers don't lose increments. Only the "top member" of a
+platform needs a query, and only when the current top drops or leaves.
+
+Bulk writes that skip signals (bulk_create, queryset.update) should run
+under `suspended()` and call `rebuild_group_stats()` afterwards.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+_suspended = contextvars.ContextVar('group_stats_suspended', default=False)
+
+
+@contextmanager
+def suspended():
+    """Skip incremental updates, e.g. around bulk loads followed by a rebuild."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def is_suspended():
+    return _suspended.get()
+
+
+def _as_int(value):
+    # fetched values may still be strings on the instance until it is reloaded
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _counted(rating, problems):
+    """(rating or None, problems) as they count toward group aggregates."""
+    rating, problems = _as_int(rating), _as_int(problems)
+    return (
+        rating if rating is not None and rating >= 0 else None,
+        problems if problems is not None and problems > 0 else 0,
+    )
+
+
+def _refresh_top(group_name, platform_name):
+    from .models import GroupPlatformStats, PlatformProfile
+    top = (
+        PlatformProfile.objects
+        .filter(subscriber__group=group_name, platform_name=platform_name, last_rating__gte=0)
+        .order_by('-last_rating', 'id')
+        .values_list('id', 'last_rating')
+        .first()
+    )
+    top_profile_id, top_rating = top or (None, None)
+    GroupPlatformStats.objects.filter(group_id=group_name, platform_name=platform_name).update(
+        top_profile_id=top_profile_id, top_rating=top_rating,
+    )
+
+
+def apply_profile_change(group_name, platform_name, profile_id, old, new):
+    """Move one profile's contribution within a group.
+
+    `old` and `new` are `(last_rating, problems_solved)`, or None when the
+    profile did not / no longer counts toward the group.
+    """
+    from .models import GroupPlatformStats
+    if old == new or group_name is None:
+        return
+    old_rating, old_problems = _counted(*old) if old else (None, 0)
+    new_rating, new_problems = _counted(*new) if new else (None, 0)
+
+    stats, _ = GroupPlatformStats.objects.get_or_create(group_id=group_name, platform_name=platform_name)
+    GroupPlatformStats.objects.filter(pk=stats.pk).update(
+        profile_count=F('profile_count') + ((new is not None) - (old is not None)),
+        total_problems=F('total_problems') + (new_problems - old_problems),
+        rating_total=F('rating_total') + ((new_rating or 0) - (old_rating or 0)),
+        rated_count=F('rated_count') + ((new_rating is not None) - (old_rating is not None)),
+    )
+
+    if new_rating is not None and (old_rating is None or new_rating > old_rating):
+        GroupPlatformStats.objects.filter(pk=stats.pk).filter(
+            Q(top_rating__isnull=True) | Q(top_rating__lt=new_rating)
+        ).update(top_profile_id=profile_id, top_rating=new_rating)
+    elif stats.top_profile_id == profile_id:
+        # the top member dropped or left; find the new one
+        _refresh_top(group_name, platform_name)
+
+
+def remove_member(group_name):
+    """Decrement the member count; a group exists only while it has members."""
+    from .models import Group
+    Group.objects.filter(name=group_name).update(member_count=F('member_count') - 1)
+    Group.objects.filter(name=group_name, member_count__lte=0).delete()
+
+
+def apply_membership_change(subscriber_id, old_group, new_group):
+    """Move a subscriber (and its profiles) from `old_group` to `new_group`."""
+    from .models import Group, PlatformProfile
+    if old_group == new_group:
+        return
+    profiles = list(
+        PlatformProfile.objects.filter(subscriber_id=subscriber_id)
+        .values_list('id', 'platform_name', 'last_rating', 'problems_solved')
+    )
+    if old_group:
+        for profile_id, platform_name, rating, problems in profiles:
+            apply_profile_change(old_group, platform_name, profile_id, (rating, problems), None)
+        remove_member(old_group)
+    if new_group:
+        Group.objects.get_or_create(name=new_group)
+        Group.objects.filter(name=new_group).update(member_count=F('member_count') + 1)
+        for profile_id, platform_name, rating, problems in profiles:
+            apply_profile_change(new_group, platform_name, profile_id, None, (rating, problems))
+
+
+@transaction.atomic
+def rebuild_group_stats():
+    """Recompute every Group and GroupPlatformStats row from scratch."""
+    from .models import Group, GroupPlatformStats, PlatformProfile, Subscriber
+
+    members = dict(
+        Subscriber.objects.exclude(group=None).values_list('group').annotate(n=Count('id')).order_by()
+    )
+    Group.objects.exclude(name__in=list(members)).delete()
+    existing = set(Group.objects.values_list('name', flat=True))
+    Group.objects.bulk_create([Group(name=name) for name in members if name not in existing])
+    for name, count in members.items():
+        Group.objects.filter(name=name).update(member_count=count)
+
+    stats = {}
+    rows = (
+        PlatformProfile.objects.exclude(subscriber__group=None)
+        .values_list('subscriber__group', 'platform_name', 'id', 'last_rating', 'problems_solved')
+        .order_by('subscriber__group', 'platform_name', 'id')
+    )
+    for group_name, platform_name, profile_id, rating, problems in rows.iterator():
+        rating, problems = _counted(rating, problems)
+        row = stats.get((group_name, platform_name))
+        if row is None:
+            row = stats[(group_name, platform_name)] = GroupPlatformStats(group_id=group_name, platform_name=platform_name)
+        row.profile_count += 1
+        row.total_problems += problems
+        if rating is not None:
+            row.rating_total += rating
+            row.rated_count += 1
+            if row.top_rating is None or rating > row.top_rating:
+                row.top_profile_id, row.top_rating = profile_id, rating
+    GroupPlatformStats.objects.all().delete()
+    GroupPlatformStats.objects.bulk_create(stats.values(), batch_size=1000)
@@ -0,0 +1,194 @@
+"""
+Session-based HTTP load generator for the public API.
+
+Each virtual user logs in with a subscriber email, then issues a weighted
+mix of requests until the run ends. Used by `manage.py loadtest`.
+"""
+
+import random
+import statistics
+import threading
+import time
+
+import requests
+
+# (label, weight); labels are the endpoint names in reports and baselines
+TRAFFIC_MIX = (
+    ('home', 2),
+    ('leaderboard', 5),
+    ('my-profiles', 2),
+    ('api/fetch-data', 2),
+    ('profiles/<id>/refresh', 1),
+)
+LEADERBOARD_SORTS = ('rating', 'problems_solved')
+LEADERBOARD_PLATFORMS = (None, 'LeetCode', 'Codeforces', 'CodeChef')
+LEADERBOARD_PAGES = (1, 1, 1, 2, 3, 5)
+PUBLIC_PARAMS = {'LeetCode': 'leetcode', 'Codeforces': 'codeforces', 'CodeChef': 'codechef'}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class VirtualUser:
+    """One logged-in client. Sends If-None-Match like a browser would."""
+
+    def __init__(self, base_url, email, rng, timeout=30):
+        self.base_url = base_url
+        self.email = email
+        self.rng = rng
+        self.timeout = timeout
+        self.http = requests.Session()
+        # behind a TLS proxy in production; the session cookie is Secure, so
+        # it is sent by hand instead of through the cookie jar
+        self.headers = {'X-Forwarded-Proto': 'https'}
+        self.etags = {}
+        self.profiles = []
+        self.group = None
+
+    def request(self, method, path, **kwargs):
+        headers = dict(self.headers)
+        cache_key = (path, tuple(sorted((kwargs.get('params') or {}).items())))
+        if method == 'GET' and cache_key in self.etags:
+            headers['If-None-Match'] = self.etags[cache_key]
+        response = self.http.request(method, self.base_url + path, headers=headers, timeout=self.timeout,
+                                     allow_redirects=False, **kwargs)
+        if method == 'GET' and response.headers.get('ETag'):
+            self.etags[cache_key] = response.headers['ETag']
+        session_id = response.cookies.get('sessionid')
+        if session_id:
+            self.headers['Cookie'] = f'sessionid={session_id}'
+        return response
+
+    def login(self):
+        response = self.request('POST', '/', json={'email': self.email})
+        response.raise_for_status()
+        subscriber = response.json().get('subscriber') or {}
+        self.group = subscriber.get('group')
+        profiles = self.request('GET', '/my-profiles/')
+        if profiles.status_code == 200:
+            self.profiles = profiles.json().get('profiles', [])
+
+    def next_request(self):
+        """Return (label, method, path, kwargs) for the next call."""
+        labels = [label for label, _ in TRAFFIC_MIX]
+        weights = [weight for _, weight in TRAFFIC_MIX]
+        label = self.rng.choices(labels, weights)[0]
+        if label == 'home':
+            return label, 'GET', '/', {}
+        if label == 'leaderboard':
+            params = {'sort_by': self.rng.choice(LEADERBOARD_SORTS), 'page': self.rng.choice(LEADERBOARD_PAGES)}
+            platform_name = self.rng.choice(LEADERBOARD_PLATFORMS)
+            if platform_name:
+                params['platform'] = platform_name
+            if self.group and self.rng.random() < 0.5:
+                params['group'] = self.group
+            return label, 'GET', '/leaderboard/', {'params': params}
+        if label == 'my-profiles':
+            return label, 'GET', '/my-profiles/', {}
+        if label == 'api/fetch-data':
+            params = {PUBLIC_PARAMS[p['platform_name']]: p['username'] for p in self.profiles if p['platform_name'] in PUBLIC_PARAMS}
+            return label, 'GET', '/api/fetch-data', {'params': params}
+        if not self.profiles:
+            return 'home', 'GET', '/', {}
+        profile = self.rng.choice(self.profiles)
+        return label, 'POST', f"/profiles/{profile['id']}/refresh/", {}
+
+
+class LoadResults:
+    """Thread-safe per-endpoint latencies and status counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+
+    def record(self, label, latency_ms, status):
+        with self._lock:
+            self.latencies.setdefault(label, []).append(latency_ms)
+            counts = self.statuses.setdefault(label, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def summary(self, duration):
+        """Per-endpoint `{requests, rps, p50_ms, p95_ms, p99_ms, errors, statuses}`."""
+        report = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            statuses = self.statuses[label]
+            report[label] = {
+                'requests': len(values),
+                'rps': len(values) / duration if duration else 0.0,
+                'p50_ms': statistics.median(values),
+                'p95_ms': percentile(values, 95),
+                'p99_ms': percentile(values, 99),
+                # 429 from the refresh rate limit is expected behavior
+                'errors': sum(n for code, n in statuses.items() if code == 'error' or str(code).startswith('5')),
+                'statuses': {str(code): n for code, n in sorted(statuses.items(), key=lambda item: str(item[0]))},
+            }
+        return report
+
+
+def run_load(base_url, emails, users=10, duration=30, warmup=5, seed=0):
+    """Drive `users` concurrent virtual users for `duration` seconds.
+
+    Requests during the first `warmup` seconds are not recorded. Returns
+    `(summary, measured_seconds)`.
+    """
+    results = LoadResults()
+    rng = random.Random(seed)
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker(email, worker_seed):
+        user = VirtualUser(base_url, email, random.Random(worker_seed))
+        try:
+            user.login()
+        except requests.RequestException:
+            results.record('login', 0.0, 'error')
+            return
+        while True:
+            label, method, path, kwargs = user.next_request()
+            sent = time.monotonic()
+            if sent >= stop_at:
+                return
+            try:
+                status = user.request(method, path, **kwargs).status_code
+            except requests.RequestException:
+                status = 'error'
+            if sent >= measure_from:
+                results.record(label, (time.monotonic() - sent) * 1000, status)
+
+    threads = [
+        threading.Thread(target=worker, args=(emails[i % len(emails)], rng.random()), daemon=True)
+        for i in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results.summary(duration), duration
+
+
+def compare_to_baseline(summary, baseline, tolerance=0.2):
+    """Return a list of regressions against a saved summary.
+
+    An endpoint regresses if its throughput drops, or its p99 latency grows,
+    by more than `tolerance`, or if it starts returning errors.
+    """
+    regressions = []
+    for label, base in baseline.items():
+        current = summary.get(label)
+        if current is None:
+            regressions.append(f"{label}: no requests recorded")
+            continue
+        if current['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {current['rps']:.1f} rps < baseline {base['rps']:.1f} rps")
+        if current['p99_ms'] > base['p99_ms'] * (1 + tolerance):
+            regressions.append(f"{label}: p99 {current['p99_ms']:.1f} ms > baseline {base['p99_ms']:.1f} ms")
+        if current['errors'] > base.get('errors', 0):
+            regressions.append(f"{label}: {current['errors']} errors (baseline {base.get('errors', 0)})")
+    return regressions
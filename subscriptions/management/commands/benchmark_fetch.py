@@ -0,0 +1,123 @@
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from subscriptions import circuit_breaker, tasks
+from subscriptions.datasets import PLATFORMS
+from subscriptions.loadtest import percentile
+from subscriptions.management.commands.upstream_stub import add_stub_arguments, stub_options
+from subscriptions.models import PlatformProfile, Subscriber
+from subscriptions.upstream_stub import start_stub_server
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark fetch_leaderboard_data against the upstream stub. Runs in a "
+        "throwaway test database; fetch results and circuit state still go to "
+        "the configured cache, so use a dev Redis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000', help="Comma-separated profile counts (default 100,1000,10000).")
+        parser.add_argument('--stub-url', default=None, help="Use an already running stub instead of starting one.")
+        parser.add_argument('--budget', type=float, default=None, help="Run budget in seconds (default: none).")
+        parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc (it slows the run down).")
+        parser.add_argument('--json', dest='json_path', default=None, help="Also write the results to this file.")
+        add_stub_arguments(parser)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        if options['verbosity'] < 2:
+            logging.getLogger('subscriptions.tasks').setLevel(logging.ERROR)
+            logging.getLogger('subscriptions.circuit_breaker').setLevel(logging.ERROR)
+
+        server = None
+        base_url = options['stub_url']
+        if base_url is None:
+            server = start_stub_server(**stub_options(options))
+            base_url = server.base_url
+        base_url = base_url.rstrip('/')
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        results = []
+        try:
+            with override_settings(LEETCODE_BASE_URL=base_url, CODEFORCES_BASE_URL=base_url, CODECHEF_BASE_URL=base_url):
+                for size in sizes:
+                    results.append(self._run(size, options, server))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if server is not None:
+                server.shutdown()
+
+        self.stdout.write(f"{'profiles':>9} {'seconds':>9} {'profiles/s':>11} {'p50 ms':>9} {'p99 ms':>9} {'peak MiB':>9} {'carried':>8}  upstream")
+        for r in results:
+            peak = f"{r['peak_mib']:.1f}" if r['peak_mib'] is not None else '-'
+            self.stdout.write(
+                f"{r['profiles']:>9} {r['seconds']:>9.2f} {r['profiles_per_sec']:>11.1f} "
+                f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {peak:>9} {r['carried_over']:>8}  {r['upstream']}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def _run(self, size, options, server):
+        Subscriber.objects.all().delete()
+        subscribers = Subscriber.objects.bulk_create(
+            Subscriber(email=f"bench{i}@example.com") for i in range(size)
+        )
+        PlatformProfile.objects.bulk_create(
+            PlatformProfile(subscriber=sub, platform_name=PLATFORMS[i % len(PLATFORMS)], username=f"bench{i}")
+            for i, sub in enumerate(subscribers)
+        )
+        for platform_name in PLATFORMS:
+            circuit_breaker.reset_circuit(platform_name)
+        if server is not None:
+            server.reset_stats()
+
+        # time each profile as the worker threads see it
+        latencies = []
+        fetch_single_profile = tasks._fetch_single_profile
+
+        def timed_fetch(profile, deadline=None):
+            start = time.perf_counter()
+            try:
+                return fetch_single_profile(profile, deadline)
+            finally:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        if not options['no_memory']:
+            tracemalloc.start()
+        tasks._fetch_single_profile = timed_fetch
+        start = time.perf_counter()
+        try:
+            summary = tasks.fetch_leaderboard_data(budget=options['budget'])
+        finally:
+            elapsed = time.perf_counter() - start
+            tasks._fetch_single_profile = fetch_single_profile
+            peak = None
+            if not options['no_memory']:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'profiles': size,
+            'seconds': elapsed,
+            'profiles_per_sec': summary['processed'] / elapsed if elapsed else 0.0,
+            'p50_ms': statistics.median(latencies) if latencies else 0.0,
+            'p99_ms': percentile(latencies, 99),
+            'peak_mib': peak / (1024 * 1024) if peak is not None else None,
+            'processed': summary['processed'],
+            'carried_over': summary['carried_over'],
+            'upstream': server.get_stats() if server is not None else {},
+        }
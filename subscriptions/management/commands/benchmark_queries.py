@@ -0,0 +1,87 @@
+import json
+import logging
+import math
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from subscriptions.datasets import PLATFORMS, clear_synthetic_dataset, generate_dataset
+from subscriptions.models import Subscriber
+from subscriptions.tasks import _compile_weekly_changes, record_weekly_snapshots
+from subscriptions.views import invalidate_leaderboard_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the leaderboard endpoint, _compile_weekly_changes and weekly "
+        "snapshotting against synthetic datasets, with query counts. Runs in a "
+        "throwaway test database; the leaderboard cache uses the configured Redis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help="Comma-separated profile counts (default 1000,10000,100000).")
+        parser.add_argument('--weeks', type=int, default=4)
+        parser.add_argument('--json', dest='json_path', default=None, help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        if options['verbosity'] < 2:
+            for name in ('subscriptions.tasks', 'subscriptions.views', 'django.request'):
+                logging.getLogger(name).setLevel(logging.ERROR)
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        results = []
+        try:
+            for size in sizes:
+                results.extend(self._run(size, options['weeks']))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'profiles':>9}  {'operation':<24} {'queries':>8} {'seconds':>9}")
+        for r in results:
+            self.stdout.write(f"{r['profiles']:>9}  {r['operation']:<24} {r['queries']:>8} {r['seconds']:>9.3f}")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def _run(self, size, weeks):
+        clear_synthetic_dataset()
+        generate_dataset(subscribers=math.ceil(size / len(PLATFORMS)), weeks=weeks)
+        subscriber = Subscriber.objects.exclude(group=None).first()
+
+        client = Client()
+        session = client.session
+        session['subscriber_email'] = subscriber.email
+        session.save()
+        url = reverse('leaderboard')
+
+        def leaderboard():
+            response = client.get(url, {'group': subscriber.group}, secure=True)
+            assert response.status_code == 200, response.status_code
+
+        invalidate_leaderboard_cache()
+        operations = [
+            ('leaderboard (cold cache)', leaderboard),
+            ('leaderboard (warm cache)', leaderboard),
+            ('_compile_weekly_changes', _compile_weekly_changes),
+            ('record_weekly_snapshots', record_weekly_snapshots),
+        ]
+        results = []
+        for name, func in operations:
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                func()
+                elapsed = time.perf_counter() - start
+            results.append({'profiles': size, 'operation': name, 'queries': len(queries), 'seconds': elapsed})
+        return results
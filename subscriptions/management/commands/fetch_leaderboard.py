@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from subscriptions.sharding import is_last_shard, parse_shard, run_sharded_fetch
+from subscriptions.tasks import fetch_leaderboard_data
+from subscriptions.views import invalidate_leaderboard_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch the latest leaderboard data. `--shard i/n` fetches one shard (id % n == i) "
+        "so scheduled jobs can split the work; `--shards n` runs every shard in a local process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shard', help="Fetch only shard i of n, e.g. 0/4.")
+        parser.add_argument('--shards', type=int, help="Run all n shards in parallel processes and merge the results.")
+        parser.add_argument('--processes', type=int, default=None, help="Pool size for --shards (default: one per shard).")
+        parser.add_argument('--budget', type=float, default=None, help="Time limit per run or shard, in seconds.")
+
+    def handle(self, *args, **options):
+        if options['shard'] and options['shards']:
+            raise CommandError("use either --shard or --shards")
+        if options['shards']:
+            if options['shards'] < 1:
+                raise CommandError("--shards must be at least 1")
+            summary = run_sharded_fetch(options['shards'], options['processes'], options['budget'], trigger='command')
+        else:
+            try:
+                shard = parse_shard(options['shard']) if options['shard'] else None
+            except ValueError as e:
+                raise CommandError(str(e))
+            summary = fetch_leaderboard_data(budget=options['budget'], trigger='command', shard=shard, rescore=is_last_shard(shard))
+        invalidate_leaderboard_cache()
+        self.stdout.write(json.dumps(summary, indent=2))
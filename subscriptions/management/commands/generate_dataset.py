@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions.datasets import SYNTHETIC_EMAIL_DOMAIN, clear_synthetic_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        f"Generate synthetic subscribers, profiles and weekly snapshots "
+        f"(emails @{SYNTHETIC_EMAIL_DOMAIN}) for load and query testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--profiles-per-platform', type=int, default=None,
+                            help="Profiles per platform (default: one per subscriber).")
+        parser.add_argument('--weeks', type=int, default=4, help="Weekly snapshots per profile.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--clear', action='store_true', help="Delete previously generated data first.")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f"Deleted {clear_synthetic_dataset()} synthetic rows")
+        counts = generate_dataset(
+            subscribers=options['subscribers'],
+            groups=options['groups'],
+            profiles_per_platform=options['profiles_per_platform'],
+            weeks=options['weeks'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['subscribers']} subscribers, {counts['profiles']} profiles, {counts['snapshots']} snapshots"
+        ))
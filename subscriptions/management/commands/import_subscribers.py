@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from subscriptions.onboarding import import_subscribers, write_report
+from subscriptions.tasks import MAX_FETCH_WORKERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create subscribers from a CSV with columns email, group, leetcode, codeforces, codechef. "
+        "Writes a per-row result report as CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--dry-run', action='store_true', help="Validate and report without creating anything.")
+        parser.add_argument('--report', help="Write the report to this file instead of stdout.")
+        parser.add_argument('--workers', type=int, default=MAX_FETCH_WORKERS, help="Concurrent handle validations.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as f:
+                report, summary = import_subscribers(f, dry_run=options['dry_run'], workers=options['workers'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as out:
+                write_report(report, out)
+        else:
+            write_report(report, sys.stdout)
+        self.stderr.write(self.style.SUCCESS(
+            ', '.join(f"{count} {status}" for status, count in sorted(summary.items())) or "no rows"
+        ))
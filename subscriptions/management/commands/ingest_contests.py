@@ -0,0 +1,19 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from subscriptions.contests import ingest_codeforces_contests
+from subscriptions.views import invalidate_leaderboard_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply rating changes of newly finished Codeforces contests to every tracked handle "
+        "in one bulk write. Schedule it every hour or so; see CODEFORCES_CONTEST_RATINGS."
+    )
+
+    def handle(self, *args, **options):
+        summary = ingest_codeforces_contests()
+        if summary['profiles_updated']:
+            invalidate_leaderboard_cache()
+        self.stdout.write(json.dumps(summary))
@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from subscriptions.datasets import SYNTHETIC_EMAIL_DOMAIN
+from subscriptions.loadtest import compare_to_baseline, run_load
+from subscriptions.upstream_stub import start_stub_server
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test home, leaderboard, my-profiles, api/fetch-data and profile "
+        "refresh over HTTP. By default starts the upstream stub and a gunicorn "
+        "server on a throwaway SQLite database seeded with synthetic data; no "
+        "outside network is used. Redis comes from REDIS_URL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=None, help="Test an already running server (seeded with generate_dataset).")
+        parser.add_argument('--subscribers', type=int, default=1000, help="Synthetic subscribers to seed (default 1000).")
+        parser.add_argument('--users', type=int, default=20, help="Concurrent virtual users (default 20).")
+        parser.add_argument('--duration', type=float, default=30, help="Measured seconds (default 30).")
+        parser.add_argument('--warmup', type=float, default=5, help="Unmeasured seconds before that (default 5).")
+        parser.add_argument('--workers', type=int, default=2, help="gunicorn workers (default 2).")
+        parser.add_argument('--asgi', action='store_true', help="Serve with gunicorn_asgi.py instead of gunicorn.conf.py.")
+        parser.add_argument('--stub-latency-ms', type=float, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', dest='json_path', default=None, help="Write the summary to this file.")
+        parser.add_argument('--save-baseline', default=None, help="Write the summary here as the new baseline.")
+        parser.add_argument('--baseline', default=None, help="Fail if results regress against this baseline.")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed regression vs baseline (default 0.2).")
+
+    def handle(self, *args, **options):
+        emails = [f'user{i}@{SYNTHETIC_EMAIL_DOMAIN}' for i in range(options['subscribers'])]
+        if options['url']:
+            summary, duration = run_load(options['url'].rstrip('/'), emails, options['users'],
+                                         options['duration'], options['warmup'], options['seed'])
+        else:
+            summary, duration = self._run_local(emails, options)
+
+        self._report(summary)
+        for path in (options['json_path'], options['save_baseline']):
+            if path:
+                with open(path, 'w') as f:
+                    json.dump(summary, f, indent=2, sort_keys=True)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = compare_to_baseline(summary, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"Within {options['tolerance']:.0%} of baseline"))
+
+    def _run_local(self, emails, options):
+        stub = start_stub_server(latency_ms=options['stub_latency_ms'], seed=options['seed'])
+        workdir = tempfile.mkdtemp(prefix='skilltracker-loadtest-')
+        port = _free_port()
+        env = dict(
+            os.environ,
+            USE_SQLITE='True',
+            SQLITE_PATH=os.path.join(workdir, 'db.sqlite3'),
+            DEBUG='False',
+            ALLOWED_HOSTS='127.0.0.1,localhost',
+            LEETCODE_BASE_URL=stub.base_url,
+            CODEFORCES_BASE_URL=stub.base_url,
+            CODECHEF_BASE_URL=stub.base_url,
+            PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, 'prometheus'),
+            WEB_CONCURRENCY=str(options['workers']),
+        )
+        manage = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py')]
+        server = None
+        try:
+            self.stdout.write(f"Seeding {len(emails)} subscribers in {workdir}")
+            subprocess.run(manage + ['migrate', '--noinput', '-v', '0'], env=env, check=True)
+            subprocess.run(manage + ['generate_dataset', '--subscribers', str(len(emails)),
+                                     '--seed', str(options['seed'])], env=env, check=True, stdout=subprocess.DEVNULL)
+
+            if options['asgi']:
+                config, app = 'gunicorn_asgi.py', 'SkillTracker.asgi:application'
+            else:
+                config, app = 'gunicorn.conf.py', 'SkillTracker.wsgi:application'
+            server = subprocess.Popen(
+                ['gunicorn', '-c', config, app, '--bind', f'127.0.0.1:{port}',
+                 '--workers', str(options['workers']), '--log-level', 'warning'],
+                cwd=settings.BASE_DIR, env=env,
+                # request logs only with -v 2
+                stdout=None if options['verbosity'] > 1 else subprocess.DEVNULL,
+                stderr=None if options['verbosity'] > 1 else subprocess.DEVNULL,
+            )
+            base_url = f'http://127.0.0.1:{port}'
+            self._wait_until_up(base_url, server)
+            self.stdout.write(f"Driving {options['users']} users for {options['duration']:.0f}s against {base_url}")
+            return run_load(base_url, emails, options['users'], options['duration'], options['warmup'], options['seed'])
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+            stub.shutdown()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _wait_until_up(self, base_url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"server exited with code {server.returncode}")
+            try:
+                if requests.get(f'{base_url}/health/', headers={'X-Forwarded-Proto': 'https'}, timeout=2).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.5)
+        raise CommandError(f"server did not answer /health/ within {timeout}s")
+
+    def _report(self, summary):
+        self.stdout.write(f"{'endpoint':<24} {'requests':>9} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}  statuses")
+        for label, row in summary.items():
+            self.stdout.write(
+                f"{label:<24} {row['requests']:>9} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['errors']:>7}  {row['statuses']}"
+            )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions.groups import rebuild_group_stats
+from subscriptions.models import Group
+
+
+class Command(BaseCommand):
+    help = "Recompute group member counts and per-platform aggregates from scratch."
+
+    def handle(self, *args, **options):
+        rebuild_group_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {Group.objects.count()} groups"))
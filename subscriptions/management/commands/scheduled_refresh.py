@@ -0,0 +1,23 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from subscriptions.scheduling import run_scheduled_refresh
+from subscriptions.views import invalidate_leaderboard_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the platforms that are due per the contest calendar: bursts right after "
+        "a platform's contest results come out, a slow background rate otherwise. "
+        "Run it every 15 minutes from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=float, default=None, help="Time limit in seconds for the whole tick, calendar sync included")
+
+    def handle(self, *args, **options):
+        summary = run_scheduled_refresh(budget=options['budget'])
+        if summary.get('run') or summary.get('contests'):
+            invalidate_leaderboard_cache()
+        self.stdout.write(json.dumps(summary, default=str))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions.upstream_stub import UpstreamStubServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the LeetCode, Codeforces and CodeChef upstreams. "
+        "Point LEETCODE_BASE_URL, CODEFORCES_BASE_URL and CODECHEF_BASE_URL at it."
+    )
+
+    def add_arguments(self, parser):
+        add_stub_arguments(parser)
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8099)
+
+    def handle(self, *args, **options):
+        server = UpstreamStubServer((options['host'], options['port']), **stub_options(options))
+        self.stdout.write(f"Upstream stub listening on {server.base_url} (stats at {server.base_url}/__stats__)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+def add_stub_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=50, help="Added to every upstream call (default 50).")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Extra random latency, 0..N ms.")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of calls answered with HTTP 500.")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Share of calls answered with HTTP 429.")
+    parser.add_argument('--max-rps', type=int, default=None, help="Answer 429 beyond this many calls per second.")
+    parser.add_argument('--fixtures-dir', default=None, help="Directory of recorded responses to replay.")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for latency and fault injection.")
+
+
+def stub_options(options):
+    return {
+        'latency_ms': options['latency_ms'],
+        'jitter_ms': options['jitter_ms'],
+        'error_rate': options['error_rate'],
+        'throttle_rate': options['throttle_rate'],
+        'max_rps': options['max_rps'],
+        'fixtures_dir': options['fixtures_dir'],
+        'seed': options['seed'],
+    }
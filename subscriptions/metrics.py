@@ -0,0 +1,76 @@
+"""
+Prometheus metrics for the fetch, cache and email subsystems.
+
+When PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py), every worker
+writes its samples there and `render_metrics` aggregates them, so the
+numbers are correct whichever worker serves the scrape.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+FETCH_LATENCY = Histogram(
+    'skilltracker_fetch_seconds',
+    'Upstream platform fetch latency, including retries',
+    ['platform'],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+FETCH_RETRIES = Counter(
+    'skilltracker_fetch_retries_total',
+    'Upstream request attempts that failed and were retried',
+    ['platform'],
+)
+FETCH_ERRORS = Counter(
+    'skilltracker_fetch_errors_total',
+    'Upstream fetches that produced no data',
+    ['platform', 'reason'],
+)
+FETCH_CACHE = Counter(
+    'skilltracker_fetch_cache_total',
+    'Fetch cache lookups by caller and outcome (hit/miss/stale)',
+    ['caller', 'outcome'],
+)
+HANDLE_VALIDATION_CACHE = Counter(
+    'skilltracker_handle_validation_cache_total',
+    'Handle existence cache lookups during signup validation (hit/miss)',
+    ['platform', 'outcome'],
+)
+LEADERBOARD_CACHE = Counter(
+    'skilltracker_leaderboard_cache_total',
+    'Leaderboard rank cache lookups (hit/miss)',
+    ['outcome'],
+)
+DB_WRITE_SECONDS = Histogram(
+    'skilltracker_db_write_seconds',
+    'Time spent writing fetched stats to the database',
+    ['operation'],
+)
+EMAIL_SEND_SECONDS = Histogram(
+    'skilltracker_email_send_seconds',
+    'Email send latency',
+    ['kind'],
+)
+EMAILS = Counter(
+    'skilltracker_emails_total',
+    'Emails sent by kind and outcome (sent/failed)',
+    ['kind', 'outcome'],
+)
+
+
+def render_metrics():
+    """Return `(body, content_type)` in the Prometheus text format."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,70 @@
+import logging
+from functools import partial
+
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from .models import Subscriber
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_CACHE_TTL = 300  # seconds a resolved subscriber is reused
+
+
+def subscriber_cache_key(email):
+    return f"subscriber:{email}"
+
+
+def get_cached_subscriber(email):
+    """Return the Subscriber for `email` through the identity cache, or None."""
+    if not email:
+        return None
+
+    key = subscriber_cache_key(email)
+    subscriber = cache.get(key)
+    if subscriber is None:
+        subscriber = Subscriber.objects.filter(email=email).first()
+        if subscriber is not None:
+            cache.set(key, subscriber, SUBSCRIBER_CACHE_TTL)
+            logger.debug(f"get_cached_subscriber: cached {email}")
+    return subscriber
+
+
+async def aget_cached_subscriber(email):
+    """Async version of `get_cached_subscriber` for async views."""
+    if not email:
+        return None
+
+    key = subscriber_cache_key(email)
+    subscriber = await cache.aget(key)
+    if subscriber is None:
+        subscriber = await Subscriber.objects.filter(email=email).afirst()
+        if subscriber is not None:
+            await cache.aset(key, subscriber, SUBSCRIBER_CACHE_TTL)
+            logger.debug(f"aget_cached_subscriber: cached {email}")
+    return subscriber
+
+
+async def _aget_request_subscriber(request):
+    return await aget_cached_subscriber(await request.session.aget('subscriber_email'))
+
+
+def invalidate_subscriber_cache(email):
+    """Drop a cached subscriber (called on save/delete, see signals.py)."""
+    cache.delete(subscriber_cache_key(email))
+
+
+class SubscriberMiddleware(MiddlewareMixin):
+    """Expose the session's subscriber as `request.subscriber`.
+
+    Resolved lazily on first access, from the identity cache when possible,
+    so views that don't need it pay nothing and views that do usually
+    avoid the Subscriber query. Async views use `await request.asubscriber()`.
+    """
+
+    def process_request(self, request):
+        request.subscriber = SimpleLazyObject(
+            lambda: get_cached_subscriber(request.session.get('subscriber_email'))
+        )
+        request.asubscriber = partial(_aget_request_subscriber, request)
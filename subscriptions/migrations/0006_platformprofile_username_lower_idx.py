@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 23:52
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0005_weeklysnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='platformprofile',
+            index=models.Index(django.db.models.functions.text.Lower('username'), models.F('platform_name'), name='profile_username_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.5 on 2026-10-19 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0006_platformprofile_username_lower_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FetchRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigger', models.CharField(default='manual', max_length=20)),
+                ('status', models.CharField(choices=[('Running', 'Running'), ('Completed', 'Completed'), ('Failed', 'Failed')], default='Running', max_length=20)),
+                ('budget', models.FloatField(blank=True, default=None, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('profiles_attempted', models.PositiveIntegerField(default=0)),
+                ('profiles_changed', models.PositiveIntegerField(default=0)),
+                ('profiles_unchanged', models.PositiveIntegerField(default=0)),
+                ('profiles_failed', models.PositiveIntegerField(default=0)),
+                ('profiles_carried_over', models.PositiveIntegerField(default=0)),
+                ('retries', models.PositiveIntegerField(default=0)),
+                ('bytes_downloaded', models.BigIntegerField(default=0)),
+                ('db_write_seconds', models.FloatField(default=0)),
+                ('platform_stats', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-19 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0007_fetchrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fetchrun',
+            name='profiles_skipped',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='platformprofile',
+            name='consecutive_failures',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='platformprofile',
+            name='fetch_status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Success', 'Success'), ('Failed', 'Failed')], default='Pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='platformprofile',
+            name='last_success_at',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='platformprofile',
+            name='next_fetch_at',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, null=True),
+        ),
+    ]
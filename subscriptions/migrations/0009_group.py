@@ -0,0 +1,78 @@
+# Generated by Django 5.1.5 on 2026-10-19 00:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_groups(apps, schema_editor):
+    # self-contained copy of groups.rebuild_group_stats for an empty table
+    Group = apps.get_model('subscriptions', 'Group')
+    GroupPlatformStats = apps.get_model('subscriptions', 'GroupPlatformStats')
+    Subscriber = apps.get_model('subscriptions', 'Subscriber')
+    PlatformProfile = apps.get_model('subscriptions', 'PlatformProfile')
+
+    members = Subscriber.objects.exclude(group=None).values_list('group').annotate(n=Count('id')).order_by()
+    Group.objects.bulk_create([Group(name=name, member_count=n) for name, n in members])
+
+    stats = {}
+    rows = (
+        PlatformProfile.objects.exclude(subscriber__group=None)
+        .values_list('subscriber__group', 'platform_name', 'id', 'last_rating', 'problems_solved')
+        .order_by('subscriber__group', 'platform_name', 'id')
+    )
+    for group_name, platform_name, profile_id, rating, problems in rows.iterator():
+        rating = rating if rating is not None and rating >= 0 else None
+        problems = problems if problems is not None and problems > 0 else 0
+        row = stats.get((group_name, platform_name))
+        if row is None:
+            row = stats[(group_name, platform_name)] = GroupPlatformStats(group_id=group_name, platform_name=platform_name)
+        row.profile_count += 1
+        row.total_problems += problems
+        if rating is not None:
+            row.rating_total += rating
+            row.rated_count += 1
+            if row.top_rating is None or rating > row.top_rating:
+                row.top_profile_id, row.top_rating = profile_id, rating
+    GroupPlatformStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0008_platformprofile_fetch_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Group',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('member_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='subscriber',
+            name='group',
+            field=models.CharField(blank=True, db_index=True, default=None, max_length=50, null=True),
+        ),
+        migrations.CreateModel(
+            name='GroupPlatformStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform_name', models.CharField(choices=[('LeetCode', 'LeetCode'), ('CodeChef', 'CodeChef'), ('Codeforces', 'Codeforces')], max_length=50)),
+                ('profile_count', models.IntegerField(default=0)),
+                ('total_problems', models.BigIntegerField(default=0)),
+                ('rating_total', models.BigIntegerField(default=0)),
+                ('rated_count', models.IntegerField(default=0)),
+                ('top_rating', models.IntegerField(blank=True, default=None, null=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='platform_stats', to='subscriptions.group')),
+                ('top_profile', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='subscriptions.platformprofile')),
+            ],
+            options={
+                'unique_together': {('group', 'platform_name')},
+            },
+        ),
+        migrations.RunPython(build_groups, migrations.RunPython.noop),
+    ]
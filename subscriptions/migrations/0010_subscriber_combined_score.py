@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-19 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0009_group'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriber',
+            name='combined_score',
+            field=models.FloatField(blank=True, db_index=True, default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-19 00:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0010_subscriber_combined_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fetchrun',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='subscriptions.fetchrun'),
+        ),
+        migrations.AddField(
+            model_name='fetchrun',
+            name='shard',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+    ]
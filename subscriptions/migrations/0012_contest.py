@@ -0,0 +1,31 @@
+# Generated by Django 5.1.5 on 2026-10-19 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0011_fetchrun_shard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform_name', models.CharField(choices=[('LeetCode', 'LeetCode'), ('CodeChef', 'CodeChef'), ('Codeforces', 'Codeforces')], max_length=50)),
+                ('external_id', models.CharField(max_length=50)),
+                ('name', models.CharField(max_length=200)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField(db_index=True)),
+                ('rated', models.BooleanField(default=None, null=True)),
+                ('ratings_applied_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('profiles_updated', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-ends_at'],
+                'unique_together': {('platform_name', 'external_id')},
+            },
+        ),
+    ]
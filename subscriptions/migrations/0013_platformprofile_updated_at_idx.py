@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-19 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0012_contest'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='platformprofile',
+            index=models.Index(fields=['updated_at', 'id'], name='profile_updated_at_idx'),
+        ),
+    ]
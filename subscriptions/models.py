@@ -1,10 +1,14 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 class Subscriber(models.Model):
     """Model to store subscriber details."""
     email = models.EmailField(unique=True)
-    group = models.CharField(max_length=50, null=True, blank=True, default=None)
+    # name of the subscriber's Group; Group rows and stats follow this field
+    group = models.CharField(max_length=50, null=True, blank=True, default=None, db_index=True)
     date_subscribed = models.DateTimeField(auto_now_add=True)
+    # weighted, normalized score across platforms; recomputed after each ingest run (scoring.py)
+    combined_score = models.FloatField(null=True, blank=True, default=None, db_index=True)
 
     def __str__(self):
         return self.email
@@ -37,6 +41,130 @@ class PlatformProfile(models.Model):
     
     updated_at = models.DateTimeField(auto_now=True)
 
+    # maintained by the fetch layer; failing handles are skipped until next_fetch_at
+    fetch_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    last_success_at = models.DateTimeField(null=True, blank=True, default=None)
+    next_fetch_at = models.DateTimeField(null=True, blank=True, default=None, db_index=True)
+
+    class Meta:
+        unique_together = ('subscriber', 'platform_name')
+        indexes = [
+            # case-insensitive (platform, username) lookups for the public stats API
+            models.Index(Lower('username'), 'platform_name', name='profile_username_lower_idx'),
+            # leaderboard runs page through profiles least recently updated first
+            models.Index(fields=['updated_at', 'id'], name='profile_updated_at_idx'),
+        ]
+
+
+class Group(models.Model):
+    """A named group of subscribers with incrementally maintained aggregates.
+
+    Membership is `Subscriber.group`; `member_count` and the per-platform
+    GroupPlatformStats are kept current by the handlers in `signals.py`
+    (see `groups.py`). A group is deleted when its last member leaves.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    member_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class GroupPlatformStats(models.Model):
+    """Aggregates of a group's profiles on one platform.
+
+    Ratings and problem counts of -1 (never fetched) don't count.
+    """
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='platform_stats')
+    platform_name = models.CharField(max_length=50, choices=PlatformProfile.PLATFORM_CHOICES)
+    profile_count = models.IntegerField(default=0)
+    total_problems = models.BigIntegerField(default=0)
+    rating_total = models.BigIntegerField(default=0)
+    rated_count = models.IntegerField(default=0)
+    top_profile = models.ForeignKey(PlatformProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    top_rating = models.IntegerField(null=True, blank=True, default=None)
+
+    class Meta:
+        unique_together = ('group', 'platform_name')
+
+    @property
+    def average_rating(self):
+        return self.rating_total / self.rated_count if self.rated_count else None
+
+
+class Contest(models.Model):
+    """A platform contest seen by the contest ingestion (see `contests.py`).
+
+    `ratings_applied_at` is set once the contest's rating changes have been
+    written to the tracked profiles, or once it is known to be unrated.
+    """
+    platform_name = models.CharField(max_length=50, choices=PlatformProfile.PLATFORM_CHOICES)
+    external_id = models.CharField(max_length=50)
+    name = models.CharField(max_length=200)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField(db_index=True)
+    rated = models.BooleanField(null=True, default=None)
+    ratings_applied_at = models.DateTimeField(null=True, blank=True, default=None)
+    profiles_updated = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('platform_name', 'external_id')
+        ordering = ['-ends_at']
+
+    def __str__(self):
+        return f"{self.platform_name} {self.name}"
+
+
+class FetchRun(models.Model):
+    """One leaderboard ingestion run and its statistics."""
+    STATUS_CHOICES = [
+        ('Running', 'Running'),
+        ('Completed', 'Completed'),
+        ('Failed', 'Failed'),
+    ]
+
+    trigger = models.CharField(max_length=20, default='manual')
+    # "i/n" for one shard of a sharded run; shards of a coordinated run point at its parent
+    shard = models.CharField(max_length=20, blank=True, default='')
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='shards')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Running')
+    budget = models.FloatField(null=True, blank=True, default=None)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    profiles_attempted = models.PositiveIntegerField(default=0)
+    profiles_changed = models.PositiveIntegerField(default=0)
+    profiles_unchanged = models.PositiveIntegerField(default=0)
+    profiles_failed = models.PositiveIntegerField(default=0)
+    profiles_carried_over = models.PositiveIntegerField(default=0)
+    profiles_skipped = models.PositiveIntegerField(default=0)  # backing off after failures
+    retries = models.PositiveIntegerField(default=0)
+    bytes_downloaded = models.BigIntegerField(default=0)
+    db_write_seconds = models.FloatField(default=0)
+    # the same counters broken down by platform
+    platform_stats = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    @property
+    def duration_seconds(self):
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    @property
+    def profiles_per_second(self):
+        duration = self.duration_seconds
+        if not duration:
+            return None
+        return self.profiles_attempted / duration
+
+    def __str__(self):
+        return f"Fetch run {self.id} ({self.trigger}, {self.status}) at {self.started_at}"
+
 
 class WeeklySnapshot(models.Model):
     """Store a weekly snapshot of a profile's statistics."""
@@ -0,0 +1,271 @@
+"""
+Bulk subscriber onboarding from CSV (`import_subscribers` command, admin upload).
+
+Columns: `email`, `group`, and one handle column per platform (`leetcode`,
+`codeforces`, `codechef`); all but `email` may be empty. Existing emails and
+handles are looked up in one query each, handles are validated
+concurrently (Codeforces in `user.info` batches, the others through
+`validate_and_fetch_profile`), and new rows go in with bulk_create. Every
+input row gets a result in the report.
+"""
+
+import csv
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .forms import is_handle_known_missing, remember_missing_handle, validate_and_fetch_profile
+from .groups import rebuild_group_stats
+from .models import PlatformProfile, Subscriber
+from .scoring import recompute_combined_scores
+from .tasks import MAX_FETCH_WORKERS, REQUEST_TIMEOUT
+from .views import invalidate_leaderboard_cache
+
+logger = logging.getLogger(__name__)
+
+HANDLE_COLUMNS = {'leetcode': 'LeetCode', 'codeforces': 'Codeforces', 'codechef': 'CodeChef'}
+REPORT_COLUMNS = ('line', 'email', 'status', 'detail', 'LeetCode', 'Codeforces', 'CodeChef')
+CODEFORCES_BATCH_SIZE = 200  # handles per user.info call, keeps the URL short
+IMPORT_BATCH_SIZE = 1000
+_CODEFORCES_MISSING = re.compile(r'User with handle (\S+) not found')
+
+
+def _cell(row, name):
+    return (row.get(name) or '').strip()
+
+
+def _to_stat(value):
+    return -1 if value in (None, 'N/A') else value
+
+
+def codeforces_ratings(handles):
+    """Check Codeforces handles with batched `user.info` calls.
+
+    Returns `{handle_lower: rating}` for existing handles (rating is -1 when
+    unrated) and `{handle_lower: None}` for missing ones. The API fails the
+    whole call on the first unknown handle, naming it, so that handle is
+    dropped and the call repeated. Raises RequestException if Codeforces
+    can't be reached.
+    """
+    results = {}
+    pending = list(dict.fromkeys(h.lower() for h in handles))
+    while pending:
+        batch, pending = pending[:CODEFORCES_BATCH_SIZE], pending[CODEFORCES_BATCH_SIZE:]
+        while batch:
+            response = requests.get(
+                f"{settings.CODEFORCES_BASE_URL}/api/user.info",
+                params={'handles': ';'.join(batch)},
+                timeout=REQUEST_TIMEOUT,
+            )
+            if response.status_code == 400:
+                match = _CODEFORCES_MISSING.search(response.json().get('comment', ''))
+                if not match or match.group(1).lower() not in batch:
+                    raise requests.RequestException(f"unexpected Codeforces error: {response.text[:200]}")
+                missing = match.group(1).lower()
+                results[missing] = None
+                batch.remove(missing)
+                continue
+            response.raise_for_status()
+            for user in response.json()['result']:
+                results[user['handle'].lower()] = user.get('rating', -1)
+            for handle in batch:
+                # renamed handles come back under their new name
+                results.setdefault(handle, -1)
+            break
+    return results
+
+
+def _validate_codeforces(handles):
+    """`{handle: (stats or None, error)}` for Codeforces, cache-aware."""
+    outcome = {}
+    to_check = []
+    for handle in handles:
+        if is_handle_known_missing('Codeforces', handle):
+            outcome[handle] = (None, 'not found')
+        else:
+            to_check.append(handle)
+    if not to_check:
+        return outcome
+    try:
+        ratings = codeforces_ratings(to_check)
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"_validate_codeforces: batch lookup failed - {e}")
+        return {**outcome, **{handle: (None, 'Codeforces unreachable') for handle in to_check}}
+    for handle in to_check:
+        rating = ratings.get(handle.lower())
+        if rating is None:
+            remember_missing_handle('Codeforces', handle)
+            outcome[handle] = (None, 'not found')
+        else:
+            # problems and contests follow on the next leaderboard run
+            outcome[handle] = ({'rating': rating, 'problems_solved': -1, 'contests': -1}, None)
+    return outcome
+
+
+def _validate_one(platform_name, handle):
+    try:
+        return validate_and_fetch_profile(platform_name, handle), None
+    except ValidationError as e:
+        return None, ' '.join(e.messages)
+
+
+def validate_handles(handles_by_platform, workers=MAX_FETCH_WORKERS):
+    """Validate `{platform: [handles]}` concurrently; returns `{(platform, handle): (stats, error)}`."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for platform_name, handles in handles_by_platform.items():
+            if platform_name == 'Codeforces':
+                futures[executor.submit(_validate_codeforces, handles)] = platform_name
+            else:
+                for handle in handles:
+                    futures[executor.submit(_validate_one, platform_name, handle)] = (platform_name, handle)
+        for future, key in futures.items():
+            if key == 'Codeforces':
+                results.update({('Codeforces', h): r for h, r in future.result().items()})
+            else:
+                results[key] = future.result()
+    return results
+
+
+def _insert(rows):
+    subscribers = Subscriber.objects.bulk_create(
+        [Subscriber(email=r['email'], group=r['group']) for r in rows],
+        batch_size=IMPORT_BATCH_SIZE,
+    )
+    PlatformProfile.objects.bulk_create(
+        [
+            PlatformProfile(
+                subscriber=subscriber,
+                platform_name=platform_name,
+                username=handle,
+                last_rating=_to_stat(stats.get('rating')),
+                problems_solved=_to_stat(stats.get('problems_solved')),
+                contests_attended=_to_stat(stats.get('contests')),
+            )
+            for subscriber, entry in zip(subscribers, rows)
+            for platform_name, (handle, stats) in entry['profiles'].items()
+        ],
+        batch_size=IMPORT_BATCH_SIZE,
+    )
+
+
+def import_subscribers(lines, dry_run=False, workers=MAX_FETCH_WORKERS):
+    """Import subscribers from CSV `lines` (any iterable of str).
+
+    Returns `(report, summary)`: one dict per data row with REPORT_COLUMNS,
+    and counts per status. Nothing is written when `dry_run` is set.
+    """
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or 'email' not in [f.strip().lower() for f in reader.fieldnames]:
+        raise ValueError("CSV needs an 'email' column")
+    reader.fieldnames = [f.strip().lower() for f in reader.fieldnames]
+
+    rows = []
+    seen_emails, seen_handles = set(), set()
+    for line, raw in enumerate(reader, start=2):
+        entry = {'line': line, 'email': _cell(raw, 'email').lower(), 'group': _cell(raw, 'group') or None, 'handles': {}}
+        entry['result'] = dict.fromkeys(REPORT_COLUMNS, '')
+        entry['result'].update(line=line, email=entry['email'])
+        rows.append(entry)
+        try:
+            validate_email(entry['email'])
+        except ValidationError:
+            entry['result'].update(status='failed', detail='invalid email')
+            continue
+        if entry['email'] in seen_emails:
+            entry['result'].update(status='skipped', detail='duplicate email in file')
+            continue
+        seen_emails.add(entry['email'])
+        for column, platform_name in HANDLE_COLUMNS.items():
+            handle = _cell(raw, column)
+            if not handle:
+                continue
+            if (platform_name, handle.lower()) in seen_handles:
+                entry['result'][platform_name] = 'duplicate in file'
+                continue
+            seen_handles.add((platform_name, handle.lower()))
+            entry['handles'][platform_name] = handle
+
+    # dedupe against the database: one query for emails, one for handles
+    candidates = [r for r in rows if not r['result']['status']]
+    # CSV emails are lowercased; stored ones may not be
+    existing_emails = set(
+        Subscriber.objects.annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=[r['email'] for r in candidates])
+        .values_list('email_lower', flat=True)
+    )
+    existing_handles = set(
+        PlatformProfile.objects.annotate(username_lower=Lower('username'))
+        .filter(
+            platform_name__in={p for r in candidates for p in r['handles']},
+            username_lower__in={h.lower() for r in candidates for h in r['handles'].values()},
+        )
+        .values_list('platform_name', 'username_lower')
+    )
+
+    handles_by_platform = {}
+    for entry in candidates:
+        if entry['email'] in existing_emails:
+            entry['result'].update(status='skipped', detail='subscriber exists')
+            continue
+        for platform_name, handle in list(entry['handles'].items()):
+            if (platform_name, handle.lower()) in existing_handles:
+                entry['result'][platform_name] = 'already registered'
+                del entry['handles'][platform_name]
+            else:
+                handles_by_platform.setdefault(platform_name, []).append(handle)
+
+    logger.info(f"import_subscribers: {len(rows)} rows, validating {sum(map(len, handles_by_platform.values()))} handles")
+    validated = validate_handles(handles_by_platform, workers)
+
+    new_rows = [r for r in candidates if not r['result']['status']]
+    for entry in new_rows:
+        entry['profiles'] = {}
+        for platform_name, handle in entry['handles'].items():
+            stats, error = validated[(platform_name, handle)]
+            if error:
+                entry['result'][platform_name] = error
+            else:
+                entry['profiles'][platform_name] = (handle, stats)
+                entry['result'][platform_name] = 'ok' if dry_run else 'created'
+        entry['result']['status'] = 'valid' if dry_run else 'created'
+
+    if new_rows and not dry_run:
+        try:
+            with transaction.atomic():
+                _insert(new_rows)
+        except IntegrityError:
+            # someone signed up with one of these emails since the lookup above
+            logger.warning("import_subscribers: batch insert conflicted, inserting row by row")
+            for entry in new_rows:
+                try:
+                    with transaction.atomic():
+                        _insert([entry])
+                except IntegrityError:
+                    entry['result'].update(dict.fromkeys(HANDLE_COLUMNS.values(), ''))
+                    entry['result'].update(status='skipped', detail='subscriber exists')
+        # bulk_create skips the signal handlers
+        rebuild_group_stats()
+        recompute_combined_scores()
+        invalidate_leaderboard_cache()
+
+    report = [entry['result'] for entry in rows]
+    summary = {}
+    for result in report:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    logger.info(f"import_subscribers: {summary}")
+    return report, summary
+
+
+def write_report(report, out):
+    writer = csv.DictWriter(out, fieldnames=REPORT_COLUMNS)
+    writer.writeheader()
+    writer.writerows(report)
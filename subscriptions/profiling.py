@@ -0,0 +1,143 @@
+"""
+Opt-in per-request profiling (enable with REQUEST_PROFILING=True).
+
+Records DB query count/time, cache call count/time and total view time,
+returns them in a `Server-Timing` header, logs slow requests with their
+slowest queries, and captures sampled cProfile runs for selected URL names.
+"""
+
+import cProfile
+import contextvars
+import io
+import logging
+import os
+import pstats
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django_redis.cache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+_current_profile = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Timings collected while one request is being handled."""
+
+    def __init__(self):
+        self.queries = []  # (duration_ms, sql)
+        self.cache_calls = 0
+        self.cache_ms = 0.0
+
+    @property
+    def db_ms(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(((time.perf_counter() - start) * 1000, sql))
+
+    def record_cache_call(self, duration_ms):
+        self.cache_calls += 1
+        self.cache_ms += duration_ms
+
+
+def _timed_cache_method(method):
+    def wrapper(self, *args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            profile.record_cache_call((time.perf_counter() - start) * 1000)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class InstrumentedRedisCache(RedisCache):
+    """django-redis backend that reports calls to the active RequestProfile.
+
+    Selected in settings.CACHES only when REQUEST_PROFILING is on.
+    """
+
+
+for _name in (
+    'get', 'set', 'add', 'delete', 'get_many', 'set_many', 'delete_many',
+    'incr', 'decr', 'has_key', 'ttl', 'touch', 'delete_pattern', 'clear',
+):
+    setattr(InstrumentedRedisCache, _name, _timed_cache_method(getattr(RedisCache, _name)))
+
+
+class RequestProfilingMiddleware:
+    """Attach Server-Timing, log slow requests and sample cProfile runs."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_ms = settings.REQUEST_PROFILING_SLOW_MS
+        self.cprofile_urls = set(settings.REQUEST_PROFILING_CPROFILE_URLS)
+        self.cprofile_rate = settings.REQUEST_PROFILING_CPROFILE_RATE
+        self.cprofile_dir = settings.REQUEST_PROFILING_CPROFILE_DIR
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile.record_query):
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+            profiler = getattr(request, '_cprofile', None)
+            if profiler is not None:
+                profiler.disable()
+        total_ms = (time.perf_counter() - start) * 1000
+
+        response['Server-Timing'] = ', '.join([
+            f'db;desc="{len(profile.queries)} queries";dur={profile.db_ms:.1f}',
+            f'cache;desc="{profile.cache_calls} calls";dur={profile.cache_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        if total_ms >= self.slow_ms:
+            top_queries = sorted(profile.queries, reverse=True)[:5]
+            logger.warning(
+                f"slow request {request.method} {request.path}: {total_ms:.0f}ms, "
+                f"db={len(profile.queries)} queries/{profile.db_ms:.0f}ms, "
+                f"cache={profile.cache_calls} calls/{profile.cache_ms:.0f}ms; top queries: "
+                + "; ".join(f"{duration:.1f}ms {sql}" for duration, sql in top_queries)
+            )
+
+        if profiler is not None:
+            self._save_cprofile(request, profiler)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        if url_name in self.cprofile_urls and random.random() < self.cprofile_rate:
+            request._cprofile = cProfile.Profile()
+            request._cprofile.enable()
+        return None
+
+    def _save_cprofile(self, request, profiler):
+        url_name = request.resolver_match.url_name
+        if self.cprofile_dir:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            path = os.path.join(self.cprofile_dir, f"{url_name}-{time.time_ns()}.prof")
+            profiler.dump_stats(path)
+            logger.info(f"cProfile for {url_name} saved to {path}")
+        else:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+            logger.info(f"cProfile for {url_name}:\n{out.getvalue()}")
@@ -0,0 +1,116 @@
+"""
+Contest-aware leaderboard refresh scheduling.
+
+Ratings only move once a contest's results are published, so instead of a
+fixed every-6-hours run, `run_scheduled_refresh` is meant to be called on a
+short tick (every 15 minutes). It keeps the contest calendar fresh
+(`contests.sync_contest_calendar`) and refreshes a platform's profiles:
+
+- in a burst, every `interval`, from `delay` after one of its contests ends
+  until `delay + length` (BURST_WINDOWS), when new ratings are appearing;
+- otherwise once per QUIET_INTERVAL, to pick up solved-problem counts.
+
+Most ticks find nothing due and return without fetching anything.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .contests import ingest_codeforces_contests, sync_contest_calendar
+from .models import Contest, FetchRun
+from .tasks import fetch_leaderboard_data
+
+logger = logging.getLogger(__name__)
+
+# platform -> (results published after the contest ends, burst length, refresh interval in the burst)
+BURST_WINDOWS = {
+    'LeetCode': (timedelta(hours=1), timedelta(hours=48), timedelta(hours=2)),
+    'Codeforces': (timedelta(hours=1), timedelta(hours=6), timedelta(minutes=30)),
+    'CodeChef': (timedelta(minutes=30), timedelta(hours=12), timedelta(hours=1)),
+}
+QUIET_INTERVAL = timedelta(hours=12)
+SCHEDULER_LOCK_TIMEOUT = 30 * 60  # seconds; a crashed run frees the lock after this
+
+
+def _refreshed_key(platform_name):
+    return f"platform_refreshed_at:{platform_name}"
+
+
+def last_refreshed(platform_name):
+    value = cache.get(_refreshed_key(platform_name))
+    return datetime.fromisoformat(value) if value else None
+
+
+def mark_refreshed(platforms, now):
+    # kept past QUIET_INTERVAL so a missing key really means "never refreshed"
+    cache.set_many({_refreshed_key(p): now.isoformat() for p in platforms}, int(QUIET_INTERVAL.total_seconds()) * 2)
+
+
+def plan_refresh(now=None):
+    """Return `{platform: 'burst' | 'quiet'}` for the platforms due a refresh at `now`."""
+    now = now or timezone.now()
+    longest = max(delay + length for delay, length, _ in BURST_WINDOWS.values())
+    recent = Contest.objects.filter(ends_at__gte=now - longest, ends_at__lte=now).values_list('platform_name', 'ends_at')
+    bursting = set()
+    for platform_name, ends_at in recent:
+        delay, length, _ = BURST_WINDOWS[platform_name]
+        if ends_at + delay <= now <= ends_at + delay + length:
+            bursting.add(platform_name)
+
+    due = {}
+    for platform_name, (_, _, burst_interval) in BURST_WINDOWS.items():
+        refreshed = last_refreshed(platform_name)
+        since = now - refreshed if refreshed else None
+        if platform_name in bursting and (since is None or since >= burst_interval):
+            due[platform_name] = 'burst'
+        elif since is None or since >= QUIET_INTERVAL:
+            due[platform_name] = 'quiet'
+    return due
+
+
+def run_scheduled_refresh(now=None, budget=None):
+    """Sync the contest calendar, then refresh whichever platforms `plan_refresh` says are due.
+
+    `budget` (seconds) covers the whole tick: the calendar sync and contest
+    ingest share it, and the profile fetch gets whatever is left. A
+    platform counts as refreshed only once none of its profiles were
+    carried over, so a backlog keeps it due on the following ticks.
+    A Codeforces burst with CODEFORCES_CONTEST_RATINGS on applies the
+    contest's rating changes instead of fetching every handle. Returns
+    `{'calendar': ..., 'due': ..., 'run': fetch summary or None, 'contests': ...}`,
+    or `{'skipped': 'already running'}` while another call holds the lock.
+    """
+    now = now or timezone.now()
+    deadline = time.monotonic() + budget if budget else None
+    if not cache.add('scheduled_refresh_lock', True, SCHEDULER_LOCK_TIMEOUT):
+        logger.info("run_scheduled_refresh: previous refresh still running, skipping")
+        return {'skipped': 'already running'}
+    try:
+        calendar = sync_contest_calendar(now=now, deadline=deadline)
+        due = plan_refresh(now)
+        summary = {'calendar': calendar, 'due': due, 'run': None, 'contests': None}
+        platforms = list(due)
+        if due.get('Codeforces') == 'burst' and settings.CODEFORCES_CONTEST_RATINGS:
+            summary['contests'] = ingest_codeforces_contests(now, deadline)
+            platforms.remove('Codeforces')
+            if not summary['contests']['carried_over']:
+                mark_refreshed(['Codeforces'], now)
+        if platforms:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                logger.warning(f"run_scheduled_refresh: budget used up before fetching {platforms}, leaving them due")
+                return summary
+            logger.info(f"run_scheduled_refresh: refreshing {due}")
+            summary['run'] = fetch_leaderboard_data(budget=remaining, trigger='scheduled', platforms=platforms)
+            platform_stats = FetchRun.objects.get(pk=summary['run']['run_id']).platform_stats
+            finished = [p for p in platforms if not platform_stats.get(p, {}).get('carried_over')]
+            if finished:
+                mark_refreshed(finished, now)
+        return summary
+    finally:
+        cache.delete('scheduled_refresh_lock')
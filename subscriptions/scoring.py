@@ -0,0 +1,125 @@
+"""
+Combined cross-platform score per subscriber.
+
+Each (platform, field) value is normalized against every profile on that
+platform, either by percentile rank or min-max, and the weighted sum is
+stored on `Subscriber.combined_score` on a 0-100 scale. A missing profile
+or field adds 0, so covering more platforms ranks higher. Normalization is
+relative to everyone, so scores are recomputed in one pass after each
+ingest run (`recompute_combined_scores`) instead of per profile write.
+
+Weights come from the COMBINED_SCORE_WEIGHTS setting and the method from
+COMBINED_SCORE_NORMALIZATION ('percentile' or 'minmax').
+"""
+
+import logging
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WEIGHTS = {
+    'LeetCode': {'last_rating': 1.0, 'problems_solved': 1.0},
+    'Codeforces': {'last_rating': 1.0, 'problems_solved': 1.0},
+    'CodeChef': {'last_rating': 1.0, 'problems_solved': 1.0},
+}
+SCORE_FIELDS = ('last_rating', 'problems_solved')
+SCORE_BATCH_SIZE = 1000
+SCORE_PRECISION = 4  # decimals kept; smaller changes are not written
+
+
+def get_weights():
+    return getattr(settings, 'COMBINED_SCORE_WEIGHTS', DEFAULT_WEIGHTS)
+
+
+def get_normalization():
+    return getattr(settings, 'COMBINED_SCORE_NORMALIZATION', 'percentile')
+
+
+def _percentile(values, value):
+    """Mid-rank of `value` in sorted `values`, from 0.0 (lowest) to 1.0 (highest)."""
+    if len(values) == 1:
+        return 1.0
+    left, right = bisect_left(values, value), bisect_right(values, value)
+    return (left + right - 1) / 2 / (len(values) - 1)
+
+
+def _minmax(values, value):
+    low, high = values[0], values[-1]
+    return 1.0 if high == low else (value - low) / (high - low)
+
+
+def compute_combined_scores(rows, weights=None, normalization=None):
+    """Return `{subscriber_id: score}` for `(subscriber_id, platform_name, last_rating, problems_solved)` rows.
+
+    Values that are None or negative (never fetched) are skipped; a
+    subscriber with nothing to score gets None.
+    """
+    weights = get_weights() if weights is None else weights
+    normalization = normalization or get_normalization()
+    if normalization not in ('percentile', 'minmax'):
+        raise ValueError(f"unknown normalization {normalization!r}")
+    normalize = _percentile if normalization == 'percentile' else _minmax
+    total_weight = sum(w for fields in weights.values() for w in fields.values())
+
+    scores = {}
+    values = {}  # (platform, field) -> all values on that platform
+    entries = []
+    for subscriber_id, platform_name, *fields in rows:
+        scores.setdefault(subscriber_id, None)
+        for field, value in zip(SCORE_FIELDS, fields):
+            if value is None or value < 0 or not weights.get(platform_name, {}).get(field):
+                continue
+            values.setdefault((platform_name, field), []).append(value)
+            entries.append((subscriber_id, platform_name, field, value))
+    for column in values.values():
+        column.sort()
+
+    for subscriber_id, platform_name, field, value in entries:
+        part = weights[platform_name][field] * normalize(values[(platform_name, field)], value)
+        scores[subscriber_id] = (scores[subscriber_id] or 0.0) + part
+    return {
+        subscriber_id: None if score is None else round(100 * score / total_weight, SCORE_PRECISION)
+        for subscriber_id, score in scores.items()
+    }
+
+
+def recompute_combined_scores():
+    """Recompute every subscriber's combined score and write the ones that changed.
+
+    Uses bulk_update, so subscriber signals (and group handlers) don't run;
+    the identity cache entries of changed subscribers are evicted here.
+    Returns the number of subscribers updated.
+    """
+    from .middleware import subscriber_cache_key
+    from .models import PlatformProfile, Subscriber
+    rows = PlatformProfile.objects.values_list('subscriber_id', 'platform_name', *SCORE_FIELDS)
+    scores = compute_combined_scores(rows.iterator(chunk_size=SCORE_BATCH_SIZE))
+
+    changed = []
+    updated = 0
+
+    def write(batch):
+        Subscriber.objects.bulk_update(batch, ['combined_score'])
+        # cached subscribers are whole instances; a later save() would write the old score back
+        cache.delete_many([subscriber_cache_key(s.email) for s in batch])
+
+    with metrics.DB_WRITE_SECONDS.labels('combined_score').time():
+        rows = Subscriber.objects.values_list('id', 'email', 'combined_score')
+        for subscriber_id, email, current in rows.iterator(chunk_size=SCORE_BATCH_SIZE):
+            score = scores.get(subscriber_id)
+            if score != current:
+                changed.append(Subscriber(id=subscriber_id, email=email, combined_score=score))
+            if len(changed) >= SCORE_BATCH_SIZE:
+                write(changed)
+                updated += len(changed)
+                changed = []
+        if changed:
+            write(changed)
+            updated += len(changed)
+    logger.info(f"recompute_combined_scores: updated {updated} of {len(scores)} scored subscribers")
+    return updated
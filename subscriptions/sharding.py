@@ -0,0 +1,121 @@
+"""
+Sharded leaderboard ingestion.
+
+A shard `i/n` covers the profiles with `id % n == i`, so separately
+scheduled jobs (or nodes) running `fetch_leaderboard --shard i/n` for every
+i cover each profile exactly once. `run_sharded_fetch` is the local
+coordinator: it runs all shards in a process pool, each recorded as a child
+FetchRun, then merges their counters into the parent run and rescores once.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+from django.utils import timezone
+
+from .fetch_runs import RUN_STAT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# FetchRun counter columns summed across shards
+SHARD_SUM_FIELDS = (
+    'profiles_attempted', 'profiles_changed', 'profiles_unchanged', 'profiles_failed',
+    'profiles_carried_over', 'profiles_skipped', 'retries', 'bytes_downloaded', 'db_write_seconds',
+)
+
+
+def parse_shard(value):
+    """Parse "i/n" into `(i, n)` with `0 <= i < n`; raises ValueError otherwise."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except (AttributeError, ValueError):
+        raise ValueError(f"shard must look like i/n, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard index must be in 0..{count - 1}, got {value!r}")
+    return index, count
+
+
+def is_last_shard(shard):
+    """Whether a standalone run of `shard` should rescore: unsharded runs and shard n-1/n.
+
+    Independently scheduled shards don't know when the others finish, so
+    schedule n-1/n last; its rescore then covers every shard.
+    """
+    return shard is None or shard[0] == shard[1] - 1
+
+
+def merge_platform_stats(runs):
+    merged = {}
+    for run in runs:
+        for platform_name, counts in run.platform_stats.items():
+            totals = merged.setdefault(platform_name, dict.fromkeys(RUN_STAT_FIELDS, 0))
+            for field, n in counts.items():
+                totals[field] = totals.get(field, 0) + n
+    return merged
+
+
+def merge_shard_runs(run, failed=False):
+    """Fold the child runs' counters into the coordinating `run` and finish it."""
+    shards = list(run.shards.all())
+    for field in SHARD_SUM_FIELDS:
+        setattr(run, field, sum(getattr(shard, field) for shard in shards))
+    run.platform_stats = merge_platform_stats(shards)
+    failed = failed or any(shard.status != 'Completed' for shard in shards)
+    run.status = 'Failed' if failed else 'Completed'
+    run.finished_at = timezone.now()
+    run.save()
+    return run
+
+
+def _init_worker():
+    # needed under the "spawn" start method; a no-op for forked workers
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SkillTracker.settings')
+    import django
+    django.setup()
+
+
+def _run_shard(index, count, budget, trigger, parent_id):
+    from .tasks import fetch_leaderboard_data
+    try:
+        return fetch_leaderboard_data(
+            budget=budget, trigger=trigger, shard=(index, count), parent_id=parent_id, rescore=False,
+        )
+    finally:
+        connections.close_all()
+
+
+def run_sharded_fetch(shards, processes=None, budget=None, trigger='manual'):
+    """Fetch all profiles as `shards` shards in a pool of `processes` (default: one per shard).
+
+    Returns the merged summary plus each shard's own summary.
+    """
+    from .models import FetchRun
+    from .scoring import recompute_combined_scores
+
+    run = FetchRun.objects.create(trigger=trigger, budget=budget, shard=f'*/{shards}')
+    logger.info(f"run_sharded_fetch: run {run.id}, {shards} shards on {processes or shards} processes")
+    # forked workers must not share the parent's DB connections
+    connections.close_all()
+
+    summaries = []
+    failed = False
+    with ProcessPoolExecutor(max_workers=processes or shards, initializer=_init_worker) as pool:
+        futures = [pool.submit(_run_shard, index, shards, budget, trigger, run.id) for index in range(shards)]
+        for index, future in enumerate(futures):
+            try:
+                summaries.append({'shard': f'{index}/{shards}', **future.result()})
+            except Exception as e:
+                logger.error(f"run_sharded_fetch: shard {index}/{shards} failed - {e}", exc_info=True)
+                failed = True
+
+    merge_shard_runs(run, failed)
+    recompute_combined_scores()
+    logger.info(f"run_sharded_fetch: run {run.id} {run.status}")
+    return {
+        'processed': sum(s['processed'] for s in summaries),
+        'carried_over': sum(s['carried_over'] for s in summaries),
+        'run_id': run.id,
+        'shards': summaries,
+    }
@@ -0,0 +1,68 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import groups
+from .middleware import invalidate_subscriber_cache
+from .models import PlatformProfile, Subscriber
+
+
+@receiver(post_save, sender=Subscriber)
+@receiver(post_delete, sender=Subscriber)
+def subscriber_changed(sender, instance, **kwargs):
+    """Keep the identity cache coherent with group changes and unsubscribes."""
+    invalidate_subscriber_cache(instance.email)
+
+
+# Group aggregates are updated from the difference between the state a row
+# was loaded with and the state it is saved with. __dict__ is read directly
+# so deferred fields are not loaded.
+
+@receiver(post_init, sender=Subscriber)
+def remember_subscriber_group(sender, instance, **kwargs):
+    instance._loaded_group = instance.__dict__.get('group')
+
+
+@receiver(post_save, sender=Subscriber)
+def subscriber_group_changed(sender, instance, created, **kwargs):
+    if groups.is_suspended():
+        return
+    old_group = None if created else instance._loaded_group
+    groups.apply_membership_change(instance.id, old_group, instance.group)
+    instance._loaded_group = instance.group
+
+
+@receiver(post_delete, sender=Subscriber)
+def subscriber_left_group(sender, instance, **kwargs):
+    # its profiles were already removed from the aggregates (profile post_delete)
+    if groups.is_suspended() or not instance.group:
+        return
+    groups.remove_member(instance.group)
+
+
+def _profile_group(profile):
+    if PlatformProfile.subscriber.is_cached(profile):
+        return profile.subscriber.group
+    return Subscriber.objects.filter(id=profile.subscriber_id).values_list('group', flat=True).first()
+
+
+@receiver(post_init, sender=PlatformProfile)
+def remember_profile_stats(sender, instance, **kwargs):
+    instance._loaded_stats = (instance.__dict__.get('last_rating'), instance.__dict__.get('problems_solved'))
+
+
+@receiver(post_save, sender=PlatformProfile)
+def profile_stats_changed(sender, instance, created, **kwargs):
+    new = (instance.last_rating, instance.problems_solved)
+    old = None if created else instance._loaded_stats
+    instance._loaded_stats = new
+    if groups.is_suspended() or old == new:
+        return
+    groups.apply_profile_change(_profile_group(instance), instance.platform_name, instance.id, old, new)
+
+
+@receiver(post_delete, sender=PlatformProfile)
+def profile_removed(sender, instance, **kwargs):
+    if groups.is_suspended():
+        return
+    old = (instance.last_rating, instance.problems_solved)
+    groups.apply_profile_change(_profile_group(instance), instance.platform_name, instance.id, old, None)
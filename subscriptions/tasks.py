@@ -1,11 +1,21 @@
 from django.core.mail import send_mail
 from bs4 import BeautifulSoup
-from .models import Subscriber, PlatformProfile, WeeklySnapshot
+from .models import FetchRun, Subscriber, PlatformProfile, WeeklySnapshot
+from . import circuit_breaker, fetch_runs, metrics
+from . import groups
+from .scoring import recompute_combined_scores
 import requests
 import logging
 from django.conf import settings
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import Mod, RowNumber
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+import contextvars
 import time
+from datetime import timedelta
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,36 +23,232 @@ logger = logging.getLogger(__name__)
 
 MAX_EMAIL_WORKERS = 4 # to avoid hitting email provider limits
 MAX_FETCH_WORKERS = 10   # safe for Codeforces/LeetCode/CodeChef
+CODEFORCES_MAX_REQUESTS = 4  # Codeforces API calls in flight at once, across every caller in the process
 MAX_RETRIES = 3
 RETRY_BACKOFF = 2  # exponential backoff multiplier
+REQUEST_TIMEOUT = 10  # per-request timeout (seconds) when there is time to spare
+FETCH_RUN_BUDGET = 70  # default trigger-leaderboard budget; below the 80 s client timeout
+FETCH_QUEUE_SIZE = MAX_FETCH_WORKERS * 4  # profiles queued or in flight at once
+FETCH_READ_BATCH_SIZE = 500  # profiles read per query
+FETCH_WRITE_BATCH_SIZE = 100  # fetch results per bulk_update/commit; keeps the write lock short
+LEADERBOARD_WRITE_FIELDS = [
+    'last_rating', 'problems_solved', 'contests_attended', 'updated_at',
+    'fetch_status', 'consecutive_failures', 'last_success_at', 'next_fetch_at',
+]
+# owned by the contest ingestion when ratings come from contests (see contests.py)
+CONTEST_RATING_FIELDS = ('last_rating', 'contests_attended')
+
+# Read-through cache of upstream fetch results.
+# Freshness budget (seconds) per caller; 0 means always fetch but still
+# write the result through so other callers can reuse it.
+FETCH_CACHE_MAX_AGE = {
+    'leaderboard': 0,
+    'refresh_profile': 60,
+    'signup': 300,
+    'report_email': 60 * 60,
+}
+FETCH_CACHE_DEFAULT_MAX_AGE = 300
+FETCH_CACHE_STALE_TTL = 60 * 60 * 24  # how long entries are kept for stale-if-error
+
+# Per-profile backoff after failed fetches. Transient failures are retried
+# on the next run; from FETCH_BACKOFF_AFTER consecutive failures (or at once
+# for "User not found") the profile waits FETCH_BACKOFF_BASE, doubling per
+# further failure up to FETCH_BACKOFF_MAX.
+FETCH_BACKOFF_AFTER = 2
+FETCH_BACKOFF_BASE = 60 * 60
+FETCH_BACKOFF_MAX = 60 * 60 * 24 * 7
+
+class DeadlineExceeded(Exception):
+    """The fetch run's time budget ran out before this fetch could finish."""
+
+
+def _request_timeout(deadline):
+    """Per-request timeout, scaled down to the time left before `deadline`.
+
+    `deadline` is a `time.monotonic()` value or None for no deadline.
+    """
+    if deadline is None:
+        return REQUEST_TIMEOUT
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded()
+    return min(REQUEST_TIMEOUT, remaining)
+
+
+def _check_retry_budget(deadline, backoff_time):
+    """Raise DeadlineExceeded if backing off would leave no time to retry."""
+    if deadline is not None and time.monotonic() + backoff_time >= deadline:
+        raise DeadlineExceeded()
+
 
 def _is_all_na(data):
     """Check if all values in data dict are 'N/A'."""
     return all(v == 'N/A' for v in data.values())
 
-def _fetch_single_profile(profile):
+
+def merge_partial_data(data, fallback):
+    """Fill fields a fetcher could not load (None) from `fallback`.
+
+    Fields still missing afterwards are set to 'N/A'.
+    """
+    merged = {}
+    for field, value in data.items():
+        if value is None:
+            value = fallback.get(field) if fallback else None
+        merged[field] = 'N/A' if value is None else value
+    return merged
+
+
+def fetch_outcome(data):
+    """Classify fetcher output as 'success', 'not_found' or 'failed'."""
+    if data is None or _is_all_na(data):
+        return 'failed'
+    if data.get('problems_solved') == 'User not found':
+        return 'not_found'
+    return 'success'
+
+
+def fetch_status_fields(consecutive_failures, outcome, now=None):
+    """PlatformProfile status fields to save after a fetch with `outcome`."""
+    now = now or timezone.now()
+    if outcome == 'success':
+        return {'fetch_status': 'Success', 'consecutive_failures': 0, 'last_success_at': now, 'next_fetch_at': None}
+    failures = consecutive_failures + 1
+    if outcome == 'not_found':
+        failures = max(failures, FETCH_BACKOFF_AFTER)
+    next_fetch_at = None
+    if failures >= FETCH_BACKOFF_AFTER:
+        delay = min(FETCH_BACKOFF_BASE * 2 ** (failures - FETCH_BACKOFF_AFTER), FETCH_BACKOFF_MAX)
+        next_fetch_at = now + timedelta(seconds=delay)
+    return {'fetch_status': 'Failed', 'consecutive_failures': failures, 'next_fetch_at': next_fetch_at}
+
+
+def ratings_from_contests(platform_name):
+    """True if the platform's ratings and contest counts come from the contest ingestion, not the leaderboard fetch."""
+    return platform_name == 'Codeforces' and settings.CODEFORCES_CONTEST_RATINGS
+
+
+def _platform_fetcher(platform_name):
+    """Return the upstream fetch function for a platform (or None)."""
+    return {
+        'LeetCode': fetch_leetcode_data,
+        'Codeforces': fetch_codeforces_data,
+        'CodeChef': fetch_codechef_data,
+    }.get(platform_name)
+
+
+def _fetch_cache_key(platform_name, username):
+    return f"fetch_cache:{platform_name}:{username.lower()}"
+
+
+def _record_fetch_cache_stat(caller, outcome):
+    """Increment a per-caller hit/miss/stale counter shared across workers."""
+    metrics.FETCH_CACHE.labels(caller, outcome).inc()
+    key = f"fetch_cache_stats:{caller}:{outcome}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_fetch_cache_stats(caller):
+    """Return `{'hit': n, 'miss': n, 'stale': n}` for one caller."""
+    keys = {outcome: f"fetch_cache_stats:{caller}:{outcome}" for outcome in ('hit', 'miss', 'stale')}
+    values = cache.get_many(list(keys.values()))
+    return {outcome: values.get(key, 0) for outcome, key in keys.items()}
+
+
+def get_platform_data(platform_name, username, caller='default', max_age=None, stale_if_error=False, deadline=None, fetch_options=None):
+    """Read-through cache over the platform fetchers.
+
+    Returns cached data younger than `max_age` seconds (defaults to the
+    caller's budget in FETCH_CACHE_MAX_AGE), otherwise fetches from the
+    platform and stores the result. With `stale_if_error`, an older cached
+    value is served when the fetch fails (all N/A).
+    While the platform's circuit breaker is open the fetch is skipped and
+    treated as failed, so callers fall back without waiting on retries.
+    `deadline` is passed to the fetcher; DeadlineExceeded propagates.
+    `fetch_options` are extra keyword arguments for the fetcher.
+    Returns None for unknown platforms.
+    """
+    fetcher = _platform_fetcher(platform_name)
+    if fetcher is None:
+        return None
+
+    if max_age is None:
+        max_age = FETCH_CACHE_MAX_AGE.get(caller, FETCH_CACHE_DEFAULT_MAX_AGE)
+
+    key = _fetch_cache_key(platform_name, username)
+    entry = cache.get(key)
+    now = time.time()
+
+    if entry and now - entry['fetched_at'] <= max_age:
+        logger.debug(f"get_platform_data: cache hit {key} for {caller}")
+        _record_fetch_cache_stat(caller, 'hit')
+        return entry['data']
+
+    _record_fetch_cache_stat(caller, 'miss')
+    if circuit_breaker.allow_request(platform_name):
+        with metrics.FETCH_LATENCY.labels(platform_name).time():
+            data = fetcher(username, deadline=deadline, **(fetch_options or {}))
+        if _is_all_na(data):
+            metrics.FETCH_ERRORS.labels(platform_name, 'failed').inc()
+            circuit_breaker.record_failure(platform_name)
+        else:
+            circuit_breaker.record_success(platform_name)
+    else:
+        logger.warning(f"get_platform_data: {platform_name} circuit open, skipping fetch for {username}")
+        metrics.FETCH_ERRORS.labels(platform_name, 'circuit_open').inc()
+        data = {
+            'problems_solved': 'N/A',
+            'rating': 'N/A',
+            'contests': 'N/A'
+        }
+
+    if _is_all_na(data):
+        if stale_if_error and entry:
+            logger.warning(f"get_platform_data: {platform_name}/{username} fetch failed, serving stale data to {caller}")
+            _record_fetch_cache_stat(caller, 'stale')
+            return entry['data']
+        return data
+
+    if any(v is None for v in data.values()):
+        # Partial result: fill the parts that failed from the cached entry,
+        # but don't cache the merge. Re-stamping old fields as fresh would
+        # bring back values written since (e.g. ratings from a contest ingest).
+        return merge_partial_data(data, entry['data']) if entry else data
+
+    cache.set(key, {'data': data, 'fetched_at': now}, FETCH_CACHE_STALE_TTL)
+    return data
+
+def _fetch_single_profile(profile, deadline=None):
     """Fetch stats for one profile safely (runs inside thread).
     
     Falls back to existing profile stats if all retries fail.
+    Raises DeadlineExceeded if the run's budget is used up, so the profile
+    is left for the next run instead of being overwritten.
     """
     platform_name = profile.platform_name
     username = profile.username
     subscriber = profile.subscriber
 
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded()
+
     try:
-        if platform_name == 'LeetCode':
-            data = fetch_leetcode_data(username)
-        elif platform_name == 'Codeforces':
-            data = fetch_codeforces_data(username)
-        elif platform_name == 'CodeChef':
-            data = fetch_codechef_data(username)
-        else:
+        # ratings may come from the contest ingestion instead; see contests.py
+        fetch_options = {'ratings': False} if ratings_from_contests(platform_name) else None
+        data = get_platform_data(platform_name, username, caller='leaderboard', deadline=deadline, fetch_options=fetch_options)
+        if data is None:
             return None
 
-        # If all values are N/A (fetch failed), fallback to existing stats
-        if _is_all_na(data):
-            logger.warning(f"_fetch_single_profile: {platform_name}/{username} fetch failed, using existing stats")
+        # If the fetch failed or the handle is gone, fallback to existing stats
+        outcome = fetch_outcome(data)
+        if outcome != 'success':
+            logger.warning(f"_fetch_single_profile: {platform_name}/{username} fetch {outcome}, using existing stats")
             return {
+                "outcome": outcome,
                 "subscriber": subscriber,
                 "platform_name": platform_name,
                 "username": username,
@@ -51,6 +257,16 @@ def _fetch_single_profile(profile):
                 "contests": profile.contests_attended,
             }
 
+        # Keep existing values for fields the fetcher could not load
+        data = merge_partial_data(data, {
+            'rating': profile.last_rating,
+            'problems_solved': profile.problems_solved,
+            'contests': profile.contests_attended,
+        })
+        if ratings_from_contests(platform_name):
+            # not written back (see _ProfileWriter); keep the stats honest
+            data['rating'], data['contests'] = profile.last_rating, profile.contests_attended
+
         problems_solved = data.get('problems_solved', 'N/A')
         rating = data.get('rating', 'N/A')
         contests = data.get('contests', 'N/A')
@@ -60,6 +276,7 @@ def _fetch_single_profile(profile):
         contests = -1 if contests == 'N/A' else contests
 
         return {
+            "outcome": 'success',
             "subscriber": subscriber,
             "platform_name": platform_name,
             "username": username,
@@ -68,10 +285,13 @@ def _fetch_single_profile(profile):
             "contests": contests,
         }
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"_fetch_single_profile {platform_name}/{username}: {e}", exc_info=True)
         # Fallback to existing stats on exception
         return {
+            "outcome": 'failed',
             "subscriber": subscriber,
             "platform_name": platform_name,
             "username": username,
@@ -80,47 +300,224 @@ def _fetch_single_profile(profile):
             "contests": profile.contests_attended,
         }
 
-def fetch_leaderboard_data():
-    """Parallel version — fetches all profiles concurrently."""
-    logger.info("fetch_leaderboard_data: starting PARALLEL fetch")
-
-    profiles = list(PlatformProfile.objects.select_related('subscriber'))
-    logger.info(f"fetch_leaderboard_data: {len(profiles)} profiles queued")
-
-    results = []
-
-    # ---- PARALLEL NETWORK CALLS ----
-    with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
-        future_map = {executor.submit(_fetch_single_profile, p): p for p in profiles}
+def fetch_leaderboard_data(budget=None, trigger='manual', shard=None, parent_id=None, rescore=True, platforms=None):
+    """Parallel version — fetches all profiles concurrently.
+
+    `budget` is an optional run time limit in seconds. Per-request timeouts
+    shrink to the time left and no new fetches start once it runs out.
+    Profiles are processed least recently updated first, so the ones left
+    over are first in line on the next run.
+    Results are written in batches of FETCH_WRITE_BATCH_SIZE as the run goes.
+    `shard=(i, n)` limits the run to profiles with `id % n == i` (see
+    `sharding.py`); `parent_id` links it to a coordinating run, which
+    passes `rescore=False` and rescores once after all shards finish.
+    `platforms` limits the run to those platforms' profiles.
+    Every call is recorded as a FetchRun tagged with `trigger`.
+    Returns `{'processed': n, 'carried_over': n, 'run_id': id}`.
+    """
+    shard_label = f"{shard[0]}/{shard[1]}" if shard else ''
+    logger.info(
+        f"fetch_leaderboard_data: starting PARALLEL fetch (budget={budget}, shard={shard_label or 'all'}, "
+        f"platforms={','.join(platforms) if platforms else 'all'})"
+    )
+    run = FetchRun.objects.create(trigger=trigger, budget=budget, shard=shard_label, parent_id=parent_id)
+    stats = fetch_runs.FetchRunStats()
+    try:
+        with fetch_runs.collecting(stats):
+            summary, db_write_seconds = _run_leaderboard_fetch(budget, stats, shard, rescore, platforms)
+    except Exception:
+        _finish_fetch_run(run, stats, 'Failed')
+        raise
+    _finish_fetch_run(run, stats, 'Completed', db_write_seconds)
+    logger.info(f"fetch_leaderboard_data: completed (run {run.id})")
+    return {**summary, 'run_id': run.id}
+
+
+class _ProfileWriter:
+    """Buffers fetch results and writes them back with one bulk_update per `batch_size` rows.
+
+    Each batch is its own transaction, so a run that dies midway keeps what
+    it already wrote. bulk_update skips the signal handlers, so group
+    aggregates are moved here, per changed profile, in the same transaction.
+    CONTEST_RATING_FIELDS are left alone on profiles whose ratings come from
+    the contest ingestion, which may have written them since the profile
+    was read. Runs on the caller's thread (the DB connection's).
+    """
 
-        for future in as_completed(future_map):
+    def __init__(self, now, batch_size=FETCH_WRITE_BATCH_SIZE):
+        self.now = now
+        self.batch_size = batch_size
+        self.pending = []
+        self.written = 0
+        self.seconds = 0.0
+
+    def add(self, profile, item):
+        self.pending.append((profile, item))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        started = time.perf_counter()
+        # failures while a platform's circuit is open say nothing about the handle
+        open_circuits = {
+            platform_name for platform_name, state in circuit_breaker.get_all_circuit_states().items()
+            if state['state'] != 'closed'
+        }
+        updated_at = timezone.now()
+        profiles = []
+        group_changes = []
+        for profile, item in self.pending:
+            old, new = (profile.last_rating, profile.problems_solved), (item["rating"], item["problems_solved"])
+            if old != new:
+                group_changes.append((profile.subscriber.group, profile.platform_name, profile.id, old, new))
+            profile.last_rating = item["rating"]
+            profile.problems_solved = item["problems_solved"]
+            profile.contests_attended = item["contests"]
+            profile.updated_at = updated_at
+            if not (item["outcome"] == 'failed' and profile.platform_name in open_circuits):
+                for field, value in fetch_status_fields(profile.consecutive_failures, item["outcome"], self.now).items():
+                    setattr(profile, field, value)
+            profiles.append(profile)
+        contest_rated = [p for p in profiles if ratings_from_contests(p.platform_name)]
+        fetched = [p for p in profiles if not ratings_from_contests(p.platform_name)]
+        with metrics.DB_WRITE_SECONDS.labels('leaderboard').time(), transaction.atomic():
+            if fetched:
+                PlatformProfile.objects.bulk_update(fetched, LEADERBOARD_WRITE_FIELDS)
+            if contest_rated:
+                PlatformProfile.objects.bulk_update(
+                    contest_rated, [f for f in LEADERBOARD_WRITE_FIELDS if f not in CONTEST_RATING_FIELDS],
+                )
+            for change in group_changes:
+                groups.apply_profile_change(*change)
+        self.written += len(profiles)
+        self.pending = []
+        self.seconds += time.perf_counter() - started
+
+
+def _iter_profiles(queryset, before, batch_size):
+    """Yield `queryset`'s profiles last updated before `before`, oldest first, `batch_size` per query.
+
+    Keyset pages rather than `.iterator()`: a cursor left open for the
+    whole run would hold a read transaction, which on SQLite keeps this
+    connection (and, without WAL, everyone else) from committing.
+    Profiles written during the run get a newer updated_at and drop out.
+    """
+    queryset = queryset.filter(updated_at__lt=before).order_by('updated_at', 'id')
+    page = list(queryset[:batch_size])
+    while page:
+        last_updated_at, last_id = page[-1].updated_at, page[-1].id
+        yield from page
+        page = list(queryset.filter(
+            Q(updated_at__gt=last_updated_at) | Q(updated_at=last_updated_at, id__gt=last_id)
+        )[:batch_size])
+
+
+def _run_leaderboard_fetch(budget, stats, shard=None, rescore=True, platforms=None):
+    """Stream profiles through the fetch pool into batched writes.
+
+    Profiles are read in pages, at most FETCH_QUEUE_SIZE fetches are in
+    flight, and results go to a `_ProfileWriter` as they complete, so
+    memory stays flat however many profiles there are.
+    """
+    deadline = time.monotonic() + budget if budget else None
+    now = timezone.now()
+
+    queryset = PlatformProfile.objects.all()
+    if shard:
+        index, count = shard
+        queryset = queryset.alias(shard_key=Mod('id', count)).filter(shard_key=index)
+    if platforms:
+        queryset = queryset.filter(platform_name__in=platforms)
+
+    # profiles backing off after failures sit this run out
+    backing_off = Q(next_fetch_at__gt=now)
+    for row in queryset.filter(backing_off).values('platform_name').annotate(n=Count('id')):
+        stats.add(row['platform_name'], 'skipped', row['n'])
+    profiles = _iter_profiles(queryset.select_related('subscriber').exclude(backing_off), now, FETCH_READ_BATCH_SIZE)
+
+    writer = _ProfileWriter(now, FETCH_WRITE_BATCH_SIZE)
+    processed = 0
+    carried_over = 0
+
+    def collect(future, profile):
+        nonlocal processed, carried_over
+        try:
             data = future.result()
-            if data:
-                results.append(data)
-
-    logger.info(f"fetch_leaderboard_data: fetched {len(results)} profiles, updating DB")
-
-    # ---- DB WRITES (sequential, safe) ----
-    for item in results:
-        PlatformProfile.objects.update_or_create(
-            subscriber=item["subscriber"],
-            platform_name=item["platform_name"],
-            defaults={
-                "username": item["username"],
-                "last_rating": item["rating"],
-                "problems_solved": item["problems_solved"],
-                "contests_attended": item["contests"],
-            }
-        )
-
-    logger.info("fetch_leaderboard_data: completed")
-    return results
-
+        except DeadlineExceeded:
+            carried_over += 1
+            stats.add(profile.platform_name, 'carried_over')
+            metrics.FETCH_ERRORS.labels(profile.platform_name, 'deadline').inc()
+            return
+        stats.add(profile.platform_name, 'attempted')
+        if not data:
+            stats.add(profile.platform_name, 'failed')
+            return
+        if data['outcome'] != 'success':
+            stats.add(profile.platform_name, 'failed')
+        elif (data['rating'], data['problems_solved'], data['contests']) != (profile.last_rating, profile.problems_solved, profile.contests_attended):
+            stats.add(profile.platform_name, 'changed')
+        else:
+            stats.add(profile.platform_name, 'unchanged')
+        processed += 1
+        writer.add(profile, data)
 
-def fetch_leetcode_data(username):
+    # ---- PARALLEL NETWORK CALLS, BOUNDED ----
+    with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+        in_flight = {}
+        for profile in profiles:
+            if deadline is not None and time.monotonic() >= deadline:
+                # no point queueing fetches that would give up at once
+                carried_over += 1
+                stats.add(profile.platform_name, 'carried_over')
+                metrics.FETCH_ERRORS.labels(profile.platform_name, 'deadline').inc()
+                continue
+            while len(in_flight) >= FETCH_QUEUE_SIZE:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future, in_flight.pop(future))
+            # each task gets its own copy of the context so fetchers can report to `stats`
+            future = executor.submit(contextvars.copy_context().run, _fetch_single_profile, profile, deadline)
+            in_flight[future] = profile
+        for future in as_completed(in_flight):
+            collect(future, in_flight[future])
+    writer.flush()
+
+    if carried_over:
+        logger.warning(f"fetch_leaderboard_data: budget exhausted, {carried_over} profiles carried over to next run")
+    logger.info(f"fetch_leaderboard_data: wrote {writer.written} profiles")
+
+    write_started = time.perf_counter()
+    # normalization is relative to every profile, so rescore once per run
+    if rescore:
+        with metrics.DB_WRITE_SECONDS.labels('leaderboard').time():
+            recompute_combined_scores()
+
+    return {'processed': processed, 'carried_over': carried_over}, writer.seconds + time.perf_counter() - write_started
+
+
+def _finish_fetch_run(run, stats, status, db_write_seconds=0.0):
+    totals = stats.totals()
+    run.status = status
+    run.finished_at = timezone.now()
+    run.profiles_attempted = totals['attempted']
+    run.profiles_changed = totals['changed']
+    run.profiles_unchanged = totals['unchanged']
+    run.profiles_failed = totals['failed']
+    run.profiles_carried_over = totals['carried_over']
+    run.profiles_skipped = totals['skipped']
+    run.retries = totals['retries']
+    run.bytes_downloaded = totals['bytes']
+    run.db_write_seconds = db_write_seconds
+    run.platform_stats = stats.platforms
+    run.save()
+
+
+def fetch_leetcode_data(username, deadline=None):
     """Fetch data from LeetCode API with retry logic."""
     logger.debug(f"fetch_leetcode_data: requesting {username}")
-    url = "https://leetcode.com/graphql"
+    url = f"{settings.LEETCODE_BASE_URL}/graphql"
     query = f"""
     {{
         matchedUser(username: "{username}") {{
@@ -142,7 +539,8 @@ def fetch_leetcode_data(username):
     for attempt in range(1, MAX_RETRIES + 1):
         try:
             logger.debug(f"fetch_leetcode_data: attempt {attempt}/{MAX_RETRIES} for {username}")
-            response = requests.post(url, json=payload, timeout=10)
+            response = requests.post(url, json=payload, timeout=_request_timeout(deadline))
+            fetch_runs.record('LeetCode', 'bytes', len(response.content))
             response.raise_for_status()
             json_response = response.json()
 
@@ -177,10 +575,15 @@ def fetch_leetcode_data(username):
                 'contests': contests_attended
             }
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             if attempt < MAX_RETRIES:
                 backoff_time = (RETRY_BACKOFF ** (attempt - 1))
+                _check_retry_budget(deadline, backoff_time)
                 logger.warning(f"fetch_leetcode_data: attempt {attempt} failed for {username}, retrying in {backoff_time}s - {str(e)}")
+                metrics.FETCH_RETRIES.labels('LeetCode').inc()
+                fetch_runs.record('LeetCode', 'retries')
                 time.sleep(backoff_time)
             else:
                 logger.error(f"fetch_leetcode_data: all {MAX_RETRIES} attempts failed for {username}: {e}", exc_info=True)
@@ -192,89 +595,132 @@ def fetch_leetcode_data(username):
                 }
 
 
-def fetch_codeforces_data(username):
-    """Fetch data from Codeforces API with retry logic."""
-    logger.debug(f"fetch_codeforces_data: requesting {username}")
-    user_info_url = f"https://codeforces.com/api/user.info?handles={username}"
-    user_status_url = f"https://codeforces.com/api/user.status?handle={username}"
-    user_rating_url = f"https://codeforces.com/api/user.rating?handle={username}"
-    
+def _fetch_codeforces_endpoint(url, username, endpoint, deadline=None):
+    """GET one Codeforces API endpoint with its own retry loop.
+
+    Returns the decoded JSON, or None if every attempt failed. Unknown
+    handles come back as HTTP 400 with status FAILED; that body is returned
+    as-is instead of being retried.
+    """
     for attempt in range(1, MAX_RETRIES + 1):
         try:
-            logger.debug(f"fetch_codeforces_data: attempt {attempt}/{MAX_RETRIES} for {username}")
-            # Fetch user info
-            user_info_response = requests.get(user_info_url, timeout=10)
-            user_info_response.raise_for_status()
-            user_info = user_info_response.json()
-
-            if user_info['status'] != 'OK' or not user_info.get('result'):
-                logger.warning(f"fetch_codeforces_data: user {username} not found")
-                return {
-                    'problems_solved': 'User not found',
-                    'rating': 'N/A',
-                    'contests': 'N/A'
-                }
-            
-            # Extract rating
-            rating = user_info['result'][0].get('rating', 'N/A')
-            logger.debug(f"fetch_codeforces_data: {username} rating = {rating}")
-
-            # Fetch user submissions to calculate problems solved
-            user_status_response = requests.get(user_status_url, timeout=10)
-            user_status_response.raise_for_status()
-            user_status = user_status_response.json()
-
-            if user_status['status'] == 'OK':
-                # Filter submissions with 'verdict' = 'OK' (correct solutions)
-                solved_problems = set()
-                for submission in user_status['result']:
-                    if submission.get('verdict') == 'OK':
-                        problem = submission['problem']
-                        problem_id = f"{problem.get('contestId', '')}_{problem.get('index', '')}"
-                        solved_problems.add(problem_id)
-                problems_solved = len(solved_problems)
-                logger.debug(f"fetch_codeforces_data: {username} problems_solved = {problems_solved}")
-            else:
-                logger.warning(f"fetch_codeforces_data: failed to fetch submissions for {username}")
-                problems_solved = 'N/A'
-
-            # Fetch user contests to calculate total contests attended
-            user_rating_response = requests.get(user_rating_url, timeout=10)
-            user_rating_response.raise_for_status()
-            user_rating = user_rating_response.json()
-
-            if user_rating['status'] == 'OK':
-                contests_attended = len(user_rating['result'])
-                logger.debug(f"fetch_codeforces_data: {username} contests_attended = {contests_attended}")
-            else:
-                logger.warning(f"fetch_codeforces_data: failed to fetch contests for {username}")
-                contests_attended = 'N/A'
-
-            logger.debug(f"fetch_codeforces_data: {username} success")
-            return {
-                'problems_solved': problems_solved,
-                'rating': rating,
-                'contests': contests_attended
-            }
-
+            logger.debug(f"fetch_codeforces_data: {endpoint} attempt {attempt}/{MAX_RETRIES} for {username}")
+            response = requests.get(url, timeout=_request_timeout(deadline))
+            fetch_runs.record('Codeforces', 'bytes', len(response.content))
+            if response.status_code != 400:
+                response.raise_for_status()
+            return response.json()
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             if attempt < MAX_RETRIES:
                 backoff_time = (RETRY_BACKOFF ** (attempt - 1))
-                logger.warning(f"fetch_codeforces_data: attempt {attempt} failed for {username}, retrying in {backoff_time}s - {str(e)}")
+                _check_retry_budget(deadline, backoff_time)
+                logger.warning(f"fetch_codeforces_data: {endpoint} attempt {attempt} failed for {username}, retrying in {backoff_time}s - {str(e)}")
+                metrics.FETCH_RETRIES.labels('Codeforces').inc()
+                fetch_runs.record('Codeforces', 'retries')
                 time.sleep(backoff_time)
             else:
-                logger.error(f"fetch_codeforces_data: all {MAX_RETRIES} attempts failed for {username}: {e}", exc_info=True)
-                # Return all N/A to signal fallback to existing stats
-                return {
-                    'problems_solved': 'N/A',
-                    'rating': 'N/A',
-                    'contests': 'N/A'
-                }
+                logger.error(f"fetch_codeforces_data: all {MAX_RETRIES} {endpoint} attempts failed for {username}: {e}", exc_info=True)
+                return None
+
 
-def fetch_codechef_data(username):
+# shared by every fetch_codeforces_data call, so its size caps the process's
+# concurrent Codeforces requests (the API allows roughly one call per 2 s)
+_codeforces_executor = ThreadPoolExecutor(max_workers=CODEFORCES_MAX_REQUESTS, thread_name_prefix='codeforces')
+
+
+def fetch_codeforces_data(username, deadline=None, ratings=True):
+    """Fetch data from Codeforces API with retry logic.
+
+    `user.info`, `user.status` and `user.rating` are requested concurrently
+    on a shared pool of CODEFORCES_MAX_REQUESTS threads and retried
+    independently. If only some of them fail, the fields they
+    provide are returned as None so callers can keep the previous values
+    (see `merge_partial_data`); if all fail, every field is 'N/A'.
+    With `ratings=False` only `user.status` is requested and rating and
+    contests come back as None; they are kept current by the contest
+    ingestion instead (`contests.py`).
+    """
+    logger.debug(f"fetch_codeforces_data: requesting {username}")
+    endpoints = {
+        'user.info': f"{settings.CODEFORCES_BASE_URL}/api/user.info?handles={username}",
+        'user.status': f"{settings.CODEFORCES_BASE_URL}/api/user.status?handle={username}",
+        'user.rating': f"{settings.CODEFORCES_BASE_URL}/api/user.rating?handle={username}",
+    }
+    if not ratings:
+        endpoints = {'user.status': endpoints['user.status']}
+
+    futures = {
+        endpoint: _codeforces_executor.submit(contextvars.copy_context().run, _fetch_codeforces_endpoint, url, username, endpoint, deadline)
+        for endpoint, url in endpoints.items()
+    }
+    responses = {endpoint: future.result() for endpoint, future in futures.items()}
+
+    if all(r is None for r in responses.values()):
+        # Return all N/A to signal fallback to existing stats
+        return {
+            'problems_solved': 'N/A',
+            'rating': 'N/A',
+            'contests': 'N/A'
+        }
+
+    user_info = responses.get('user.info')
+    user_status = responses['user.status']
+    if not ratings and user_status is not None and 'not found' in user_status.get('comment', ''):
+        user_info = user_status
+    if user_info is not None and (user_info.get('status') != 'OK' or not user_info.get('result')):
+        logger.warning(f"fetch_codeforces_data: user {username} not found")
+        return {
+            'problems_solved': 'User not found',
+            'rating': 'N/A',
+            'contests': 'N/A'
+        }
+
+    # Extract rating
+    rating = None
+    if user_info is not None:
+        rating = user_info['result'][0].get('rating', 'N/A')
+        logger.debug(f"fetch_codeforces_data: {username} rating = {rating}")
+
+    # Calculate problems solved from submissions with verdict OK
+    problems_solved = None
+    if user_status is not None:
+        if user_status.get('status') == 'OK':
+            solved_problems = set()
+            for submission in user_status['result']:
+                if submission.get('verdict') == 'OK':
+                    problem = submission['problem']
+                    problem_id = f"{problem.get('contestId', '')}_{problem.get('index', '')}"
+                    solved_problems.add(problem_id)
+            problems_solved = len(solved_problems)
+            logger.debug(f"fetch_codeforces_data: {username} problems_solved = {problems_solved}")
+        else:
+            logger.warning(f"fetch_codeforces_data: failed to fetch submissions for {username}")
+            problems_solved = 'N/A'
+
+    # Total contests attended from the rating history
+    contests_attended = None
+    user_rating = responses.get('user.rating')
+    if user_rating is not None:
+        if user_rating.get('status') == 'OK':
+            contests_attended = len(user_rating['result'])
+            logger.debug(f"fetch_codeforces_data: {username} contests_attended = {contests_attended}")
+        else:
+            logger.warning(f"fetch_codeforces_data: failed to fetch contests for {username}")
+            contests_attended = 'N/A'
+
+    logger.debug(f"fetch_codeforces_data: {username} success")
+    return {
+        'problems_solved': problems_solved,
+        'rating': rating,
+        'contests': contests_attended
+    }
+
+def fetch_codechef_data(username, deadline=None):
     """Fetch data from CodeChef by scraping with retry logic."""
     logger.debug(f"fetch_codechef_data: requesting {username}")
-    url = f"https://www.codechef.com/users/{username}"
+    url = f"{settings.CODECHEF_BASE_URL}/users/{username}"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                       "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -286,16 +732,17 @@ def fetch_codechef_data(username):
     for attempt in range(1, MAX_RETRIES + 1):
         try:
             logger.debug(f"fetch_codechef_data: attempt {attempt}/{MAX_RETRIES} for {username}")
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
+            response = requests.get(url, headers=headers, timeout=_request_timeout(deadline))
+            fetch_runs.record('CodeChef', 'bytes', len(response.content))
 
-            if response.url == "https://www.codechef.com/":
+            if response.status_code == 404 or response.url == f"{settings.CODECHEF_BASE_URL}/":
                 logger.warning(f"fetch_codechef_data: user {username} not found")
                 return {
                     'problems_solved': 'User not found',
                     'rating': 'N/A',
                     'contests': 'N/A'
                 }
+            response.raise_for_status()
 
             soup = BeautifulSoup(response.text, 'html.parser')
             problems_section = soup.find('section', class_='rating-data-section problems-solved')
@@ -317,10 +764,15 @@ def fetch_codechef_data(username):
                 'rating': rating or 'N/A',
                 'contests': total_contests_attended or 'N/A',
             }
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             if attempt < MAX_RETRIES:
                 backoff_time = (RETRY_BACKOFF ** (attempt - 1))
+                _check_retry_budget(deadline, backoff_time)
                 logger.warning(f"fetch_codechef_data: attempt {attempt} failed for {username}, retrying in {backoff_time}s - {str(e)}")
+                metrics.FETCH_RETRIES.labels('CodeChef').inc()
+                fetch_runs.record('CodeChef', 'retries')
                 time.sleep(backoff_time)
             else:
                 logger.error(f"fetch_codechef_data: all {MAX_RETRIES} attempts failed for {username}: {e}", exc_info=True)
@@ -352,13 +804,10 @@ def send_report_email(subscriber):
         username = profile.username
 
         try:
-            # Fetch data for each platform
-            if platform_name == 'LeetCode':
-                data = fetch_leetcode_data(username)
-            elif platform_name == 'Codeforces':
-                data = fetch_codeforces_data(username)
-            elif platform_name == 'CodeChef':
-                data = fetch_codechef_data(username)
+            # Fetch data for each platform, reusing recently fetched results
+            data = get_platform_data(platform_name, username, caller='report_email', stale_if_error=True)
+            if data is not None:
+                data = merge_partial_data(data, None)
             else:
                 data = {
                     'problems_solved': 'N/A',
@@ -400,19 +849,25 @@ def send_report_email(subscriber):
 
     # Send the email
     try:
-        send_mail(
-            email_subject,
-            email_body,
-            settings.DEFAULT_FROM_EMAIL,  # Your sending email
-            [subscriber.email],  # Recipient email
-            fail_silently=False,
-            html_message=email_body  # Use HTML format
-        )
+        with metrics.EMAIL_SEND_SECONDS.labels('daily_report').time():
+            send_mail(
+                email_subject,
+                email_body,
+                settings.DEFAULT_FROM_EMAIL,  # Your sending email
+                [subscriber.email],  # Recipient email
+                fail_silently=False,
+                html_message=email_body  # Use HTML format
+            )
+        metrics.EMAILS.labels('daily_report', 'sent').inc()
         logger.info(f"send_report_email: successfully sent to {subscriber.email}")
     except Exception as e:
+        metrics.EMAILS.labels('daily_report', 'failed').inc()
         logger.error(f"send_report_email: error sending email to {subscriber.email}: {str(e)}", exc_info=True)
 
 
+SNAPSHOT_BATCH_SIZE = 1000
+
+
 def record_weekly_stats():
     """Generate a weekly snapshot for every platform profile.
 
@@ -422,21 +877,35 @@ def record_weekly_stats():
     logger.info("record_weekly_stats: starting")
     # update all profiles with latest values first
     logger.info("record_weekly_stats: fetching latest leaderboard data")
-    fetch_leaderboard_data()
-
-    profiles = PlatformProfile.objects.all()
-    logger.info(f"record_weekly_stats: recording snapshots for {profiles.count()} profiles")
-    for profile in profiles:
-        WeeklySnapshot.objects.create(
-            profile=profile,
-            last_rating=profile.last_rating,
-            problems_solved=profile.problems_solved,
-            contests_attended=profile.contests_attended,
-        )
-        logger.debug(f"record_weekly_stats: snapshot created for {profile.subscriber.email}/{profile.platform_name}")
+    fetch_leaderboard_data(trigger='weekly')
+    record_weekly_snapshots()
     logger.info("record_weekly_stats: completed")
 
 
+def record_weekly_snapshots():
+    """Snapshot every profile's current stats, in batched inserts."""
+    profiles = PlatformProfile.objects.only('id', 'last_rating', 'problems_solved', 'contests_attended')
+    created = 0
+    with metrics.DB_WRITE_SECONDS.labels('weekly_snapshot').time():
+        batch = []
+        for profile in profiles.iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+            batch.append(WeeklySnapshot(
+                profile_id=profile.id,
+                last_rating=profile.last_rating,
+                problems_solved=profile.problems_solved,
+                contests_attended=profile.contests_attended,
+            ))
+            if len(batch) >= SNAPSHOT_BATCH_SIZE:
+                WeeklySnapshot.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            WeeklySnapshot.objects.bulk_create(batch)
+            created += len(batch)
+    logger.info(f"record_weekly_snapshots: recorded {created} snapshots")
+    return created
+
+
 def _compile_weekly_changes():
     """Return per-subscriber list of diffs and global totals.
 
@@ -448,16 +917,31 @@ def _compile_weekly_changes():
     total_problems = 0
     total_contests = 0
 
+    # the two latest snapshots of every profile, in one query
+    latest_snapshots = {}
+    snapshot_rows = (
+        WeeklySnapshot.objects
+        .annotate(recency=Window(RowNumber(), partition_by=F('profile_id'), order_by=(F('timestamp').desc(), F('id').desc())))
+        .filter(recency__lte=2)
+        .order_by('profile_id', 'recency')
+    )
+    for snap in snapshot_rows:
+        latest_snapshots.setdefault(snap.profile_id, []).append(snap)
+
+    profiles_by_subscriber = {}
+    for profile in PlatformProfile.objects.order_by('subscriber_id', 'id'):
+        profiles_by_subscriber.setdefault(profile.subscriber_id, []).append(profile)
+
     all_subscribers = list(Subscriber.objects.all())
     logger.info(f"_compile_weekly_changes: compiling changes for {len(all_subscribers)} subscribers")
 
     for subscriber in all_subscribers:
         diffs = []
-        profiles = list(subscriber.platform_profiles.all())
+        profiles = profiles_by_subscriber.get(subscriber.id, [])
         logger.debug(f"_compile_weekly_changes: {subscriber.email} has {len(profiles)} profiles")
         
         for profile in profiles:
-            snaps = list(profile.snapshots.order_by('-timestamp')[:2])
+            snaps = latest_snapshots.get(profile.id, [])
             if len(snaps) == 2:
                 current, previous = snaps[0], snaps[1]
                 problems = (current.problems_solved or 0) - (previous.problems_solved or 0)
@@ -504,16 +988,19 @@ def send_weekly_report_email(subscriber, diffs):
     email_body += '</ul><p>Keep up the good work!<br>SkillTracker</p></body></html>'
     try:
         logger.debug(f"send_weekly_report_email: sending email to {subscriber.email}")
-        send_mail(
-            email_subject,
-            email_body,
-            settings.DEFAULT_FROM_EMAIL,
-            [subscriber.email],
-            fail_silently=False,
-            html_message=email_body,
-        )
+        with metrics.EMAIL_SEND_SECONDS.labels('weekly_report').time():
+            send_mail(
+                email_subject,
+                email_body,
+                settings.DEFAULT_FROM_EMAIL,
+                [subscriber.email],
+                fail_silently=False,
+                html_message=email_body,
+            )
+        metrics.EMAILS.labels('weekly_report', 'sent').inc()
         logger.info(f"send_weekly_report_email: successfully sent to {subscriber.email}")
     except Exception as e:
+        metrics.EMAILS.labels('weekly_report', 'failed').inc()
         logger.error(f"send_weekly_report_email: error sending weekly email to {subscriber.email}: {e}", exc_info=True)
 
 
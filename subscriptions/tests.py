@@ -1,6 +1,50 @@
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.urls import reverse
-from .models import Subscriber, PlatformProfile, WeeklySnapshot
+from django.utils import timezone
+from .forms import PlatformProfileForm, SubscriberProfileForm
+from . import circuit_breaker, metrics, tasks
+from .middleware import get_cached_subscriber
+from .groups import rebuild_group_stats
+from .models import Contest, FetchRun, Group, GroupPlatformStats, Subscriber, PlatformProfile, WeeklySnapshot
+from .views import invalidate_leaderboard_cache
+from .datasets import clear_synthetic_dataset, generate_dataset
+from .scoring import compute_combined_scores, recompute_combined_scores
+from .sharding import is_last_shard, merge_shard_runs, parse_shard
+from .tasks import DeadlineExceeded, _compile_weekly_changes, _request_timeout, record_weekly_snapshots, fetch_codechef_data, fetch_codeforces_data, fetch_leaderboard_data, fetch_leetcode_data, get_platform_data, get_fetch_cache_stats, merge_partial_data
+from .loadtest import LoadResults, compare_to_baseline
+from .contests import ingest_codeforces_contests
+from .onboarding import import_subscribers, validate_handles
+from .scheduling import SCHEDULER_LOCK_TIMEOUT, plan_refresh, run_scheduled_refresh
+from .upstream_stub import start_stub_server, synthetic_codeforces_contests
+
+
+class StubServerMixin:
+    """Runs the upstream stub for each test, with every platform's base URL pointed at it."""
+
+    def setUp(self):
+        super().setUp()
+        self.server = start_stub_server()
+        self.addCleanup(self.server.shutdown)
+        url = self.server.base_url
+        settings_override = override_settings(LEETCODE_BASE_URL=url, CODEFORCES_BASE_URL=url, CODECHEF_BASE_URL=url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class SessionLoginMixin:
+    def login(self, email):
+        session = self.client.session
+        session['subscriber_email'] = email
+        session.save()
 
 
 class WeeklyUpdateTest(TestCase):
@@ -23,3 +67,894 @@ class WeeklyUpdateTest(TestCase):
         self.assertIn('weekly_processed', response.json().get('status', ''))
         # one snapshot should be created for the profile
         self.assertTrue(WeeklySnapshot.objects.filter(profile=prof).exists())
+
+
+class FetchCacheTest(TestCase):
+    """Read-through cache over the platform fetchers."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fresh_entry_is_served_from_cache(self):
+        data = {'problems_solved': 10, 'rating': 1500, 'contests': 2}
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value=data) as fetch:
+            self.assertEqual(get_platform_data('LeetCode', 'foo', caller='signup'), data)
+            self.assertEqual(get_platform_data('LeetCode', 'foo', caller='signup'), data)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(get_fetch_cache_stats('signup'), {'hit': 1, 'miss': 1, 'stale': 0})
+
+    def test_stale_entry_is_served_when_fetch_fails(self):
+        data = {'problems_solved': 10, 'rating': 1500, 'contests': 2}
+        failed = {'problems_solved': 'N/A', 'rating': 'N/A', 'contests': 'N/A'}
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value=data):
+            get_platform_data('LeetCode', 'foo', caller='leaderboard')
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value=failed):
+            self.assertEqual(get_platform_data('LeetCode', 'foo', caller='report_email', max_age=0, stale_if_error=True), data)
+            self.assertEqual(get_platform_data('LeetCode', 'foo', caller='refresh_profile', max_age=0), failed)
+
+
+class ValidateAndFetchTest(TestCase):
+    """Signup validation reuses the stats fetch as the existence check."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_subscribe_form_fetches_once(self):
+        data = {'problems_solved': 10, 'rating': 1500, 'contests': 2}
+        with patch('subscriptions.tasks.fetch_codeforces_data', return_value=data) as fetch:
+            form = SubscriberProfileForm({'email': 'a@example.com', 'platform_name': 'Codeforces', 'username': 'tourist'})
+            self.assertTrue(form.is_valid())
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(form.fetched_data, data)
+
+    def test_found_handle_is_not_counted_as_cache_hit(self):
+        hits = metrics.HANDLE_VALIDATION_CACHE.labels('LeetCode', 'hit')
+        before = hits._value.get()
+        data = {'problems_solved': 10, 'rating': 1500, 'contests': 2}
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value=data) as fetch:
+            for _ in range(2):
+                self.assertTrue(PlatformProfileForm({'platform_name': 'LeetCode', 'username': 'foo'}).is_valid())
+                cache.delete('fetch_cache:LeetCode:foo')
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(hits._value.get(), before)
+
+    def test_unknown_user_is_rejected(self):
+        data = {'problems_solved': 'User not found', 'rating': 'N/A', 'contests': 'N/A'}
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value=data):
+            form = PlatformProfileForm({'platform_name': 'LeetCode', 'username': 'nobody'})
+            self.assertFalse(form.is_valid())
+        self.assertIn('username', form.errors)
+
+    def test_missing_handle_is_answered_from_validation_cache(self):
+        data = {'problems_solved': 'User not found', 'rating': 'N/A', 'contests': 'N/A'}
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value=data) as fetch:
+            self.assertFalse(PlatformProfileForm({'platform_name': 'LeetCode', 'username': 'nobody'}).is_valid())
+            cache.delete('fetch_cache:LeetCode:nobody')
+            self.assertFalse(PlatformProfileForm({'platform_name': 'LeetCode', 'username': 'NoBody'}).is_valid())
+        self.assertEqual(fetch.call_count, 1)
+
+
+class CodeforcesFetchTest(TestCase):
+    """Codeforces endpoints are fetched independently and merged."""
+
+    def test_failed_endpoint_leaves_other_fields(self):
+        responses = {
+            'user.info': {'status': 'OK', 'result': [{'rating': 1900}]},
+            'user.status': None,
+            'user.rating': {'status': 'OK', 'result': [{}, {}, {}]},
+        }
+        with patch('subscriptions.tasks._fetch_codeforces_endpoint', side_effect=lambda url, username, endpoint, deadline: responses[endpoint]):
+            data = fetch_codeforces_data('tourist')
+        self.assertEqual(data, {'problems_solved': None, 'rating': 1900, 'contests': 3})
+        self.assertEqual(
+            merge_partial_data(data, {'problems_solved': 42}),
+            {'problems_solved': 42, 'rating': 1900, 'contests': 3},
+        )
+
+    def test_concurrent_requests_are_capped(self):
+        lock = threading.Lock()
+        in_flight = []
+        peak = [0]
+
+        def get(url, timeout):
+            with lock:
+                in_flight.append(url)
+                peak[0] = max(peak[0], len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.remove(url)
+            return Mock(status_code=200, content=b'{}', json=lambda: {'status': 'OK', 'result': [{'rating': 1500}]})
+
+        with patch('subscriptions.tasks.requests.get', side_effect=get):
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                list(executor.map(fetch_codeforces_data, [f'user{i}' for i in range(6)]))
+        self.assertEqual(peak[0], tasks.CODEFORCES_MAX_REQUESTS)
+
+
+class BatchLookupTest(TestCase):
+    """Batch public stats lookup resolves many handles in one query."""
+
+    def setUp(self):
+        cache.clear()
+        sub = Subscriber.objects.create(email='batch@example.com')
+        PlatformProfile.objects.create(subscriber=sub, platform_name='LeetCode', username='Foo', last_rating=1600, problems_solved=50, contests_attended=4)
+        PlatformProfile.objects.create(subscriber=sub, platform_name='Codeforces', username='bar', last_rating=1400, problems_solved=20, contests_attended=3)
+
+    def test_batch_lookup_streams_results_in_order(self):
+        body = {'profiles': [
+            {'platform': 'codeforces', 'username': 'BAR'},
+            {'platform': 'leetcode', 'username': 'foo'},
+            {'platform': 'codechef', 'username': 'missing'},
+        ]}
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('api_fetch_data_batch'), body, content_type='application/json')
+            lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([line['rating'] for line in lines], [1400, 1600, 'N/A'])
+        self.assertEqual(lines[2]['problems_solved'], 'User not found')
+
+        # second lookup is served from the per-key cache
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('api_fetch_data_batch'), body, content_type='application/json')
+            b''.join(response.streaming_content)
+
+
+class ConditionalGetTest(SessionLoginMixin, TestCase):
+    """Read endpoints answer If-None-Match with 304 until data changes."""
+
+    def setUp(self):
+        cache.clear()
+        sub = Subscriber.objects.create(email='etag@example.com')
+        PlatformProfile.objects.create(subscriber=sub, platform_name='LeetCode', username='foo', last_rating=1600, problems_solved=50, contests_attended=4)
+        self.login(sub.email)
+
+    def test_leaderboard_not_modified_until_invalidated(self):
+        response = self.client.get(reverse('leaderboard'))
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('leaderboard'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        invalidate_leaderboard_cache()
+        response = self.client.get(reverse('leaderboard'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class SubscriberMiddlewareTest(SessionLoginMixin, TestCase):
+    """request.subscriber is resolved from the identity cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.sub = Subscriber.objects.create(email='mw@example.com')
+        PlatformProfile.objects.create(subscriber=self.sub, platform_name='LeetCode', username='foo', last_rating=1600, problems_solved=50, contests_attended=4)
+        self.login(self.sub.email)
+
+    def test_cache_hit_skips_auth_queries(self):
+        self.client.get(reverse('my_profiles'))
+        invalidate_leaderboard_cache()  # new ETag, same identity
+        # only the profiles query remains
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('my_profiles'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_group_change_refreshes_cached_subscriber(self):
+        self.client.get(reverse('my_profiles'))
+        response = self.client.post(reverse('create_or_join_group'), {'action': 'create_group', 'group_name': 'alpha'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_cached_subscriber(self.sub.email).group, 'alpha')
+
+
+class AsyncRefreshProfileTest(SessionLoginMixin, TestCase):
+    """refresh_profile runs as an async view."""
+
+    def setUp(self):
+        cache.clear()
+        self.sub = Subscriber.objects.create(email='async@example.com')
+        self.profile = PlatformProfile.objects.create(subscriber=self.sub, platform_name='LeetCode', username='foo', last_rating=1600, problems_solved=50, contests_attended=4)
+        self.login(self.sub.email)
+
+    def test_refresh_updates_profile(self):
+        data = {'problems_solved': 55, 'rating': 1650, 'contests': 5}
+        threads = []
+
+        def fetch(username, deadline=None):
+            threads.append(threading.current_thread().name)
+            return data
+
+        with patch('subscriptions.tasks.fetch_leetcode_data', side_effect=fetch):
+            response = self.client.post(reverse('refresh_profile', args=[self.profile.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['profile']['problems_solved'], 55)
+        # the upstream call ran on the dedicated pool, not the loop's default executor
+        self.assertTrue(threads[0].startswith('upstream'), threads)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.last_rating, 1650)
+
+        # second refresh within a minute is rate limited
+        response = self.client.post(reverse('refresh_profile', args=[self.profile.id]))
+        self.assertEqual(response.status_code, 429)
+
+
+class CircuitBreakerTest(TestCase):
+    """Repeated upstream failures open the platform's circuit."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_open_circuit_skips_fetch_until_probe(self):
+        failed = {'problems_solved': 'N/A', 'rating': 'N/A', 'contests': 'N/A'}
+        with patch('subscriptions.tasks.fetch_codechef_data', return_value=failed) as fetch:
+            for i in range(circuit_breaker.CIRCUIT_MIN_REQUESTS + 3):
+                get_platform_data('CodeChef', f'user{i}', caller='leaderboard')
+        self.assertEqual(fetch.call_count, circuit_breaker.CIRCUIT_MIN_REQUESTS)
+        self.assertEqual(circuit_breaker.get_circuit_state('CodeChef')['state'], 'open')
+
+        # after the open period a single successful probe closes it again
+        opened_at = cache.get('circuit:CodeChef:opened_at')
+        cache.set('circuit:CodeChef:opened_at', opened_at - circuit_breaker.CIRCUIT_OPEN_SECONDS, timeout=None)
+        data = {'problems_solved': 10, 'rating': 1500, 'contests': 2}
+        with patch('subscriptions.tasks.fetch_codechef_data', return_value=data):
+            self.assertEqual(get_platform_data('CodeChef', 'probe', caller='leaderboard'), data)
+        self.assertEqual(circuit_breaker.get_circuit_state('CodeChef')['state'], 'closed')
+
+    def test_straggler_success_does_not_close_circuit(self):
+        for _ in range(circuit_breaker.CIRCUIT_MIN_REQUESTS):
+            circuit_breaker.record_failure('LeetCode')
+        opened_at = cache.get('circuit:LeetCode:opened_at')
+        cache.set('circuit:LeetCode:opened_at', opened_at - circuit_breaker.CIRCUIT_OPEN_SECONDS, timeout=None)
+
+        # a request that went out before the circuit opened finishes late
+        circuit_breaker.record_success('LeetCode')
+        self.assertEqual(circuit_breaker.get_circuit_state('LeetCode')['state'], 'half_open')
+
+        self.assertTrue(circuit_breaker.allow_request('LeetCode'))
+        # other workers run in their own context and don't get the probe
+        self.assertFalse(contextvars.copy_context().run(circuit_breaker.allow_request, 'LeetCode'))
+        circuit_breaker.record_success('LeetCode')
+        self.assertEqual(circuit_breaker.get_circuit_state('LeetCode')['state'], 'closed')
+
+    def test_counters_reset_together(self):
+        for _ in range(circuit_breaker.CIRCUIT_MIN_REQUESTS - 1):
+            circuit_breaker.record_failure('Codeforces')
+        # the window runs out; its counters may outlive it by a moment
+        cache.delete('circuit:Codeforces:window')
+        circuit_breaker.record_success('Codeforces')
+        circuit_breaker.record_failure('Codeforces')
+        state = circuit_breaker.get_circuit_state('Codeforces')
+        self.assertEqual((state['state'], state['requests'], state['failures']), ('closed', 2, 1))
+
+
+class FetchDeadlineTest(TestCase):
+    """A fetch run stops scheduling work once its budget is spent."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_request_timeout_scales_to_time_left(self):
+        self.assertEqual(_request_timeout(None), 10)
+        self.assertLessEqual(_request_timeout(time.monotonic() + 3), 3)
+
+    def test_profiles_past_deadline_are_carried_over(self):
+        sub = Subscriber.objects.create(email='deadline@example.com')
+        profile = PlatformProfile.objects.create(subscriber=sub, platform_name='LeetCode', username='foo', last_rating=1600, problems_solved=50, contests_attended=4)
+        with patch('subscriptions.tasks.fetch_leetcode_data') as fetch:
+            summary = fetch_leaderboard_data(budget=1e-9)
+        fetch.assert_not_called()
+        self.assertEqual((summary['processed'], summary['carried_over']), (0, 1))
+        profile.refresh_from_db()
+        self.assertEqual(profile.problems_solved, 50)
+
+
+class MetricsEndpointTest(TestCase):
+    """/metrics exposes fetch, cache and email metrics."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_metrics_include_fetch_cache_counters(self):
+        data = {'problems_solved': 10, 'rating': 1500, 'contests': 2}
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value=data):
+            get_platform_data('LeetCode', 'foo', caller='signup')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('skilltracker_fetch_cache_total{caller="signup",outcome="miss"}', body)
+        self.assertIn('skilltracker_fetch_seconds_bucket{le="0.25",platform="LeetCode"}', body)
+
+
+@override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_SLOW_MS=0)
+class RequestProfilingTest(SessionLoginMixin, TestCase):
+    """Opt-in profiling middleware reports per-request timings."""
+
+    def setUp(self):
+        cache.clear()
+        sub = Subscriber.objects.create(email='prof@example.com')
+        PlatformProfile.objects.create(subscriber=sub, platform_name='LeetCode', username='foo', last_rating=1600, problems_solved=50, contests_attended=4)
+        self.login(sub.email)
+
+    def test_server_timing_header(self):
+        with self.assertLogs('subscriptions.profiling', level='WARNING') as logs:
+            response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;desc="\d+ queries";dur=[\d.]+, cache;desc="\d+ calls";dur=[\d.]+, total;dur=[\d.]+')
+        self.assertIn('slow request GET /leaderboard/', logs.output[0])
+
+
+class UpstreamStubTest(StubServerMixin, TestCase):
+    """The fetchers parse the stub's responses like the real upstreams'."""
+
+    def test_fetchers_read_stub_profiles(self):
+        for fetch in (fetch_leetcode_data, fetch_codeforces_data, fetch_codechef_data):
+            data = fetch('alice')
+            self.assertNotIn('N/A', (data['problems_solved'], data['rating']), fetch.__name__)
+            self.assertEqual(fetch('missing_bob')['problems_solved'], 'User not found', fetch.__name__)
+        self.assertEqual(self.server.get_stats(), {'200': 6, '400': 3, '302': 1})
+
+    def test_throttled_calls_are_retried(self):
+        self.server.throttle_rate = 1.0
+        with patch('subscriptions.tasks.time.sleep'):
+            data = fetch_leetcode_data('alice')
+        self.assertEqual(data['problems_solved'], 'N/A')
+        self.assertEqual(self.server.get_stats(), {'429': 3})
+
+
+class QueryBudgetTest(SessionLoginMixin, TestCase):
+    """Query counts must not grow with the number of profiles."""
+
+    SIZES = (5, 40)
+
+    def setUp(self):
+        cache.clear()
+
+    def _generate(self, subscribers):
+        clear_synthetic_dataset()
+        cache.clear()
+        generate_dataset(subscribers=subscribers, groups=2, weeks=2)
+
+    def test_leaderboard(self):
+        for size in self.SIZES:
+            with self.subTest(subscribers=size):
+                self._generate(size)
+                subscriber = Subscriber.objects.exclude(group=None).first()
+                self.login(subscriber.email)
+                with self.assertNumQueries(4):
+                    response = self.client.get(reverse('leaderboard'), {'group': subscriber.group})
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.json()['results'])
+
+    def test_combined_leaderboard(self):
+        for size in self.SIZES:
+            with self.subTest(subscribers=size):
+                self._generate(size)
+                subscriber = Subscriber.objects.exclude(combined_score=None).first()
+                self.login(subscriber.email)
+                with self.assertNumQueries(4):
+                    response = self.client.get(reverse('leaderboard'), {'sort_by': 'combined'})
+                scores = [entry['combined_score'] for entry in response.json()['results']]
+                self.assertEqual(scores, sorted(scores, reverse=True))
+                self.assertIn('combined', response.json()['user_rankings'])
+
+    def test_weekly_changes_and_snapshots(self):
+        for size in self.SIZES:
+            with self.subTest(subscribers=size):
+                self._generate(size)
+                with self.assertNumQueries(3):
+                    changes, _, _ = _compile_weekly_changes()
+                self.assertEqual(sum(len(diffs) for diffs in changes.values()), size * 3)
+                with self.assertNumQueries(2):
+                    self.assertEqual(record_weekly_snapshots(), size * 3)
+
+
+class LoadTestBaselineTest(TestCase):
+    """Load-test summaries are compared against a saved baseline."""
+
+    def test_regressions_are_reported(self):
+        results = LoadResults()
+        for latency in range(1, 101):
+            results.record('leaderboard', float(latency), 200)
+        results.record('leaderboard', 500.0, 500)
+        summary = results.summary(duration=10)
+        self.assertEqual(summary['leaderboard']['errors'], 1)
+
+        baseline = {'leaderboard': dict(summary['leaderboard'], errors=1)}
+        self.assertEqual(compare_to_baseline(summary, baseline), [])
+
+        baseline['leaderboard'].update(rps=20.0, p99_ms=50.0)
+        regressions = compare_to_baseline(summary, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('throughput', regressions[0])
+        self.assertIn('p99', regressions[1])
+
+
+class FetchRunHistoryTest(TestCase):
+    """Each leaderboard fetch is recorded as a FetchRun."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_run_records_per_platform_outcomes(self):
+        sub = Subscriber.objects.create(email='runs@example.com')
+        PlatformProfile.objects.create(subscriber=sub, platform_name='LeetCode', username='foo', last_rating=1600, problems_solved=50, contests_attended=4)
+        PlatformProfile.objects.create(subscriber=sub, platform_name='Codeforces', username='bar', last_rating=1400, problems_solved=20, contests_attended=2)
+        PlatformProfile.objects.create(subscriber=sub, platform_name='CodeChef', username='baz', last_rating=1700, problems_solved=30, contests_attended=3)
+        failed = {'problems_solved': 'N/A', 'rating': 'N/A', 'contests': 'N/A'}
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value={'problems_solved': 55, 'rating': 1610, 'contests': 5}), \
+                patch('subscriptions.tasks.fetch_codeforces_data', return_value={'problems_solved': 20, 'rating': 1400, 'contests': 2}), \
+                patch('subscriptions.tasks.fetch_codechef_data', return_value=failed):
+            summary = fetch_leaderboard_data()
+
+        run = FetchRun.objects.get(id=summary['run_id'])
+        self.assertEqual(run.status, 'Completed')
+        self.assertEqual(
+            (run.profiles_attempted, run.profiles_changed, run.profiles_unchanged, run.profiles_failed),
+            (3, 1, 1, 1),
+        )
+        self.assertEqual(run.platform_stats['CodeChef']['failed'], 1)
+
+        response = self.client.get(reverse('fetch_runs'), {'ids': str(run.id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['runs'][0]['profiles_changed'], 1)
+
+
+class FetchStatusBackoffTest(TestCase):
+    """Failing handles back off instead of being refetched every run."""
+
+    def setUp(self):
+        cache.clear()
+        sub = Subscriber.objects.create(email='backoff@example.com')
+        self.profile = PlatformProfile.objects.create(subscriber=sub, platform_name='LeetCode', username='gone', last_rating=1600, problems_solved=50, contests_attended=4)
+
+    def test_missing_handle_is_skipped_until_eligible(self):
+        not_found = {'problems_solved': 'User not found', 'rating': 'N/A', 'contests': 'N/A'}
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value=not_found):
+            fetch_leaderboard_data()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.fetch_status, 'Failed')
+        self.assertEqual(self.profile.problems_solved, 50)
+        self.assertIsNotNone(self.profile.next_fetch_at)
+
+        with patch('subscriptions.tasks.fetch_leetcode_data') as fetch:
+            summary = fetch_leaderboard_data()
+        fetch.assert_not_called()
+        self.assertEqual(FetchRun.objects.get(id=summary['run_id']).profiles_skipped, 1)
+
+    def test_backoff_grows_and_success_resets(self):
+        failed = {'problems_solved': 'N/A', 'rating': 'N/A', 'contests': 'N/A'}
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value=failed):
+            fetch_leaderboard_data()
+            self.profile.refresh_from_db()
+            # a single failure is retried on the next run
+            self.assertEqual((self.profile.consecutive_failures, self.profile.next_fetch_at), (1, None))
+            fetch_leaderboard_data()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.consecutive_failures, 2)
+        self.assertIsNotNone(self.profile.next_fetch_at)
+
+        PlatformProfile.objects.filter(id=self.profile.id).update(next_fetch_at=None)
+        with patch('subscriptions.tasks.fetch_leetcode_data', return_value={'problems_solved': 51, 'rating': 1600, 'contests': 4}):
+            fetch_leaderboard_data()
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.fetch_status, self.profile.consecutive_failures), ('Success', 0))
+        self.assertIsNotNone(self.profile.last_success_at)
+
+
+class GroupAggregatesTest(TestCase):
+    """Group counters follow membership and profile changes without a rebuild."""
+
+    def setUp(self):
+        self.alice = Subscriber.objects.create(email='alice@example.com', group='alpha')
+        self.bob = Subscriber.objects.create(email='bob@example.com')
+        self.alice_lc = PlatformProfile.objects.create(subscriber=self.alice, platform_name='LeetCode', username='alice', last_rating=1500, problems_solved=40)
+        self.bob_lc = PlatformProfile.objects.create(subscriber=self.bob, platform_name='LeetCode', username='bob', last_rating=1800, problems_solved=10)
+
+    def stats(self):
+        return GroupPlatformStats.objects.get(group_id='alpha', platform_name='LeetCode')
+
+    def test_join_and_profile_changes(self):
+        self.bob.group = 'alpha'
+        self.bob.save()
+        self.assertEqual(Group.objects.get(name='alpha').member_count, 2)
+        stats = self.stats()
+        self.assertEqual((stats.profile_count, stats.total_problems, stats.average_rating), (2, 50, 1650))
+        self.assertEqual(stats.top_profile_id, self.bob_lc.id)
+
+        # the top member drops below alice
+        self.bob_lc.last_rating = 1400
+        self.bob_lc.save()
+        self.assertEqual((self.stats().top_profile_id, self.stats().top_rating), (self.alice_lc.id, 1500))
+
+        self.bob_lc.delete()
+        stats = self.stats()
+        self.assertEqual((stats.profile_count, stats.total_problems, stats.rated_count), (1, 40, 1))
+
+    def test_group_is_removed_with_its_last_member(self):
+        self.client.post(reverse('home'), {'email': self.bob.email}, content_type='application/json')
+        self.client.post(reverse('create_or_join_group'), {'action': 'join_group', 'existing_group_name': 'alpha'}, content_type='application/json')
+        self.alice.delete()
+        self.assertEqual(Group.objects.get(name='alpha').member_count, 1)
+        self.client.post(reverse('create_or_join_group'), {'action': 'leave_group'}, content_type='application/json')
+        self.assertFalse(Group.objects.filter(name='alpha').exists())
+        self.assertFalse(GroupPlatformStats.objects.exists())
+
+    def test_group_page_matches_rebuild(self):
+        self.bob.group = 'alpha'
+        self.bob.save()
+        self.client.post(reverse('home'), {'email': self.bob.email}, content_type='application/json')
+        before = self.client.get(reverse('group_detail', args=['alpha'])).json()
+        rebuild_group_stats()
+        with self.assertNumQueries(2):
+            after = self.client.get(reverse('group_detail', args=['alpha'])).json()
+        self.assertEqual(before, after)
+        self.assertEqual(after['member_count'], 2)
+        self.assertEqual(after['platforms']['LeetCode']['top_member']['username'], 'bob')
+        self.assertEqual(self.client.get(reverse('group_detail', args=['nope'])).status_code, 404)
+
+
+class CombinedScoreTest(TestCase):
+    """Combined scores normalize each platform and weight them together."""
+
+    WEIGHTS = {'LeetCode': {'last_rating': 1.0}, 'Codeforces': {'last_rating': 1.0}}
+
+    def test_percentile_and_minmax(self):
+        rows = [
+            (1, 'LeetCode', 1500, 10), (1, 'Codeforces', 1200, 5),
+            (2, 'LeetCode', 2000, 50),
+            (3, 'LeetCode', 1000, 1), (3, 'Codeforces', -1, None),
+            (4, 'Codeforces', None, None),
+        ]
+        self.assertEqual(compute_combined_scores(rows, self.WEIGHTS, 'percentile'), {1: 75.0, 2: 50.0, 3: 0.0, 4: None})
+        self.assertEqual(compute_combined_scores(rows, self.WEIGHTS, 'minmax'), {1: 75.0, 2: 50.0, 3: 0.0, 4: None})
+        with self.assertRaises(ValueError):
+            compute_combined_scores(rows, self.WEIGHTS, 'zscore')
+
+    @override_settings(COMBINED_SCORE_WEIGHTS=WEIGHTS)
+    def test_recompute_writes_changed_scores_only(self):
+        low = Subscriber.objects.create(email='low@example.com')
+        high = Subscriber.objects.create(email='high@example.com')
+        PlatformProfile.objects.create(subscriber=low, platform_name='LeetCode', username='low', last_rating=1000)
+        PlatformProfile.objects.create(subscriber=high, platform_name='LeetCode', username='high', last_rating=1800)
+        self.assertEqual(recompute_combined_scores(), 2)
+        self.assertEqual(recompute_combined_scores(), 0)
+        high.refresh_from_db()
+        self.assertEqual(high.combined_score, 50.0)
+
+    @override_settings(COMBINED_SCORE_WEIGHTS=WEIGHTS)
+    def test_recompute_evicts_cached_subscribers(self):
+        cache.clear()
+        sub = Subscriber.objects.create(email='cached@example.com')
+        PlatformProfile.objects.create(subscriber=sub, platform_name='LeetCode', username='cached', last_rating=1000)
+        self.assertIsNone(get_cached_subscriber('cached@example.com').combined_score)
+        recompute_combined_scores()
+        cached = get_cached_subscriber('cached@example.com')
+        self.assertEqual(cached.combined_score, 50.0)
+        # a group change must not write back a stale score
+        Subscriber.objects.filter(pk=sub.pk).update(combined_score=42.0)
+        cached.group = 'alpha'
+        cached.save(update_fields=['group'])
+        sub.refresh_from_db()
+        self.assertEqual((sub.group, sub.combined_score), ('alpha', 42.0))
+
+
+class ExportTest(SessionLoginMixin, TestCase):
+    """Leaderboard and snapshot exports stream filtered rows."""
+
+    def setUp(self):
+        self.alice = Subscriber.objects.create(email='alice@example.com', group='alpha')
+        bob = Subscriber.objects.create(email='bob@example.com', group='beta')
+        self.alice_lc = PlatformProfile.objects.create(subscriber=self.alice, platform_name='LeetCode', username='alice', last_rating=1500, problems_solved=40)
+        PlatformProfile.objects.create(subscriber=self.alice, platform_name='Codeforces', username='alice_cf', last_rating=1900, problems_solved=10)
+        PlatformProfile.objects.create(subscriber=bob, platform_name='LeetCode', username='bob', last_rating=1800, problems_solved=10)
+        old = WeeklySnapshot.objects.create(profile=self.alice_lc, last_rating=1400)
+        WeeklySnapshot.objects.filter(pk=old.pk).update(timestamp=old.timestamp - timedelta(days=30))
+        WeeklySnapshot.objects.create(profile=self.alice_lc, last_rating=1500)
+
+    def test_staff_csv_export(self):
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        response = self.client.get(reverse('export_leaderboard', args=['csv']), {'platform': 'LeetCode'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['rank', 'profile_id', 'platform_name', 'username'])
+        self.assertEqual([line.split(',')[3] for line in lines[1:]], ['bob', 'alice'])
+
+    def test_subscriber_exports_own_group_only(self):
+        self.login(self.alice.email)
+        response = self.client.get(reverse('export_leaderboard', args=['ndjson']))
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['username'] for row in rows], ['alice_cf', 'alice'])
+        self.assertEqual(self.client.get(reverse('export_leaderboard', args=['csv']), {'group': 'beta'}).status_code, 403)
+        self.assertEqual(self.client.get(reverse('export_snapshots', args=['csv']), {'since': 'last week'}).status_code, 400)
+
+    def test_snapshot_date_range(self):
+        self.login(self.alice.email)
+        since = (timezone.now() - timedelta(days=7)).date().isoformat()
+        response = self.client.get(reverse('export_snapshots', args=['ndjson']), {'since': since})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['last_rating'] for row in rows], [1500])
+        response = self.client.get(reverse('export_snapshots', args=['ndjson']), {'until': since})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['last_rating'] for row in rows], [1400])
+
+
+class StreamingFetchTest(TestCase):
+    """Leaderboard runs keep a bounded number of fetches in flight and write in batches."""
+
+    def test_results_are_written_in_batches(self):
+        cache.clear()
+        for i in range(25):
+            sub = Subscriber.objects.create(email=f'stream{i}@example.com', group='beta')
+            PlatformProfile.objects.create(subscriber=sub, platform_name='LeetCode', username=f'user{i}', last_rating=1500, problems_solved=10, contests_attended=1)
+        in_flight = []
+        peak = [0]
+
+        def fake_fetch(username, deadline=None):
+            in_flight.append(username)
+            peak[0] = max(peak[0], len(in_flight))
+            time.sleep(0.005)
+            in_flight.remove(username)
+            return {'problems_solved': 12, 'rating': 1600, 'contests': 2}
+
+        bulk_update = PlatformProfile.objects.bulk_update
+        with patch('subscriptions.tasks.fetch_leetcode_data', side_effect=fake_fetch), \
+                patch('subscriptions.tasks.FETCH_QUEUE_SIZE', 4), \
+                patch('subscriptions.tasks.FETCH_WRITE_BATCH_SIZE', 10), \
+                patch.object(PlatformProfile.objects, 'bulk_update', wraps=bulk_update) as writes:
+            summary = fetch_leaderboard_data()
+
+        self.assertEqual(summary['processed'], 25)
+        self.assertLessEqual(peak[0], 4)
+        self.assertEqual([len(call.args[0]) for call in writes.call_args_list], [10, 10, 5])
+        self.assertEqual(
+            set(PlatformProfile.objects.values_list('last_rating', 'problems_solved', 'fetch_status')),
+            {(1600, 12, 'Success')},
+        )
+        # bulk_update skips the signal handlers; the writer moves the group aggregates
+        group_stats = GroupPlatformStats.objects.get(group_id='beta', platform_name='LeetCode')
+        self.assertEqual((group_stats.top_rating, group_stats.total_problems, group_stats.profile_count), (1600, 300, 25))
+
+
+class ShardedFetchTest(TestCase):
+    """Shards split the profiles without overlap and merge into one run."""
+
+    def test_shards_cover_every_profile_once(self):
+        cache.clear()
+        for i in range(7):
+            sub = Subscriber.objects.create(email=f'shard{i}@example.com')
+            PlatformProfile.objects.create(subscriber=sub, platform_name='LeetCode', username=f'user{i}', last_rating=1500, problems_solved=10, contests_attended=1)
+        parent = FetchRun.objects.create(shard='*/3')
+        fetched = []
+
+        def fake_fetch(username, deadline=None):
+            fetched.append(username)
+            return {'problems_solved': 11, 'rating': 1500, 'contests': 1}
+
+        with patch('subscriptions.tasks.fetch_leetcode_data', side_effect=fake_fetch):
+            for index in range(3):
+                fetch_leaderboard_data(shard=(index, 3), parent_id=parent.id, rescore=False)
+
+        self.assertEqual(sorted(fetched), sorted(f'user{i}' for i in range(7)))
+        run = merge_shard_runs(parent)
+        self.assertEqual((run.status, run.profiles_attempted, run.profiles_changed), ('Completed', 7, 7))
+        self.assertEqual(run.platform_stats['LeetCode']['changed'], 7)
+        self.assertEqual(sorted(run.shards.values_list('shard', flat=True)), ['0/3', '1/3', '2/3'])
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('2/4'), (2, 4))
+        self.assertEqual([is_last_shard(shard) for shard in (None, (0, 4), (3, 4))], [True, False, True])
+        for value in ('4/4', '-1/2', '1', 'a/b', '0/0'):
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+        response = self.client.post(reverse('trigger-leaderboard') + '?shard=5/2')
+        self.assertEqual(response.status_code, 400)
+
+
+class ScheduledRefreshTest(StubServerMixin, TestCase):
+    """Refreshes burst after a platform's contests and slow down otherwise."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        sub = Subscriber.objects.create(email='sched@example.com')
+        for platform_name in ('LeetCode', 'Codeforces', 'CodeChef'):
+            PlatformProfile.objects.create(subscriber=sub, platform_name=platform_name, username='alice', last_rating=-1)
+
+    def test_bursts_follow_the_calendar(self):
+        now = timezone.now()
+        summary = run_scheduled_refresh(now=now)
+        self.assertEqual(summary['calendar'], {'LeetCode': 1, 'Codeforces': 3, 'CodeChef': 2})
+        # Codeforces and CodeChef contests just finished; LeetCode's is upcoming
+        self.assertEqual(summary['due'], {'LeetCode': 'quiet', 'Codeforces': 'burst', 'CodeChef': 'burst'})
+        self.assertEqual(summary['run']['processed'], 3)
+
+        summary = run_scheduled_refresh(now=now + timedelta(minutes=45))
+        self.assertEqual(summary['calendar'], {})
+        self.assertEqual(summary['due'], {'Codeforces': 'burst'})
+        self.assertEqual(summary['run']['processed'], 1)
+        self.assertEqual(FetchRun.objects.get(id=summary['run']['run_id']).trigger, 'scheduled')
+
+        self.assertEqual(plan_refresh(now + timedelta(minutes=50)), {})
+        self.assertEqual(
+            plan_refresh(now + timedelta(hours=13)),
+            {'LeetCode': 'quiet', 'Codeforces': 'quiet', 'CodeChef': 'quiet'},
+        )
+
+    def test_budget_covers_the_whole_tick(self):
+        def slow_calendar(now, deadline):
+            time.sleep(0.3)
+            return {}
+
+        with patch('subscriptions.scheduling.sync_contest_calendar', side_effect=slow_calendar):
+            # the fetch only gets what the calendar sync left
+            summary = run_scheduled_refresh(budget=10)
+            self.assertLess(FetchRun.objects.get(id=summary['run']['run_id']).budget, 9.8)
+
+            cache.clear()
+            summary = run_scheduled_refresh(budget=0.2)
+        self.assertIsNone(summary['run'])
+        self.assertEqual(FetchRun.objects.count(), 1)
+        # nothing was fetched, so every platform is still due
+        self.assertEqual(set(plan_refresh()), {'LeetCode', 'Codeforces', 'CodeChef'})
+
+    def test_carried_over_platform_stays_due(self):
+        fetch_single_profile = tasks._fetch_single_profile
+
+        def out_of_time_on_codechef(profile, deadline=None):
+            if profile.platform_name == 'CodeChef':
+                raise DeadlineExceeded()
+            return fetch_single_profile(profile, deadline)
+
+        with patch('subscriptions.tasks._fetch_single_profile', side_effect=out_of_time_on_codechef):
+            summary = run_scheduled_refresh()
+        self.assertEqual(summary['run']['carried_over'], 1)
+        self.assertEqual(plan_refresh(), {'CodeChef': 'burst'})
+
+    def test_overlapping_ticks_are_skipped(self):
+        cache.add('scheduled_refresh_lock', True, SCHEDULER_LOCK_TIMEOUT)
+        self.assertEqual(run_scheduled_refresh(), {'skipped': 'already running'})
+        self.assertFalse(FetchRun.objects.exists())
+
+
+class ImportSubscribersTest(StubServerMixin, TestCase):
+    """CSV onboarding dedupes, validates against the stub and reports every row."""
+
+    CSV = (
+        "email,group,leetcode,codeforces,codechef\n"
+        "new1@example.com,class-a,alice,carol,dave\n"
+        "NEW1@example.com,class-a,,,\n"
+        "new2@example.com,class-a,missing_x,erin,\n"
+        "new3@example.com,,taken,missing_cf,\n"
+        "existing@example.com,class-a,frank,,\n"
+        "not-an-email,,,,\n"
+    )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        existing = Subscriber.objects.create(email='Existing@example.com')
+        PlatformProfile.objects.create(subscriber=existing, platform_name='LeetCode', username='Taken')
+
+    def test_import_reports_every_row(self):
+        report, summary = import_subscribers(self.CSV.splitlines(keepends=True))
+        self.assertEqual(summary, {'created': 3, 'skipped': 2, 'failed': 1})
+        by_line = {row['line']: row for row in report}
+        self.assertEqual(by_line[3]['detail'], 'duplicate email in file')
+        self.assertEqual(by_line[4]['LeetCode'], "LeetCode username 'missing_x' does not exist.")
+        self.assertEqual((by_line[5]['LeetCode'], by_line[5]['Codeforces']), ('already registered', 'not found'))
+        self.assertEqual(by_line[6]['detail'], 'subscriber exists')
+
+        created = Subscriber.objects.get(email='new1@example.com')
+        self.assertEqual(set(created.platform_profiles.values_list('platform_name', flat=True)), {'LeetCode', 'Codeforces', 'CodeChef'})
+        self.assertEqual(PlatformProfile.objects.get(username='erin').subscriber.email, 'new2@example.com')
+        self.assertEqual(Group.objects.get(name='class-a').member_count, 2)
+        # one user.info call for all Codeforces handles, repeated once without the unknown one
+        self.assertEqual(self.server.get_stats()['400'], 1)
+
+    def test_signup_racing_the_import_is_skipped(self):
+        def validate_and_race(*args):
+            Subscriber.objects.create(email='new2@example.com')
+            return validate_handles(*args)
+
+        with patch('subscriptions.onboarding.validate_handles', side_effect=validate_and_race):
+            report, summary = import_subscribers(self.CSV.splitlines(keepends=True))
+        self.assertEqual(summary, {'created': 2, 'skipped': 3, 'failed': 1})
+        self.assertEqual({row['line']: row['detail'] for row in report}[4], 'subscriber exists')
+        self.assertFalse(PlatformProfile.objects.filter(username='erin').exists())
+        self.assertTrue(Subscriber.objects.filter(email='new3@example.com').exists())
+
+    def test_dry_run_writes_nothing(self):
+        report, summary = import_subscribers(self.CSV.splitlines(keepends=True), dry_run=True)
+        self.assertEqual(summary['valid'], 3)
+        self.assertFalse(Subscriber.objects.filter(email='new1@example.com').exists())
+
+
+class ContestIngestTest(StubServerMixin, TestCase):
+    """Finished rated contests update tracked Codeforces ratings in bulk."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_rating_changes_are_applied_once(self):
+        sub = Subscriber.objects.create(email='cf@example.com', group='alpha')
+        rated = PlatformProfile.objects.create(subscriber=sub, platform_name='Codeforces', username='Codeforces_3', last_rating=1000, contests_attended=4, last_success_at=timezone.now() - timedelta(days=1))
+        other = Subscriber.objects.create(email='other@example.com')
+        unfetched = PlatformProfile.objects.create(subscriber=other, platform_name='Codeforces', username='codeforces_7', last_rating=-1, contests_attended=-1)
+        untouched = PlatformProfile.objects.create(subscriber=other, platform_name='LeetCode', username='codeforces_4', last_rating=1500)
+
+        summary = ingest_codeforces_contests()
+        self.assertEqual((summary['contests_applied'], summary['profiles_updated']), (1, 2))
+        rated.refresh_from_db()
+        unfetched.refresh_from_db()
+        untouched.refresh_from_db()
+        self.assertNotEqual(rated.last_rating, 1000)
+        self.assertEqual((rated.contests_attended, unfetched.contests_attended), (5, -1))
+        self.assertEqual(untouched.last_rating, 1500)
+        self.assertEqual(GroupPlatformStats.objects.get(group_id='alpha').top_rating, rated.last_rating)
+        self.assertEqual(
+            dict(Contest.objects.values_list('external_id', 'rated')),
+            {'2002': None, '2001': True, '2000': False},
+        )
+
+        self.server.reset_stats()
+        self.assertEqual(ingest_codeforces_contests()['profiles_updated'], 0)
+        # only contest.list; nothing is pending any more
+        self.assertEqual(self.server.get_stats(), {'200': 1})
+
+    def test_contest_is_counted_once(self):
+        old_ratings = {c['handle']: c['oldRating'] for c in synthetic_codeforces_contests('contest.ratingChanges', '2001')[1]['result']}
+        now = timezone.now()
+        sub = Subscriber.objects.create(email='cf@example.com')
+        # fetched after the contest, before its ratings were published
+        pending = PlatformProfile.objects.create(subscriber=sub, platform_name='Codeforces', username='codeforces_5', last_rating=old_ratings['codeforces_5'], contests_attended=3, last_success_at=now)
+        other = Subscriber.objects.create(email='cf2@example.com')
+        # fetched after the ratings came out: user.rating already counted it
+        fresh = PlatformProfile.objects.create(subscriber=other, platform_name='Codeforces', username='codeforces_6', last_rating=old_ratings['codeforces_6'] + 1, contests_attended=3, last_success_at=now)
+
+        ingest_codeforces_contests()
+        pending.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((pending.contests_attended, fresh.contests_attended), (4, 3))
+        self.assertNotEqual(pending.last_rating, old_ratings['codeforces_5'])
+
+    @override_settings(CODEFORCES_CONTEST_RATINGS=True)
+    def test_leaderboard_fetch_racing_the_ingest_keeps_new_ratings(self):
+        change = synthetic_codeforces_contests('contest.ratingChanges', '2001')[1]['result'][0]
+        sub = Subscriber.objects.create(email='cf@example.com')
+        profile = PlatformProfile.objects.create(
+            subscriber=sub, platform_name='Codeforces', username=change['handle'],
+            last_rating=change['oldRating'], contests_attended=3, last_success_at=timezone.now() - timedelta(days=1),
+        )
+        # an earlier full fetch cached the old rating
+        key = f"fetch_cache:Codeforces:{change['handle']}"
+        cache.set(key, {'data': {'problems_solved': 1, 'rating': change['oldRating'], 'contests': 3}, 'fetched_at': time.time() - 3600}, None)
+
+        fetch = tasks.fetch_codeforces_data
+
+        def fetch_while_ingesting(username, deadline=None, ratings=True):
+            data = fetch(username, deadline=deadline, ratings=ratings)
+            ingest_codeforces_contests()  # commits the new rating while the fetch is in flight
+            return data
+
+        # the leaderboard path for one profile read before the ingest ran
+        with patch('subscriptions.tasks.fetch_codeforces_data', side_effect=fetch_while_ingesting):
+            item = tasks._fetch_single_profile(profile)
+        writer = tasks._ProfileWriter(timezone.now())
+        writer.add(profile, item)
+        writer.flush()
+
+        profile.refresh_from_db()
+        self.assertEqual((profile.last_rating, profile.contests_attended), (change['newRating'], 4))
+        self.assertEqual(profile.problems_solved, item['problems_solved'])
+        self.assertIsNone(cache.get(key))
+        # later runs don't bring the old rating back either
+        fetch_leaderboard_data()
+        profile.refresh_from_db()
+        self.assertEqual(profile.last_rating, change['newRating'])
+
+    def test_problems_only_fetch(self):
+        data = fetch_codeforces_data('alice', ratings=False)
+        self.assertIsNone(data['rating'])
+        self.assertIsInstance(data['problems_solved'], int)
+        self.assertEqual(fetch_codeforces_data('missing_bob', ratings=False)['problems_solved'], 'User not found')
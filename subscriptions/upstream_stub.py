@@ -0,0 +1,339 @@
+"""
+Local stand-in for LeetCode, Codeforces and CodeChef, for benchmarks.
+
+Serves the same shapes the fetchers in `tasks.py` parse:
+  POST /graphql                      LeetCode GraphQL
+  GET  /api/user.{info,status,rating} Codeforces JSON API
+  GET  /api/contest.{list,ratingChanges}
+  GET  /users/<username>             CodeChef profile HTML
+  GET  /api/list/contests/all        CodeChef contest calendar
+
+Responses are synthetic (deterministic per username) unless a recorded one
+exists under `fixtures_dir`:
+  leetcode/<username>.json, leetcode/contests.json
+  codeforces/<endpoint>/<username>.json   e.g. codeforces/user.info/tourist.json
+  codeforces/contest.list/all.json, codeforces/contest.ratingChanges/<contestId>.json
+  codechef/<username>.html, codechef/contests.json
+Usernames starting with "missing" are reported as not found. The synthetic
+contest list has one rated contest that finished a few hours ago, rating
+`codeforces_1` .. `codeforces_200` (the `generate_dataset` handles). The
+LeetCode and CodeChef calendars each list one upcoming contest; CodeChef's
+also has one that finished a couple of hours ago.
+
+Latency, error rate and 429 behavior are configurable; see UpstreamStubServer.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MISSING_PREFIX = 'missing'
+SYNTHETIC_RATED_HANDLES = 200
+LEETCODE_USERNAME_RE = re.compile(r'matchedUser\(username:\s*"([^"]+)"\)')
+
+
+def _user_random(username):
+    # stable across processes, unlike hash()
+    return random.Random(zlib.crc32(username.encode()))
+
+
+def synthetic_leetcode(username):
+    if username.startswith(MISSING_PREFIX):
+        return {'data': {'matchedUser': None, 'userContestRanking': None},
+                'errors': [{'message': 'That user does not exist.'}]}
+    rng = _user_random(username)
+    easy, medium, hard = rng.randint(0, 400), rng.randint(0, 600), rng.randint(0, 200)
+    contests = rng.randint(0, 80)
+    return {'data': {
+        'matchedUser': {
+            'username': username,
+            'submitStats': {'acSubmissionNum': [
+                {'difficulty': 'All', 'count': easy + medium + hard, 'submissions': 0},
+                {'difficulty': 'Easy', 'count': easy, 'submissions': 0},
+                {'difficulty': 'Medium', 'count': medium, 'submissions': 0},
+                {'difficulty': 'Hard', 'count': hard, 'submissions': 0},
+            ]},
+        },
+        'userContestRanking': {
+            'attendedContestsCount': contests,
+            'rating': rng.uniform(1300, 2800),
+            'globalRanking': rng.randint(1, 500000),
+            'totalParticipants': 500000,
+            'topPercentage': rng.uniform(0, 100),
+        } if contests else None,
+    }}
+
+
+def synthetic_codeforces(endpoint, username):
+    """Return (status_code, body) for one Codeforces API endpoint."""
+    if username.startswith(MISSING_PREFIX):
+        return 400, {'status': 'FAILED', 'comment': f'handles: User with handle {username} not found'}
+    rng = _user_random(username)
+    if endpoint == 'user.info':
+        return 200, {'status': 'OK', 'result': [{'handle': username, 'rating': rng.randint(800, 3000)}]}
+    if endpoint == 'user.status':
+        submissions = [
+            {'problem': {'contestId': rng.randint(1, 2000), 'index': rng.choice('ABCDEF')},
+             'verdict': rng.choice(('OK', 'OK', 'WRONG_ANSWER', 'TIME_LIMIT_EXCEEDED'))}
+            for _ in range(rng.randint(0, 300))
+        ]
+        return 200, {'status': 'OK', 'result': submissions}
+    return 200, {'status': 'OK', 'result': [
+        {'contestId': i, 'newRating': rng.randint(800, 3000)} for i in range(rng.randint(0, 60))
+    ]}
+
+
+def synthetic_codeforces_batch(usernames):
+    """`user.info?handles=a;b;c`: like the real API, one unknown handle fails the whole call."""
+    result = []
+    for username in usernames:
+        status, body = synthetic_codeforces('user.info', username)
+        if status != 200:
+            return status, body
+        result.extend(body['result'])
+    return 200, {'status': 'OK', 'result': result}
+
+
+def synthetic_codeforces_contests(endpoint, contest_id=None, now=None):
+    """Return (status_code, body) for `contest.list` / `contest.ratingChanges`."""
+    now = int(now or time.time())
+    contests = [
+        {'id': 2002, 'name': 'Synthetic Round 3 (Div. 2)', 'type': 'CF', 'phase': 'BEFORE',
+         'startTimeSeconds': now + 2 * 86400, 'durationSeconds': 7200},
+        {'id': 2001, 'name': 'Synthetic Round 2 (Div. 2)', 'type': 'CF', 'phase': 'FINISHED',
+         'startTimeSeconds': now - 5 * 3600, 'durationSeconds': 7200},
+        {'id': 2000, 'name': 'Synthetic Unrated Round', 'type': 'CF', 'phase': 'FINISHED',
+         'startTimeSeconds': now - 3 * 86400, 'durationSeconds': 7200},
+    ]
+    if endpoint == 'contest.list':
+        return 200, {'status': 'OK', 'result': contests}
+    if contest_id == '2001':
+        changes = []
+        for i in range(1, SYNTHETIC_RATED_HANDLES + 1):
+            handle = f'codeforces_{i}'
+            rng = _user_random(f'2001:{handle}')
+            old = rng.randint(800, 3000)
+            changes.append({'contestId': 2001, 'handle': handle, 'rank': i,
+                            'oldRating': old, 'newRating': old + rng.randint(-150, 150)})
+        return 200, {'status': 'OK', 'result': changes}
+    if contest_id == '2000':
+        return 200, {'status': 'OK', 'result': []}
+    return 400, {'status': 'FAILED', 'comment': f'contestId: Contest with id {contest_id} has not started'}
+
+
+def synthetic_leetcode_contests(now=None):
+    now = int(now or time.time())
+    return {'data': {'upcomingContests': [
+        {'title': 'Synthetic Weekly Contest 400', 'titleSlug': 'synthetic-weekly-contest-400',
+         'startTime': now + 3 * 86400, 'duration': 5400},
+    ]}}
+
+
+def _iso(seconds):
+    return time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(seconds))
+
+
+def synthetic_codechef_contests(now=None):
+    now = int(now or time.time())
+
+    def contest(code, start, hours):
+        return {'contest_code': code, 'contest_name': f'Synthetic {code}',
+                'contest_start_date_iso': _iso(start), 'contest_end_date_iso': _iso(start + hours * 3600)}
+    return {'status': 'success', 'present_contests': [],
+            'future_contests': [contest('START201', now + 86400, 2)],
+            'past_contests': [contest('START200', now - 4 * 3600, 2)]}
+
+
+def synthetic_codechef(username):
+    """Return the profile HTML, or None if the user should not exist."""
+    if username.startswith(MISSING_PREFIX):
+        return None
+    rng = _user_random(username)
+    return f"""<html><body>
+<div class="rating-number">{rng.randint(1000, 2800)}</div>
+<div class="contest-participated-count">No. of Contests Participated: <b>{rng.randint(0, 120)}</b></div>
+<section class="rating-data-section problems-solved">
+  <h3>Contest Problems Solved: {rng.randint(0, 200)}</h3>
+  <h3>Total Problems Solved: {rng.randint(0, 900)}</h3>
+</section>
+</body></html>"""
+
+
+class UpstreamStubHandler(BaseHTTPRequestHandler):
+    server_version = 'UpstreamStub/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == '/__stats__':
+            return self._send_json(200, self.server.get_stats(), count=False)
+        if not self._admit():
+            return
+        query = parse_qs(parts.query)
+        if parts.path == '/api/list/contests/all':
+            recorded = self.server.load_fixture('codechef', 'contests.json')
+            if recorded is not None:
+                return self._send(200, recorded, 'application/json')
+            return self._send_json(200, synthetic_codechef_contests())
+        if parts.path.startswith('/api/'):
+            endpoint = parts.path[len('/api/'):]
+            if endpoint.startswith('contest.'):
+                contest_id = (query.get('contestId') or [''])[0]
+                recorded = self.server.load_fixture('codeforces', endpoint, f'{contest_id or "all"}.json')
+                if recorded is not None:
+                    return self._send(200, recorded, 'application/json')
+                return self._send_json(*synthetic_codeforces_contests(endpoint, contest_id))
+            username = (query.get('handles') or query.get('handle') or [''])[0]
+            if endpoint == 'user.info' and ';' in username:
+                return self._send_json(*synthetic_codeforces_batch(username.split(';')))
+            recorded = self.server.load_fixture('codeforces', endpoint, f'{username}.json')
+            if recorded is not None:
+                return self._send(200, recorded, 'application/json')
+            return self._send_json(*synthetic_codeforces(endpoint, username))
+        if parts.path.startswith('/users/'):
+            username = parts.path[len('/users/'):].strip('/')
+            recorded = self.server.load_fixture('codechef', f'{username}.html')
+            html = recorded.decode() if recorded is not None else synthetic_codechef(username)
+            if html is None:
+                # CodeChef redirects unknown users to the home page
+                return self._send(302, b'', 'text/html', {'Location': '/'})
+            return self._send(200, html.encode(), 'text/html; charset=utf-8')
+        if parts.path == '/':
+            return self._send(200, b'<html><body>home</body></html>', 'text/html', count=False)
+        self._send(404, b'', 'text/plain')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if urlsplit(self.path).path != '/graphql':
+            return self._send(404, b'', 'text/plain')
+        if not self._admit():
+            return
+        try:
+            query = json.loads(body).get('query', '')
+        except ValueError:
+            return self._send_json(400, {'errors': [{'message': 'invalid JSON'}]})
+        if 'upcomingContests' in query:
+            recorded = self.server.load_fixture('leetcode', 'contests.json')
+            if recorded is not None:
+                return self._send(200, recorded, 'application/json')
+            return self._send_json(200, synthetic_leetcode_contests())
+        match = LEETCODE_USERNAME_RE.search(query)
+        username = match.group(1) if match else ''
+        recorded = self.server.load_fixture('leetcode', f'{username}.json')
+        if recorded is not None:
+            return self._send(200, recorded, 'application/json')
+        self._send_json(200, synthetic_leetcode(username))
+
+    def _admit(self):
+        """Apply latency and injected faults; False if an error was already sent."""
+        server = self.server
+        delay = server.latency_ms + (server.rng.uniform(0, server.jitter_ms) if server.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+        if not server.take_rate_token() or server.rng.random() < server.throttle_rate:
+            self._send(429, b'Too Many Requests', 'text/plain', {'Retry-After': str(server.retry_after)})
+            return False
+        if server.rng.random() < server.error_rate:
+            self._send(500, b'Internal Server Error', 'text/plain')
+            return False
+        return True
+
+    def _send_json(self, status, payload, count=True):
+        self._send(status, json.dumps(payload).encode(), 'application/json', count=count)
+
+    def _send(self, status, body, content_type, headers=None, count=True):
+        if count:
+            self.server.count(status)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class UpstreamStubServer(ThreadingHTTPServer):
+    """Threaded stub server.
+
+    latency_ms / jitter_ms: added to every upstream call.
+    error_rate: share of calls answered with HTTP 500.
+    throttle_rate: share of calls answered with HTTP 429.
+    max_rps: if set, calls beyond this many per second also get 429.
+    """
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, latency_ms=0, jitter_ms=0, error_rate=0.0, throttle_rate=0.0,
+                 max_rps=None, retry_after=1, fixtures_dir=None, seed=None):
+        super().__init__(address, UpstreamStubHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.fixtures_dir = fixtures_dir
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def take_rate_token(self):
+        if not self.max_rps:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            return self._window_count <= self.max_rps
+
+    def count(self, status):
+        with self._lock:
+            self._stats[status] = self._stats.get(status, 0) + 1
+
+    def get_stats(self):
+        """Responses served so far, by HTTP status."""
+        with self._lock:
+            return {str(status): n for status, n in sorted(self._stats.items())}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def load_fixture(self, *parts):
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, *parts)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+def start_stub_server(host='127.0.0.1', port=0, **options):
+    """Start an UpstreamStubServer on a daemon thread and return it.
+
+    port=0 picks a free port; use `server.base_url`. Call `server.shutdown()`
+    when done.
+    """
+    server = UpstreamStubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
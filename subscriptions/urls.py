@@ -11,9 +11,16 @@ urlpatterns = [
     path('leaderboard/', views.leaderboard, name='leaderboard'),
     path('logout/', views.user_logout, name='logout'),
     path('trigger-leaderboard/', views.fetch_leaderboard_data_view, name='trigger-leaderboard'),
+    path('scheduled-refresh/', views.scheduled_refresh_view, name='scheduled-refresh'),
+    path('fetch-runs/', views.fetch_run_history, name='fetch_runs'),
     path('create_or_join_group/', views.create_or_join_group, name='create_or_join_group'),
+    path('export/leaderboard.<str:fmt>', views.export_leaderboard, name='export_leaderboard'),
+    path('export/snapshots.<str:fmt>', views.export_snapshots, name='export_snapshots'),
+    path('groups/<str:group_name>/', views.group_detail, name='group_detail'),
     path('health/', views.health, name='health'),
+    path('metrics', views.metrics_view, name='metrics'),
     path('api/fetch-data', views.api_fetch_data_view, name='api_fetch_data'),
+    path('api/fetch-data/batch', views.api_fetch_data_batch_view, name='api_fetch_data_batch'),
     path('api/weekly-update/', views.weekly_update, name='weekly_update'),
     path('my-profiles/', views.my_profiles, name='my_profiles'),
     path('profiles/<int:profile_id>/refresh/', views.refresh_profile, name='refresh_profile'),
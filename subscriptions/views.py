@@ -1,17 +1,37 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
 from django.shortcuts import get_object_or_404
+from concurrent.futures import ThreadPoolExecutor
+import csv
+from datetime import datetime, timedelta
+import hashlib
+import json
 import logging
 import time
 
 logger = logging.getLogger(__name__)
-from .models import Subscriber, PlatformProfile
+from .models import FetchRun, Group, GroupPlatformStats, Subscriber, PlatformProfile, WeeklySnapshot
 from .forms import SubscriberProfileForm, PlatformProfileForm
+from .middleware import get_cached_subscriber
+from . import metrics
+from .circuit_breaker import get_all_circuit_states
+from .scheduling import run_scheduled_refresh
+from .sharding import is_last_shard, parse_shard
 from django.contrib.auth import logout
-from .tasks import send_report_email, fetch_leaderboard_data, record_weekly_stats, send_all_weekly_reports, fetch_leetcode_data, fetch_codeforces_data, fetch_codechef_data
+from .tasks import send_report_email, fetch_leaderboard_data, record_weekly_stats, send_all_weekly_reports, get_platform_data, merge_partial_data, fetch_outcome, fetch_status_fields, FETCH_RUN_BUDGET
 from django.core.paginator import Paginator
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import parse_etags
+from django.utils import timezone
+from django.db.models import F, Prefetch
+from django.db.models.functions import Lower
 from django.core.cache import cache
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
 # DRF imports for API views
 from rest_framework.decorators import api_view
@@ -21,12 +41,63 @@ from rest_framework import status
 
 # ---------------- CACHE + RATE LIMIT HELPERS ----------------
 
+DATA_VERSION_KEY = "data_version"
+
+
 def invalidate_leaderboard_cache():
     """
     Clear all leaderboard cache variations.
     Uses Redis SCAN via django-redis delete_pattern.
+    Also clears cached public stats and bumps the data version used for ETags.
     """
     cache.delete_pattern("leaderboard:*")
+    cache.delete_pattern("public_stats:*")
+    bump_data_version()
+
+
+def get_data_version():
+    """Return the generation counter for profile/subscriber data."""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a lost counter never repeats an old version
+        cache.add(DATA_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    """Mark profile/subscriber data as changed (invalidates all ETags)."""
+    try:
+        cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        cache.add(DATA_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+# ---------------- CONDITIONAL GET HELPERS ----------------
+
+def make_etag(*scope):
+    """Strong ETag from the current data version and the response scope.
+
+    Only reads the version counter, so it can be checked before any ORM
+    or serialization work.
+    """
+    raw = ":".join(str(part) for part in (get_data_version(),) + scope)
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    """True if the request's If-None-Match header covers `etag`."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
 
 
 def check_refresh_rate_limit(profile_id, email, limit_seconds=60):
@@ -58,6 +129,20 @@ def serialize_profile(profile):
         'problems_solved': profile.problems_solved,
         'contests_attended': profile.contests_attended,
         'subscriber_id': profile.subscriber_id,
+        'fetch_status': profile.fetch_status,
+        'consecutive_failures': profile.consecutive_failures,
+        'last_success_at': profile.last_success_at.isoformat() if profile.last_success_at else None,
+        'next_fetch_at': profile.next_fetch_at.isoformat() if profile.next_fetch_at else None,
+    }
+
+
+def serialize_combined_entry(subscriber):
+    """Leaderboard row for sort_by=combined; expects prefetched platform_profiles."""
+    return {
+        'subscriber_id': subscriber.id,
+        'group': subscriber.group,
+        'combined_score': subscriber.combined_score,
+        'profiles': {p.platform_name: p.username for p in subscriber.platform_profiles.all()},
     }
 
 
@@ -76,44 +161,74 @@ def my_profiles(request):
     if not email:
         logger.warning("my_profiles: no session email found")
         return Response({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    etag = make_etag('my_profiles', email)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    try:
-        subscriber = Subscriber.objects.get(email=email)
-        profiles = PlatformProfile.objects.filter(subscriber=subscriber)
-        logger.info(f"my_profiles retrieved {len(profiles)} profiles for {email}")
-        return Response({
-            'subscriber': serialize_subscriber(subscriber),
-            'profiles': [serialize_profile(p) for p in profiles],
-        })
-    except Subscriber.DoesNotExist:
+    subscriber = request.subscriber
+    if not subscriber:
         logger.error(f"my_profiles: subscriber not found for email {email}")
         return Response({'error': 'subscriber not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    profiles = PlatformProfile.objects.filter(subscriber=subscriber)
+    logger.info(f"my_profiles retrieved {len(profiles)} profiles for {email}")
+    response = Response({
+        'subscriber': serialize_subscriber(subscriber),
+        'profiles': [serialize_profile(p) for p in profiles],
+    })
+    response['ETag'] = etag
+    return response
+
 
-@api_view(['POST'])
-def refresh_profile(request, profile_id):
+# dedicated to _run_detached, so slow upstream calls don't queue behind (or
+# ahead of) anything else using the event loop's default executor
+_detached_executor = ThreadPoolExecutor(max_workers=settings.ASYNC_UPSTREAM_THREADS, thread_name_prefix='upstream')
+
+
+def _run_detached(func, *args, **kwargs):
+    """Run blocking work from an async view, closing DB connections it opened.
+
+    Called through `_detached` so a slow upstream call holds a thread of
+    `_detached_executor` (ASYNC_UPSTREAM_THREADS) instead of the event loop
+    or worker.
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+_detached = sync_to_async(_run_detached, thread_sensitive=False, executor=_detached_executor)
+
+
+@csrf_exempt
+@require_POST
+async def refresh_profile(request, profile_id):
     """Refresh a specific profile by fetching the latest data from the platform API.
     
-    Only the profile owner can refresh their own profile.
+    Only the profile owner can refresh their own profile. Async view: the
+    upstream fetch runs off the event loop and the ORM calls are async.
     """
     logger.info(f"refresh_profile request - profile_id: {profile_id}")
-    email = request.session.get('subscriber_email')
+    email = await request.session.aget('subscriber_email')
     if not email:
         logger.warning(f"refresh_profile {profile_id}: no session email")
-        return Response({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
+        return JsonResponse({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
     
-    try:
-        subscriber = Subscriber.objects.get(email=email)
-    except Subscriber.DoesNotExist:
+    subscriber = await request.asubscriber()
+    if not subscriber:
         logger.error(f"refresh_profile {profile_id}: subscriber not found for {email}")
-        return Response({'error': 'subscriber not found'}, status=status.HTTP_404_NOT_FOUND)
+        return JsonResponse({'error': 'subscriber not found'}, status=status.HTTP_404_NOT_FOUND)
     
     # Ensure the profile belongs to the current user
-    profile = get_object_or_404(PlatformProfile, id=profile_id, subscriber=subscriber)
+    profile = await PlatformProfile.objects.filter(id=profile_id, subscriber=subscriber).afirst()
+    if profile is None:
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     # --- RATE LIMIT ---
-    allowed, retry = check_refresh_rate_limit(profile_id, email)
+    allowed, retry = await sync_to_async(check_refresh_rate_limit)(profile_id, email)
     if not allowed:
-        return Response(
+        return JsonResponse(
             {
                 "error": "rate_limited",
                 "detail": f"You have been rate limited. Try again in {retry} seconds."
@@ -126,34 +241,48 @@ def refresh_profile(request, profile_id):
     platform_name = profile.platform_name
     username = profile.username
     
-    fetch_map = {
-        'LeetCode': fetch_leetcode_data,
-        'Codeforces': fetch_codeforces_data,
-        'CodeChef': fetch_codechef_data,
-    }
-    
     try:
-        if platform_name in fetch_map:
-            logger.debug(f"refresh_profile {profile_id}: fetching from {platform_name}")
-            data = fetch_map[platform_name](username)
+        logger.debug(f"refresh_profile {profile_id}: fetching from {platform_name}")
+        data = await _detached(
+            get_platform_data, platform_name, username, caller='refresh_profile'
+        )
+        if data is not None:
+            outcome = fetch_outcome(data)
+            # a manual refresh ignores the backoff but still updates the status
+            for field, value in fetch_status_fields(profile.consecutive_failures, outcome).items():
+                setattr(profile, field, value)
+            if outcome != 'success':
+                await profile.asave(update_fields=['fetch_status', 'consecutive_failures', 'next_fetch_at'])
+                logger.warning(f"refresh_profile {profile_id}: {platform_name}/{username} fetch {outcome}")
+                if outcome == 'not_found':
+                    error, code = 'handle not found', status.HTTP_404_NOT_FOUND
+                else:
+                    error, code = 'upstream unavailable', status.HTTP_502_BAD_GATEWAY
+                return JsonResponse({'error': error, 'profile': serialize_profile(profile)}, status=code)
+            # Keep existing values for fields the fetcher could not load
+            data = merge_partial_data(data, {
+                'rating': profile.last_rating,
+                'problems_solved': profile.problems_solved,
+                'contests': profile.contests_attended,
+            })
             logger.debug(f"refresh_profile {profile_id}: fetched rating={data.get('rating')}, problems={data.get('problems_solved')}, contests={data.get('contests')}")
             # Update profile with fresh data
             profile.last_rating = -1 if data.get('rating') == 'N/A' else data.get('rating')
             profile.problems_solved = -1 if data.get('problems_solved') == 'N/A' else data.get('problems_solved')
             profile.contests_attended = -1 if data.get('contests') == 'N/A' else data.get('contests')
-            profile.save()
-            invalidate_leaderboard_cache()
+            await profile.asave()
+            await sync_to_async(invalidate_leaderboard_cache)()
             logger.info(f"refresh_profile {profile_id}: successfully updated for {email}")
-            return Response({
+            return JsonResponse({
                 'status': 'refreshed',
                 'profile': serialize_profile(profile),
             })
         else:
             logger.error(f"refresh_profile {profile_id}: unknown platform {platform_name}")
-            return Response({'error': 'unknown platform'}, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse({'error': 'unknown platform'}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"refresh_profile {profile_id}: error refreshing {platform_name}/{username} - {str(e)}", exc_info=True)
-        return Response(
+        return JsonResponse(
             {'error': 'refresh failed', 'detail': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
@@ -171,21 +300,22 @@ def home(request):
     email = request.session.get('subscriber_email')
 
     if email:
-        try:
-            subscriber = Subscriber.objects.get(email=email)
+        if request.subscriber:
+            subscriber = request.subscriber
             platforms = list(PlatformProfile.objects.filter(subscriber=subscriber))
-        except Subscriber.DoesNotExist:
+        else:
             del request.session['subscriber_email']
             email = None
     if request.method == 'POST':
         data = request.data
         if 'email' in data:
             email = data.get('email')
-            try:
-                subscriber = Subscriber.objects.get(email=email)
+            login_subscriber = get_cached_subscriber(email)
+            if login_subscriber:
+                subscriber = login_subscriber
                 request.session['subscriber_email'] = email
                 platforms = list(PlatformProfile.objects.filter(subscriber=subscriber))
-            except Subscriber.DoesNotExist:
+            else:
                 email_error = "Email not found. Please subscribe first."
         if data.get('send_report'):
             if subscriber:
@@ -203,18 +333,21 @@ def home(request):
 
 
 
-@api_view(['POST'])
-def send_daily_report(request):
-    """API endpoint to queue the daily report for the logged-in subscriber."""
-    email = request.session.get('subscriber_email')
+@csrf_exempt
+@require_POST
+async def send_daily_report(request):
+    """API endpoint to queue the daily report for the logged-in subscriber.
+
+    Async view: fetching stats and sending the email run off the event loop.
+    """
+    email = await request.session.aget('subscriber_email')
     if not email:
-        return Response({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
-    try:
-        subscriber = Subscriber.objects.get(email=email)
-        send_report_email(subscriber)
-        return Response({'status': 'queued'})
-    except Subscriber.DoesNotExist:
-        return Response({'error': 'subscriber missing'}, status=status.HTTP_404_NOT_FOUND)
+        return JsonResponse({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
+    subscriber = await request.asubscriber()
+    if not subscriber:
+        return JsonResponse({'error': 'subscriber missing'}, status=status.HTTP_404_NOT_FOUND)
+    await _detached(send_report_email, subscriber)
+    return JsonResponse({'status': 'queued'})
 
 @api_view(['GET','PUT','PATCH'])
 def update_platform_username(request, platform_name, username):
@@ -299,9 +432,8 @@ def add_platform_profile(request):
         logger.warning("add_platform_profile: no session email")
         return Response({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
     
-    try:
-        subscriber = Subscriber.objects.get(email=email)
-    except Subscriber.DoesNotExist:
+    subscriber = request.subscriber
+    if not subscriber:
         logger.error(f"add_platform_profile: subscriber not found for {email}")
         return Response({'error': 'subscriber missing'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -369,19 +501,31 @@ def leaderboard(request):
     """Return leaderboard JSON with optional sorting/filtering/pagination.
     
        Includes current user's ranking efficiently using cached rank map.
+       `sort_by=combined` ranks subscribers by their precomputed
+       cross-platform score instead of profiles; `platform` is ignored.
     """
     email = request.session.get('subscriber_email')
     if not email:
         logger.warning("leaderboard: no session email")
         return Response({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
 
-    subscriber = Subscriber.objects.get(email=email)
-
     sort_by = request.query_params.get('sort_by', 'rating')
     platform_filter = request.query_params.get('platform')
+    if sort_by == 'combined':
+        platform_filter = None
     group_filter = request.query_params.get('group')
     page = request.query_params.get('page', 1)
 
+    # user_rankings are per subscriber, so the email is part of the scope
+    etag = make_etag('leaderboard', email, sort_by, platform_filter, group_filter, page)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    subscriber = request.subscriber
+    if not subscriber:
+        logger.error(f"leaderboard: subscriber not found for {email}")
+        return Response({'error': 'subscriber not found'}, status=status.HTTP_404_NOT_FOUND)
+
     logger.info(f"leaderboard request - email: {email}, sort_by: {sort_by}, platform: {platform_filter}, group: {group_filter}, page: {page}")
 
     # Cache key
@@ -391,18 +535,27 @@ def leaderboard(request):
     if cached:
         ordered_ids, rank_map = cached
         logger.debug(f"leaderboard: cache hit {cache_key}")
+        metrics.LEADERBOARD_CACHE.labels('hit').inc()
     else:
         logger.debug(f"leaderboard: cache miss {cache_key}, querying DB")
+        metrics.LEADERBOARD_CACHE.labels('miss').inc()
+
+        if sort_by == 'combined':
+            # ranked by the stored score alone, no join across profiles
+            qs = Subscriber.objects.filter(combined_score__isnull=False)
+            if subscriber.group and group_filter == subscriber.group:
+                qs = qs.filter(group=subscriber.group)
+            qs = qs.order_by('-combined_score', 'id')
+        else:
+            qs = PlatformProfile.objects.all()
 
-        qs = PlatformProfile.objects.all()
-
-        if subscriber.group and group_filter == subscriber.group:
-            qs = qs.filter(subscriber__group=subscriber.group)
+            if subscriber.group and group_filter == subscriber.group:
+                qs = qs.filter(subscriber__group=subscriber.group)
 
-        if platform_filter:
-            qs = qs.filter(platform_name=platform_filter)
+            if platform_filter:
+                qs = qs.filter(platform_name=platform_filter)
 
-        qs = qs.order_by('-problems_solved' if sort_by == 'problems_solved' else '-last_rating')
+            qs = qs.order_by('-problems_solved' if sort_by == 'problems_solved' else '-last_rating')
 
         ordered_ids = list(qs.values_list('id', flat=True))
         rank_map = {pid: idx + 1 for idx, pid in enumerate(ordered_ids)}
@@ -410,37 +563,51 @@ def leaderboard(request):
         cache.set(cache_key, (ordered_ids, rank_map), 3600)  # 1 hour safe cache
         logger.info(f"leaderboard: cached {len(ordered_ids)} entries")
 
-    # Fetch only required objects efficiently
-    profiles_map = {
-        p.id: serialize_profile(p)
-        for p in PlatformProfile.objects.filter(id__in=ordered_ids)
-    }
-
-    all_profiles = [profiles_map[i] for i in ordered_ids if i in profiles_map]
+    # -------- PAGINATION --------
+    # paginate the cached ids and load only the rows on this page
+    paginator = Paginator(ordered_ids, 10)
+    page_obj = paginator.get_page(page)
+    page_ids = list(page_obj)
+    if sort_by == 'combined':
+        entries_map = {
+            s.id: serialize_combined_entry(s)
+            for s in Subscriber.objects.filter(id__in=page_ids).prefetch_related('platform_profiles')
+        }
+    else:
+        entries_map = {
+            p.id: serialize_profile(p)
+            for p in PlatformProfile.objects.filter(id__in=page_ids)
+        }
+    results = [entries_map[i] for i in page_ids if i in entries_map]
 
     # -------- USER RANKINGS (O(1)) --------
-    user_profiles = subscriber.platform_profiles.all()
-    if platform_filter:
-        user_profiles = user_profiles.filter(platform_name=platform_filter)
-
     user_rankings = {}
-    for user_profile in user_profiles:
-        rank = rank_map.get(user_profile.id)
+    if sort_by == 'combined':
+        rank = rank_map.get(subscriber.id)
         if rank:
-            user_rankings[user_profile.platform_name] = {
+            user_rankings['combined'] = {
                 'rank': rank,
                 'total_in_leaderboard': len(ordered_ids),
-                'profile': profiles_map.get(user_profile.id),
+                'combined_score': subscriber.combined_score,
             }
-
-    # -------- PAGINATION --------
-    paginator = Paginator(all_profiles, 10)
-    page_obj = paginator.get_page(page)
+    else:
+        user_profiles = subscriber.platform_profiles.all()
+        if platform_filter:
+            user_profiles = user_profiles.filter(platform_name=platform_filter)
+
+        for user_profile in user_profiles:
+            rank = rank_map.get(user_profile.id)
+            if rank:
+                user_rankings[user_profile.platform_name] = {
+                    'rank': rank,
+                    'total_in_leaderboard': len(ordered_ids),
+                    'profile': serialize_profile(user_profile),
+                }
 
     logger.info(f"leaderboard: page {page_obj.number}/{paginator.num_pages} returned")
 
-    return Response({
-        'results': list(page_obj),
+    response = Response({
+        'results': results,
         'page': page_obj.number,
         'pages': paginator.num_pages,
         'sort_by': sort_by,
@@ -450,32 +617,300 @@ def leaderboard(request):
         },
         'user_rankings': user_rankings,
     })
+    response['ETag'] = etag
+    return response
+
+
+def serialize_group(group):
+    platforms = {}
+    for stats in group.platform_stats.all():
+        top = stats.top_profile
+        platforms[stats.platform_name] = {
+            'profiles': stats.profile_count,
+            'total_problems': stats.total_problems,
+            'average_rating': stats.average_rating,
+            'top_member': {
+                'profile_id': top.id,
+                'username': top.username,
+                'rating': stats.top_rating,
+            } if top else None,
+        }
+    return {
+        'name': group.name,
+        'member_count': group.member_count,
+        'created_at': group.created_at.isoformat(),
+        'platforms': platforms,
+    }
+
+
+@api_view(['GET'])
+def group_detail(request, group_name):
+    """Group page: member count and per-platform aggregates.
+
+    Reads the precomputed Group/GroupPlatformStats rows, so the cost does
+    not depend on the group's size.
+    """
+    if not request.session.get('subscriber_email'):
+        return Response({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
+    group = (
+        Group.objects
+        .prefetch_related(Prefetch('platform_stats', queryset=GroupPlatformStats.objects.select_related('top_profile')))
+        .filter(name=group_name)
+        .first()
+    )
+    if group is None:
+        return Response({'error': 'group not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(serialize_group(group))
+
+
+# ---------------- EXPORTS ----------------
+
+EXPORT_CHUNK_SIZE = 2000  # rows per DB fetch; memory stays flat whatever the total
+EXPORT_CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+LEADERBOARD_EXPORT_FIELDS = (
+    'id', 'platform_name', 'username', 'subscriber__group',
+    'last_rating', 'problems_solved', 'contests_attended', 'updated_at',
+)
+SNAPSHOT_EXPORT_FIELDS = (
+    'profile_id', 'profile__platform_name', 'profile__username', 'profile__subscriber__group',
+    'timestamp', 'last_rating', 'problems_solved', 'contests_attended',
+)
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def _parse_export_bound(value, end=False):
+    """Parse a `since`/`until` value: an ISO datetime, or a date (whole day)."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day + timedelta(days=1) if end else day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _export_filters(request, date_field, group_field, platform_field):
+    """Build queryset filters from the query params, or return an error Response.
+
+    Staff users may export anything; a subscriber may export their own
+    group only, which is then applied even when `group` is omitted.
+    """
+    group = request.query_params.get('group')
+    if not (request.user and request.user.is_staff):
+        subscriber = request.subscriber
+        if subscriber is None:
+            return None, Response({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
+        if not subscriber.group or group not in (None, subscriber.group):
+            return None, Response({'error': 'exports are limited to your group'}, status=status.HTTP_403_FORBIDDEN)
+        group = subscriber.group
+
+    try:
+        since = _parse_export_bound(request.query_params.get('since'))
+        until = _parse_export_bound(request.query_params.get('until'), end=True)
+    except ValueError:
+        return None, Response({'error': 'since and until must be ISO dates or datetimes'}, status=status.HTTP_400_BAD_REQUEST)
+
+    filters = {}
+    if group:
+        filters[group_field] = group
+    if request.query_params.get('platform'):
+        filters[platform_field] = request.query_params['platform']
+    if since:
+        filters[f'{date_field}__gte'] = since
+    if until:
+        filters[f'{date_field}__lt'] = until
+    return filters, None
+
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _export_response(rows, columns, fmt, filename):
+    """Stream `rows` (tuples matching `columns`) as CSV or NDJSON.
+
+    The CSV header goes out before the query runs, so the first byte is
+    sent immediately.
+    """
+    def stream_csv():
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([_export_value(v) for v in row])
+
+    def stream_ndjson():
+        for row in rows:
+            yield json.dumps(dict(zip(columns, map(_export_value, row)))) + "\n"
+
+    response = StreamingHttpResponse(
+        stream_csv() if fmt == 'csv' else stream_ndjson(),
+        content_type=EXPORT_CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+@api_view(['GET'])
+def export_leaderboard(request, fmt):
+    """Full leaderboard as CSV or NDJSON, ranked like the `leaderboard` view.
+
+    Filters: `platform`, `group`, `since`/`until` (on `updated_at`), `sort_by`.
+    """
+    if fmt not in EXPORT_CONTENT_TYPES:
+        return Response({'error': 'format must be csv or ndjson'}, status=status.HTTP_404_NOT_FOUND)
+    filters, error = _export_filters(request, 'updated_at', 'subscriber__group', 'platform_name')
+    if error:
+        return error
+
+    sort_by = request.query_params.get('sort_by', 'rating')
+    order = '-problems_solved' if sort_by == 'problems_solved' else '-last_rating'
+    qs = (
+        PlatformProfile.objects.filter(**filters)
+        .order_by(F(order[1:]).desc(nulls_last=True), 'id')
+        .values_list(*LEADERBOARD_EXPORT_FIELDS)
+    )
+    logger.info(f"export_leaderboard: {fmt} export, sort_by {sort_by}, filters {filters}")
+    columns = ('rank', 'profile_id', 'platform_name', 'username', 'group', 'last_rating', 'problems_solved', 'contests_attended', 'updated_at')
+    rows = ((rank, *row) for rank, row in enumerate(qs.iterator(chunk_size=EXPORT_CHUNK_SIZE), start=1))
+    return _export_response(rows, columns, fmt, 'leaderboard')
+
+
+@api_view(['GET'])
+def export_snapshots(request, fmt):
+    """Weekly snapshot history as CSV or NDJSON, per profile in time order.
+
+    Filters: `platform`, `group`, `since`/`until` (on the snapshot timestamp).
+    """
+    if fmt not in EXPORT_CONTENT_TYPES:
+        return Response({'error': 'format must be csv or ndjson'}, status=status.HTTP_404_NOT_FOUND)
+    filters, error = _export_filters(request, 'timestamp', 'profile__subscriber__group', 'profile__platform_name')
+    if error:
+        return error
+
+    qs = (
+        WeeklySnapshot.objects.filter(**filters)
+        .order_by('profile_id', 'timestamp')
+        .values_list(*SNAPSHOT_EXPORT_FIELDS)
+    )
+    logger.info(f"export_snapshots: {fmt} export, filters {filters}")
+    columns = ('profile_id', 'platform_name', 'username', 'group', 'timestamp', 'last_rating', 'problems_solved', 'contests_attended')
+    return _export_response(qs.iterator(chunk_size=EXPORT_CHUNK_SIZE), columns, fmt, 'snapshots')
 
 
 @api_view(['POST'])
 def fetch_leaderboard_data_view(request):
-    """Fetch latest leaderboard data from platform APIs and clear cache."""
+    """Fetch latest leaderboard data from platform APIs and clear cache.
+
+    Optional `budget` query param (seconds) bounds the run; profiles not
+    reached in time are carried over to the next call. Optional `shard=i/n`
+    fetches only that shard, so n scheduled calls can split the work; only
+    shard n-1/n rescores, so call it last.
+    """
+    try:
+        budget = float(request.query_params.get('budget', FETCH_RUN_BUDGET))
+    except ValueError:
+        return Response({'error': 'invalid budget'}, status=status.HTTP_400_BAD_REQUEST)
+    shard = request.query_params.get('shard')
+    if shard:
+        try:
+            shard = parse_shard(shard)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
         logger.info("fetch_leaderboard_data_view: fetching latest data from platform APIs")
-        fetch_leaderboard_data()
+        summary = fetch_leaderboard_data(budget=budget, trigger='api', shard=shard or None, rescore=is_last_shard(shard or None))
         
         # Clear all leaderboard caches since data changed
         logger.debug("fetch_leaderboard_data_view: clearing leaderboard cache")
-        cache_keys = [
-            'leaderboard:None:None:rating',
-            'leaderboard:None:None:problems_solved',
-        ]
-        # Also clear group/platform-specific caches (simplified for now)
-        for key in cache_keys:
-            cache.delete(key)
+        invalidate_leaderboard_cache()
         
         logger.info("fetch_leaderboard_data_view: data fetched and cache cleared")
-        return Response({'status': 'success'})
+        return Response({'status': 'success', **summary})
     except Exception as e:
         logger.error(f"fetch_leaderboard_data_view: error - {str(e)}", exc_info=True)
         return Response({'status': 'error', 'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+def scheduled_refresh_view(request):
+    """Scheduler tick: refresh only the platforms due per the contest calendar.
+
+    Called every 15 minutes by the GitHub workflow; see `scheduling.py`.
+    Optional `budget` query param as for trigger-leaderboard; here it covers
+    the whole tick, calendar sync and contest ingest included.
+    """
+    try:
+        budget = float(request.query_params.get('budget', FETCH_RUN_BUDGET))
+    except ValueError:
+        return Response({'error': 'invalid budget'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        summary = run_scheduled_refresh(budget=budget)
+    except Exception as e:
+        logger.error(f"scheduled_refresh_view: error - {str(e)}", exc_info=True)
+        return Response({'status': 'error', 'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    if summary.get('run') or summary.get('contests'):
+        invalidate_leaderboard_cache()
+    return Response({'status': 'success', **summary})
+
+
+FETCH_RUNS_DEFAULT_LIMIT = 20
+FETCH_RUNS_MAX_LIMIT = 200
+
+
+def serialize_fetch_run(run):
+    return {
+        'id': run.id,
+        'trigger': run.trigger,
+        'shard': run.shard,
+        'parent_id': run.parent_id,
+        'status': run.status,
+        'budget': run.budget,
+        'started_at': run.started_at.isoformat(),
+        'finished_at': run.finished_at.isoformat() if run.finished_at else None,
+        'duration_seconds': run.duration_seconds,
+        'profiles_per_second': run.profiles_per_second,
+        'profiles_attempted': run.profiles_attempted,
+        'profiles_changed': run.profiles_changed,
+        'profiles_unchanged': run.profiles_unchanged,
+        'profiles_failed': run.profiles_failed,
+        'profiles_carried_over': run.profiles_carried_over,
+        'profiles_skipped': run.profiles_skipped,
+        'retries': run.retries,
+        'bytes_downloaded': run.bytes_downloaded,
+        'db_write_seconds': run.db_write_seconds,
+        'platforms': run.platform_stats,
+    }
+
+
+@api_view(['GET'])
+def fetch_run_history(request):
+    """Recorded leaderboard fetch runs, newest first, for comparing runs.
+
+    `ids=3,7` picks specific runs; otherwise the latest `limit` (default 20).
+    """
+    ids = request.query_params.get('ids')
+    try:
+        if ids:
+            runs = FetchRun.objects.filter(id__in=[int(i) for i in ids.split(',')])
+        else:
+            limit = min(int(request.query_params.get('limit', FETCH_RUNS_DEFAULT_LIMIT)), FETCH_RUNS_MAX_LIMIT)
+            runs = FetchRun.objects.all()[:max(limit, 0)]
+    except ValueError:
+        return Response({'error': 'ids and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'runs': [serialize_fetch_run(run) for run in runs]})
+
+
 @api_view(['POST'])
 def weekly_update(request):
     """Endpoint to record a snapshot and email subscribers.
@@ -504,7 +939,10 @@ def create_or_join_group(request):
     if not email:
         logger.warning("create_or_join_group: no session email")
         return Response({'error': 'not logged in'}, status=status.HTTP_401_UNAUTHORIZED)
-    subscriber = Subscriber.objects.get(email=email)
+    subscriber = request.subscriber
+    if not subscriber:
+        logger.error(f"create_or_join_group: subscriber not found for {email}")
+        return Response({'error': 'subscriber not found'}, status=status.HTTP_404_NOT_FOUND)
     action = request.data.get('action')
     logger.info(f"create_or_join_group: {email} action={action}")
     if action == 'create_group':
@@ -512,30 +950,36 @@ def create_or_join_group(request):
         if subscriber.group:
             logger.warning(f"create_or_join_group: {email} already in group {subscriber.group}")
             return Response({'error': 'already in group'}, status=status.HTTP_400_BAD_REQUEST)
-        if Subscriber.objects.filter(group=new_group_name).exists():
+        if not new_group_name:
+            return Response({'error': 'group name required'}, status=status.HTTP_400_BAD_REQUEST)
+        _, created = Group.objects.get_or_create(name=new_group_name)
+        if not created:
             logger.warning(f"create_or_join_group: group {new_group_name} already exists")
             return Response({'error': 'group exists'}, status=status.HTTP_400_BAD_REQUEST)
         subscriber.group = new_group_name
-        subscriber.save()
+        subscriber.save(update_fields=['group'])
+        invalidate_leaderboard_cache()
         logger.info(f"create_or_join_group: {email} created and joined group {new_group_name}")
         return Response({'status': 'joined', 'group': new_group_name})
     elif action == 'join_group':
         group_name = request.data.get('existing_group_name')
-        if not Subscriber.objects.filter(group=group_name).exists():
+        if not group_name or not Group.objects.filter(name=group_name).exists():
             logger.warning(f"create_or_join_group: group {group_name} not found")
             return Response({'error': 'group not found'}, status=status.HTTP_404_NOT_FOUND)
         if subscriber.group:
             logger.warning(f"create_or_join_group: {email} already in group {subscriber.group}")
             return Response({'error': 'already in group'}, status=status.HTTP_400_BAD_REQUEST)
         subscriber.group = group_name
-        subscriber.save()
+        subscriber.save(update_fields=['group'])
+        invalidate_leaderboard_cache()
         logger.info(f"create_or_join_group: {email} joined group {group_name}")
         return Response({'status': 'joined', 'group': group_name})
     elif action == 'leave_group':
         if subscriber.group:
             old = subscriber.group
             subscriber.group = None
-            subscriber.save()
+            subscriber.save(update_fields=['group'])
+            invalidate_leaderboard_cache()
             logger.info(f"create_or_join_group: {email} left group {old}")
             return Response({'status': 'left', 'group': old})
         logger.warning(f"create_or_join_group: {email} not in any group")
@@ -546,56 +990,159 @@ def create_or_join_group(request):
 
 @api_view(['GET'])
 def health(request):
-    """Simple health endpoint for load balancers or uptime checks."""
-    return Response({'status': 'ok'})
+    """Simple health endpoint for load balancers or uptime checks.
+
+    Also reports the per-platform circuit breaker state.
+    """
+    return Response({'status': 'ok', 'circuits': get_all_circuit_states()})
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint (text exposition format)."""
+    body, content_type = metrics.render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
+# ---------------- PUBLIC STATS LOOKUP ----------------
+
+PUBLIC_PLATFORMS = {
+    'leetcode': 'LeetCode',
+    'codechef': 'CodeChef',
+    'codeforces': 'Codeforces',
+}
+PUBLIC_STATS_CACHE_TTL = 60  # seconds a per-key lookup result is reused
+BATCH_LOOKUP_MAX_KEYS = 500
+
+
+def _public_stats_cache_key(platform_key, username_key):
+    return f"public_stats:{platform_key}:{username_key}"
+
+
+def lookup_public_stats(pairs):
+    """Resolve (platform, username) pairs to public stats.
+
+    Keys are normalized to lowercase, served from the per-key cache where
+    possible, and the rest are resolved in one query against the
+    (lower(username), platform_name) index.
+    Returns a dict keyed by the normalized (platform, username) pair.
+    """
+    keys = {(platform.lower(), username.strip().lower()) for platform, username in pairs}
+    keys = {key for key in keys if key[0] in PUBLIC_PLATFORMS}
+
+    cache_keys = {_public_stats_cache_key(*key): key for key in keys}
+    cached = cache.get_many(list(cache_keys))
+    results = {cache_keys[ck]: value for ck, value in cached.items()}
+
+    missing = keys - results.keys()
+    if missing:
+        logger.debug(f"lookup_public_stats: {len(results)} cached, querying {len(missing)} keys")
+        found = {}
+        rows = (
+            PlatformProfile.objects
+            .annotate(username_lower=Lower('username'))
+            .filter(
+                platform_name__in={PUBLIC_PLATFORMS[p] for p, _ in missing},
+                username_lower__in={u for _, u in missing},
+            )
+            .order_by('id')
+            .values('platform_name', 'username_lower', 'problems_solved', 'last_rating', 'contests_attended')
+        )
+        for row in rows:
+            # rows are ordered by id, so the newest profile wins on duplicates
+            found[(row['platform_name'].lower(), row['username_lower'])] = {
+                'problems_solved': row['problems_solved'],
+                'rating': row['last_rating'],
+                'contests': row['contests_attended'],
+            }
+
+        to_cache = {}
+        for key in missing:
+            results[key] = found.get(key, {
+                'problems_solved': 'User not found',
+                'rating': 'N/A',
+                'contests': 'N/A'
+            })
+            to_cache[_public_stats_cache_key(*key)] = results[key]
+        cache.set_many(to_cache, PUBLIC_STATS_CACHE_TTL)
+
+    return results
 
 
 def api_fetch_data_view(request):
     """API view to return stats for given usernames on each platform."""
-    platforms = {
-        'leetcode': 'LeetCode',
-        'codechef': 'CodeChef',
-        'codeforces': 'Codeforces',
+    result = {}
+    requested = {
+        param: request.GET.get(param)
+        for param in PUBLIC_PLATFORMS
+        if request.GET.get(param)
     }
 
-    result = {}
+    etag = make_etag('fetch_data', sorted(requested.items()))
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    for param, platform_name in platforms.items():
-        username = request.GET.get(param)
+    try:
+        stats = lookup_public_stats(requested.items())
+    except Exception as e:
+        logger.error(f"api_fetch_data_view: lookup failed - {str(e)}", exc_info=True)
+        stats = None
+
+    for param in PUBLIC_PLATFORMS:
+        username = requested.get(param)
         if not username:
             result[param] = {
                 'problems_solved': 'No username provided',
                 'rating': 'N/A',
                 'contests': 'N/A'
             }
-            continue
-
-        try:
-            profile = (
-                PlatformProfile.objects
-                .filter(platform_name__iexact=platform_name, username=username)
-                .order_by('-id')
-                .first()
-            )
-
-            if profile:
-                result[param] = {
-                    'problems_solved': profile.problems_solved,
-                    'rating': profile.last_rating,
-                    'contests': profile.contests_attended
-                }
-            else:
-                result[param] = {
-                    'problems_solved': 'User not found',
-                    'rating': 'N/A',
-                    'contests': 'N/A'
-                }
-
-        except Exception as e:
+        elif stats is None:
             result[param] = {
                 'problems_solved': 'Error',
-                'rating': str(e),
+                'rating': 'lookup failed',
                 'contests': 'N/A'
             }
+        else:
+            result[param] = stats[(param, username.strip().lower())]
+
+    response = JsonResponse(result)
+    if stats is not None:
+        response['ETag'] = etag
+    return response
+
+
+@api_view(['POST'])
+def api_fetch_data_batch_view(request):
+    """Batch version of `api_fetch_data_view` for dashboards and widgets.
+
+    Body: `{"profiles": [{"platform": "leetcode", "username": "foo"}, ...]}`.
+    Streams one JSON object per requested pair (NDJSON), in request order.
+    """
+    entries = request.data.get('profiles') if isinstance(request.data, dict) else None
+    if not isinstance(entries, list):
+        return Response({'error': 'profiles list required'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(entries) > BATCH_LOOKUP_MAX_KEYS:
+        return Response(
+            {'error': 'too many profiles', 'detail': f'At most {BATCH_LOOKUP_MAX_KEYS} profiles per request.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    pairs = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            return Response({'error': 'each profile must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+        pairs.append((str(entry.get('platform') or ''), str(entry.get('username') or '')))
+
+    logger.info(f"api_fetch_data_batch_view: {len(pairs)} profiles requested")
+
+    def stream():
+        stats = lookup_public_stats((p, u) for p, u in pairs if p and u)
+        for platform, username in pairs:
+            key = (platform.lower(), username.strip().lower())
+            line = {'platform': platform, 'username': username}
+            if key in stats:
+                line.update(stats[key])
+            else:
+                line['error'] = 'invalid platform or username'
+            yield json.dumps(line) + "\n"
 
-    return JsonResponse(result)
+    return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
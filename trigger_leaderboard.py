@@ -1,11 +1,11 @@
 import requests
 
-API_URL = "https://skilltracker-1yk8.onrender.com/trigger-leaderboard/"
+API_URL = "https://skilltracker-1yk8.onrender.com/scheduled-refresh/"
 
 def trigger_leaderboard():
     try:
         print(f"Calling API: {API_URL}")
-        response = requests.get(API_URL, timeout=80)
+        response = requests.post(API_URL, timeout=80)
         
         if response.status_code == 200:
             print("API call successful:", response.json())